@@ -0,0 +1,211 @@
+"""
+BM25 Index - in-memory lexical retrieval over the corpus chunks
+
+Exact-term queries (API names, class names like `fdl.Model`, config keys) are matched poorly by
+dense embeddings. This index scores the same chunk texts that `data_generation.generate_corpus_from_sources`
+emits with Okapi BM25, so the RAG tool can fuse lexical and vector rankings.
+
+The index is stored as CSR posting arrays in a single `.npz` (loaded without pickle) plus a JSON
+sidecar with the chunk texts and metadata:
+    bm25.npz              vocab, postings_ptr, postings_doc, postings_tf, doc_len, params
+    bm25_documents.json   {"corpus_version": ..., "documents": [{"text", "metadata"}, ...]}
+
+Build it from a corpus CSV:
+    python -m src.agentic_tools.bm25_index --csv-path local_assets/vector_index_feed_XXX.csv
+"""
+
+import json
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "bm25.npz"
+DOCUMENTS_FILE = "bm25_documents.json"
+
+# Identifiers keep their dots (`fdl.model.from_name`); each dotted part is indexed as well
+_TOKEN_RE = re.compile(r"[a-z0-9_]+(?:\.[a-z0-9_]+)*")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word/identifier tokens; dotted identifiers also yield their components."""
+    tokens: list[str] = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        tokens.append(token)
+        if "." in token:
+            tokens.extend(part for part in token.split(".") if part)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed document set, with postings in CSR form.
+
+    Args:
+        vocab: Term strings, position = term id
+        postings_ptr: Offsets into postings_doc/postings_tf per term id (len(vocab) + 1)
+        postings_doc: Document ids of each posting
+        postings_tf: Term frequency of each posting
+        doc_len: Token count of each document
+        documents: [{"text", "metadata"}] aligned with document ids
+        corpus_version: Corpus (CSV feed) the index was built from
+    """
+
+    def __init__(
+        self,
+        vocab: list[str],
+        postings_ptr: np.ndarray,
+        postings_doc: np.ndarray,
+        postings_tf: np.ndarray,
+        doc_len: np.ndarray,
+        documents: list[dict[str, Any]],
+        corpus_version: str | None = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+        ):
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.postings_ptr = postings_ptr
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.documents = documents
+        self.corpus_version = corpus_version
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_len = float(doc_len.mean()) if len(doc_len) else 0.0
+        doc_freq = np.diff(postings_ptr).astype(np.float64)
+        n_docs = len(documents)
+        self.idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, texts: list[str], metadatas: list[dict[str, Any]] | None = None, corpus_version: str | None = None, **kwargs) -> "BM25Index":
+        """Tokenize `texts` and build the posting lists."""
+        metadatas = metadatas or [{} for _ in texts]
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_len = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        vocab = sorted(postings)
+        postings_ptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        for i, term in enumerate(vocab):
+            postings_ptr[i + 1] = postings_ptr[i] + len(postings[term])
+        postings_doc = np.empty(int(postings_ptr[-1]), dtype=np.int32)
+        postings_tf = np.empty(int(postings_ptr[-1]), dtype=np.float32)
+        for i, term in enumerate(vocab):
+            start, end = postings_ptr[i], postings_ptr[i + 1]
+            postings_doc[start:end] = [doc_id for doc_id, _ in postings[term]]
+            postings_tf[start:end] = [tf for _, tf in postings[term]]
+
+        documents = [{"text": text, "metadata": dict(metadata or {})} for text, metadata in zip(texts, metadatas, strict=True)]
+        return cls(vocab, postings_ptr, postings_doc, postings_tf, doc_len, documents, corpus_version, **kwargs)
+
+    # ---------- persistence ----------
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"corpus_version": self.corpus_version, "documents": self.documents}, f, ensure_ascii=False)
+        np.savez(
+            os.path.join(directory, INDEX_FILE),
+            vocab=np.array(self.vocab, dtype=np.str_),
+            postings_ptr=self.postings_ptr,
+            postings_doc=self.postings_doc,
+            postings_tf=self.postings_tf,
+            doc_len=self.doc_len,
+            params=np.array([self.k1, self.b], dtype=np.float64),
+            )
+        logger.info(f"✓ BM25 index written to {directory} ({len(self.documents)} documents, {len(self.vocab)} terms)")
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        with np.load(os.path.join(directory, INDEX_FILE), allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            arrays = {name: data[name] for name in ("postings_ptr", "postings_doc", "postings_tf", "doc_len")}
+            vocab = data["vocab"].tolist()
+        with open(os.path.join(directory, DOCUMENTS_FILE), encoding="utf-8") as f:
+            sidecar = json.load(f)
+        return cls(vocab, documents=sidecar["documents"], corpus_version=sidecar.get("corpus_version"), k1=k1, b=b, **arrays)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, INDEX_FILE)) and os.path.exists(os.path.join(directory, DOCUMENTS_FILE))
+
+    # ---------- search ----------
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query`."""
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        length_norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / (self.avg_doc_len or 1.0))
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self.postings_ptr[term_id], self.postings_ptr[term_id + 1]
+            docs = self.postings_doc[start:end]
+            tf = self.postings_tf[start:end]
+            scores[docs] += self.idf[term_id] * tf * (self.k1 + 1.0) / (tf + length_norm[docs])
+        return scores
+
+    def full_match_score(self, query: str) -> float:
+        """Score of an average-length document containing every known term of `query` once (0 if none is known)."""
+        return float(sum(self.idf[self.term_ids[term]] for term in set(tokenize(query)) if term in self.term_ids))
+
+    def search(self, query: str, k: int = 4, filter: dict[str, str] | None = None) -> list[tuple[Document, float]]:
+        """Return up to `k` documents with a positive BM25 score, best first."""
+        scores = self.scores(query)
+        if filter:
+            for doc_id, document in enumerate(self.documents):
+                if any(str(document["metadata"].get(key)) != str(value) for key, value in filter.items()):
+                    scores[doc_id] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0 or k <= 0:
+            return []
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:k]]
+        return [
+            (Document(page_content=self.documents[i]["text"], metadata=dict(self.documents[i]["metadata"])), float(scores[i]))
+            for i in top
+            ]
+
+
+def build_from_csv(csv_path: str, directory: str) -> BM25Index:
+    """Build and save a BM25 index from a corpus CSV (`text` column plus optional metadata columns)."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=["text"])
+    df = df[df["text"].str.strip() != ""].reset_index(drop=True)
+    metadata_columns = [column for column in df.columns if column != "text"]
+    df[metadata_columns] = df[metadata_columns].fillna("")
+    metadatas = [{column: str(row[column]) for column in metadata_columns} for _, row in df.iterrows()]
+
+    index = BM25Index.build(df["text"].tolist(), metadatas, corpus_version=os.path.splitext(os.path.basename(csv_path))[0])
+    index.save(directory)
+    return index
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    from src.config import CONFIG_CHATBOT_NEW
+
+    parser = argparse.ArgumentParser(description="Build the BM25 index used for hybrid RAG retrieval")
+    parser.add_argument("--csv-path", default=None, help="Corpus CSV (defaults to the latest local_assets/vector_index_feed_*.csv)")
+    parser.add_argument("--output-dir", default=CONFIG_CHATBOT_NEW["BM25_INDEX_DIR"], help="Directory to write the index to")
+    args = parser.parse_args()
+
+    build_from_csv(args.csv_path or max(glob.glob("local_assets/vector_index_feed_*.csv"), key=os.path.getctime), args.output_dir)
@@ -1,30 +1,222 @@
+import asyncio
 import json
 import logging
-import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
-import requests
+import httpx
 from langchain_core.documents import Document
-from langchain_core.tools import tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 
-from src.config import CONFIG_CHATBOT_NEW as config  # noqa: N811
+from src.agentic_tools import pii_prescreen
+from src.agentic_tools.guardrail_cache import guardrail_result_cache
+from src.agentic_tools.guardrail_coalescer import guardrail_coalescer
+from src.agentic_tools.guardrail_keepwarm import PROBE_REQUESTS, guardrail_keepwarm
+from src.agentic_tools.guardrail_client import FAITHFULNESS_ENDPOINT, PII_ENDPOINT, SAFETY_ENDPOINT, guardrail_client
+from src.agentic_tools.guardrail_resilience import GuardrailUnavailableError, endpoint_guards, is_failure_response
+from src.agentic_tools.rag_postprocessing import token_windows
+from src.agentic_tools.retrieval_stash import retrieval_stash, thread_id_from_config
+from src.config import CONFIG_CHATBOT_NEW
+from src.utils.metrics import Sample, registry as metrics_registry
 
-FDL_GAURDRAIL_REQUESTS_TIMEOUT = config["FDL_GAURDRAIL_REQUESTS_TIMEOUT"]
 
-token = os.getenv("FIDDLER_API_KEY_GUARDRAILS")
-fiddler_url = config[ "FIDDLER_URL_GUARDRAILS"]
-url_safety = f"{fiddler_url}/v3/guardrails/ftl-safety"
-url_faithfulness = f"{fiddler_url}/v3/guardrails/ftl-response-faithfulness"
-url_sensitive_information = f"{fiddler_url}/v3/guardrails/sensitive-information"
+logger = logging.getLogger(__name__)
 
+# Runs the sync pre-flight checks side by side when no event loop is available
+_preflight_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="guardrail-preflight")
+# Scores the windows of long inputs side by side; separate from the pre-flight pool, whose tasks submit here
+_window_executor = ThreadPoolExecutor(max_workers=CONFIG_CHATBOT_NEW["GUARDRAIL_MAX_WINDOWS"], thread_name_prefix="guardrail-window")
 
-logger = logging.getLogger(__name__)
 
+def _parse_guardrail_response(http_response: httpx.Response, key: str, label: str) -> Any:
+    """Check the status of a guardrail response and return the value under `key`."""
+    if http_response.status_code != 200:
+        logger.error(f"Error: {label} API request failed with status code {http_response.status_code}")
+        logger.error(f"Response: {http_response.text}")
+        raise ValueError(f"API request failed with status code {http_response.status_code}")
 
-def get_faithfulness_guardrail_results(
-    response: str, source_docs: list
-    ) -> tuple[float, float]:
-    """Calculates the faithfulness score for a response given a query and source documents."""
+    try:
+        response_dict = http_response.json()
+        logger.debug(f"{label} API Response: {response_dict}")
+
+        if key in response_dict:
+            return response_dict[key]
+        logger.error(f"Warning: Expected {label} key not found. Available keys: {list(response_dict.keys())}")
+        raise ValueError(f"Expected {label} key not found. Available keys: {list(response_dict.keys())}")
+
+    except json.JSONDecodeError as e:
+        logger.error(f"Error decoding {label} JSON response: {e}")
+        logger.error(f"Raw response: {http_response.text}")
+        raise
+
+
+def _record_request(endpoint: str, latency: float, outcome: httpx.Response | Exception) -> None:
+    """Report one request to the keep-warm tracker and the endpoint's latency and status metrics."""
+    if isinstance(outcome, httpx.Response):
+        ok, status = not is_failure_response(outcome), str(outcome.status_code)
+    else:
+        ok, status = False, "timeout" if isinstance(outcome, httpx.TimeoutException) else "error"
+    guardrail_keepwarm.record_call(endpoint, latency, ok=ok)
+    metrics_registry.histogram("guardrail.request", "Guardrail HTTP request latency", labels={"endpoint": endpoint}).observe(latency)
+    metrics_registry.counter("guardrail.responses", "Guardrail HTTP responses by status code", labels={"endpoint": endpoint, "status": status}).inc()
+
+
+def _send(endpoint: str, data: dict, timeout: float) -> httpx.Response:
+    """POST one request over the pooled sync client and record it (keep-warm tracker, metrics)."""
+    start = time.perf_counter()
+    try:
+        http_response = guardrail_client.post(endpoint, data, timeout=timeout)
+    except Exception as e:
+        _record_request(endpoint, time.perf_counter() - start, e)
+        raise
+    _record_request(endpoint, time.perf_counter() - start, http_response)
+    return http_response
+
+
+async def _asend(endpoint: str, data: dict, timeout: float) -> httpx.Response:
+    """Async variant of _send over the pooled async client."""
+    start = time.perf_counter()
+    try:
+        http_response = await guardrail_client.apost(endpoint, data, timeout=timeout)
+    except Exception as e:
+        _record_request(endpoint, time.perf_counter() - start, e)
+        raise
+    _record_request(endpoint, time.perf_counter() - start, http_response)
+    return http_response
+
+
+def _cached_result(endpoint: str, cache_key: str | None, label: str) -> Any | None:
+    """Cached value for `cache_key`, counting the lookup as a hit or miss of the endpoint."""
+    if cache_key is None:
+        return None
+    cached = guardrail_result_cache.get(cache_key)
+    result = "miss" if cached is None else "hit"
+    metrics_registry.counter("guardrail.cache_lookups", "Guardrail result cache lookups", labels={"endpoint": endpoint, "result": result}).inc()
+    if cached is not None:
+        logger.debug(f"{label} guardrail result served from cache")
+    return cached
+
+
+def _store_result(endpoint: str, cache_key: str | None, value: Any) -> None:
+    """Cache a guardrail result; PII results carry the detected entity text and stay in memory only."""
+    if cache_key is not None:
+        guardrail_result_cache.set(cache_key, value, persist=endpoint != PII_ENDPOINT)
+
+
+def _observe_latency(guardrail: str, latency: float) -> float:
+    """Record the end-to-end latency of a guardrail function call (all windows, cache hits included)."""
+    metrics_registry.histogram("guardrail.latency", "Guardrail check latency as returned to the agent", labels={"guardrail": guardrail}).observe(latency)
+    return latency
+
+
+def _post_guardrail(endpoint: str, data: dict, key: str, label: str) -> tuple[Any, float]:
+    """
+    Score `data` at `endpoint`, serving repeated inputs from the guardrail result cache.
+
+    Returns:
+        Tuple of (value under `key`, latency_in_seconds); on a cache hit the latency is the lookup time
+
+    Raises:
+        GuardrailUnavailableError: the endpoint timed out, failed or has its circuit open
+    """
+    guardrail_start_time = time.time()
+    cache_key = guardrail_result_cache.key(endpoint, data) if guardrail_result_cache is not None else None
+    cached = _cached_result(endpoint, cache_key, label)
+    if cached is not None:
+        return cached, time.time() - guardrail_start_time
+    http_response = endpoint_guards.get(endpoint).call(lambda timeout: _send(endpoint, data, timeout))
+    value = _parse_guardrail_response(http_response, key, label)
+    _store_result(endpoint, cache_key, value)
+    return value, time.time() - guardrail_start_time
+
+
+async def _afetch_guardrail(endpoint: str, data: dict, key: str, label: str) -> Any:
+    """Send one guarded async request and return the parsed value under `key`."""
+    http_response = await endpoint_guards.get(endpoint).acall(lambda timeout: _asend(endpoint, data, timeout))
+    return _parse_guardrail_response(http_response, key, label)
+
+
+async def _apost_guardrail(endpoint: str, data: dict, key: str, label: str) -> tuple[Any, float]:
+    """
+    Async variant of _post_guardrail over the pooled async client; concurrent calls go through
+    the guardrail coalescer, which shares identical in-flight requests and bounds the fan-out.
+    """
+    guardrail_start_time = time.time()
+    cache_key = guardrail_result_cache.key(endpoint, data) if guardrail_result_cache is not None else None
+    cached = _cached_result(endpoint, cache_key, label)
+    if cached is not None:
+        return cached, time.time() - guardrail_start_time
+    if guardrail_coalescer is not None:
+        value = await guardrail_coalescer.submit(endpoint, data, lambda request: _afetch_guardrail(endpoint, request, key, label))
+    else:
+        value = await _afetch_guardrail(endpoint, data, key, label)
+    _store_result(endpoint, cache_key, value)
+    return value, time.time() - guardrail_start_time
+
+
+async def aprobe_guardrail(endpoint: str) -> None:
+    """
+    Send the keep-warm probe of `endpoint`: its smallest valid request, past the result cache and coalescer.
+
+    Raises:
+        GuardrailUnavailableError: the endpoint timed out, failed or has its circuit open
+    """
+    await endpoint_guards.get(endpoint).acall(lambda timeout: _asend(endpoint, PROBE_REQUESTS[endpoint], timeout))
+
+
+def start_guardrail_keepwarm() -> None:
+    """Start the keep-warm scheduler on the running event loop, unless disabled in the config."""
+    if CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_ENABLED"]:
+        guardrail_keepwarm.start(aprobe_guardrail)
+
+
+def _post_windows(endpoint: str, requests: list[dict], key: str, label: str) -> list[Any]:
+    """Score each window's request data; several windows are sent in parallel threads."""
+    if len(requests) == 1:
+        return [_post_guardrail(endpoint, requests[0], key, label)[0]]
+    futures = [_window_executor.submit(_post_guardrail, endpoint, data, key, label) for data in requests]
+    return [future.result()[0] for future in futures]
+
+
+async def _apost_windows(endpoint: str, requests: list[dict], key: str, label: str) -> list[Any]:
+    """Score each window's request data concurrently on the running event loop."""
+    results = await asyncio.gather(*(_apost_guardrail(endpoint, data, key, label) for data in requests))
+    return [value for value, _ in results]
+
+
+def _input_windows(text: str, max_tokens_key: str, label: str, max_windows: int) -> list[str]:
+    """
+    Split a guardrail input into token windows within the API limit under `max_tokens_key`.
+    At most `max_windows` windows are kept; coverage beyond that is dropped with a warning.
+    """
+    max_tokens = int(CONFIG_CHATBOT_NEW[max_tokens_key] * CONFIG_CHATBOT_NEW["GUARDRAIL_TOKEN_SAFETY_MARGIN"])
+    windows = token_windows(
+        text,
+        max_tokens,
+        CONFIG_CHATBOT_NEW["GUARDRAIL_TOKEN_ENCODING"],
+        overlap_tokens=CONFIG_CHATBOT_NEW["GUARDRAIL_WINDOW_OVERLAP_TOKENS"],
+        )
+    if len(windows) > 1:
+        metrics_registry.counter("guardrail.windowed_inputs", "Guardrail inputs split into token windows", labels={"input": label.lower()}).inc()
+    if len(windows) > max_windows:
+        logger.warning(f"{label} text needs {len(windows)} windows of {max_tokens} tokens; only the first {max_windows} are scored")
+        metrics_registry.counter("guardrail.truncated_inputs", "Guardrail inputs cut at GUARDRAIL_MAX_WINDOWS", labels={"input": label.lower()}).inc()
+        windows = windows[:max_windows]
+    elif len(windows) > 1:
+        logger.info(f"{label} text split into {len(windows)} windows of up to {max_tokens} tokens")
+    return windows
+
+
+def _faithfulness_requests(response: str, source_docs: list) -> tuple[list[dict], int]:
+    """
+    Validate the faithfulness inputs and split them into token-bounded request data.
+
+    Returns:
+        (request data for every response window x context window pair, grouped by response window;
+        number of context windows per group)
+    """
 
     # Extract text content from documents
     source_docs_list = []
@@ -36,21 +228,6 @@ def get_faithfulness_guardrail_results(
     # Convert list to single string as required by API
     context_text = "\n\n".join(source_docs_list)
 
-    # Validate token limits (approximate using character count)
-    # Faithfulness limits: 3500 tokens for context, 350 for response
-    # Rough estimate: 1 token ≈ 4 characters
-    max_context_chars  = int(3500 * 4 * 0.85)  # 85% of the theoretical limit as a safety margin
-    max_response_chars = int(350  * 4 * 0.85)  # 85% of the theoretical limit as a safety margin
-    # todo - move these magic numbers to a config file
-
-    if len(context_text) > max_context_chars:
-        logger.warning( f"Context text truncated from {len(context_text)} to {max_context_chars} characters to meet API limits")
-        context_text = context_text[:max_context_chars]
-
-    if len(response) > max_response_chars:
-        logger.warning( f"Response text truncated from {len(response)} to {max_response_chars} characters to meet API limits")
-        response = response[:max_response_chars]
-
     # Validate inputs
     if not response.strip():
         logger.error("Response cannot be empty")
@@ -60,102 +237,124 @@ def get_faithfulness_guardrail_results(
         logger.error("Context cannot be empty")
         raise ValueError("Context cannot be empty")
 
-    payload = json.dumps(
-        {
-            "data": {
-                "response": response,
-                "context": context_text,
-            }
-        }
-    )
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
-    guardrail_start_time = time.time()
-    guardrail_response_faithfulness = requests.request(
-        "POST",
-        url_faithfulness,
-        headers=headers,
-        data=payload,
-        timeout=FDL_GAURDRAIL_REQUESTS_TIMEOUT,
-    )
-    guardrail_end_time = time.time()
-    guardrail_latency = guardrail_end_time - guardrail_start_time
+    # Every response window is scored against every context window, within GUARDRAIL_MAX_WINDOWS requests
+    max_windows = CONFIG_CHATBOT_NEW["GUARDRAIL_MAX_WINDOWS"]
+    response_windows = _input_windows(response, "GUARDRAIL_FAITHFULNESS_RESPONSE_MAX_TOKENS", "Response", max_windows)
+    context_windows = _input_windows(
+        context_text, "GUARDRAIL_FAITHFULNESS_CONTEXT_MAX_TOKENS", "Context", max(1, max_windows // len(response_windows))
+        )
+    requests = [{"response": r, "context": c} for r in response_windows for c in context_windows]
+    return requests, len(context_windows)
 
-    # Check if request was successful
-    if guardrail_response_faithfulness.status_code != 200:
-        logger.error( f"Error: Faithfulness API request failed with status code {guardrail_response_faithfulness.status_code}" )
-        logger.error(f"Response: {guardrail_response_faithfulness.text}")
-        raise ValueError( f"API request failed with status code {guardrail_response_faithfulness.status_code}" )
 
-    try:
-        response_dict = guardrail_response_faithfulness.json()
-        logger.debug(f"Faithfulness API Response: {response_dict}")  # Debug print
+def _aggregate_faithfulness(scores: list[float], context_windows: int) -> float:
+    """
+    Conservative faithfulness of a windowed response: each response window counts as supported by
+    its best-matching context window (max), and the response is only as faithful as its least
+    supported window (min).
+    """
+    groups = [scores[i:i + context_windows] for i in range(0, len(scores), context_windows)]
+    return min(max(group) for group in groups)
 
-        # Try different possible key names
-        if "fdl_faithful_score" in response_dict:
-            return response_dict["fdl_faithful_score"], guardrail_latency
-        else:
-            logger.error(f"Warning: Expected faithfulness key not found. Available keys: {list(response_dict.keys())}" )
-            raise ValueError(f"Expected faithfulness key not found. Available keys: {list(response_dict.keys())}" )
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding faithfulness JSON response: {e}")
-        logger.error(f"Raw response: {guardrail_response_faithfulness.text}")
-        raise
+def get_faithfulness_guardrail_results(
+    response: str, source_docs: list
+    ) -> tuple[float, float]:
+    """Calculates the faithfulness score for a response given a query and source documents."""
+    guardrail_start_time = time.time()
+    requests, context_windows = _faithfulness_requests(response, source_docs)
+    scores = _post_windows(FAITHFULNESS_ENDPOINT, requests, "fdl_faithful_score", "Faithfulness")
+    return _aggregate_faithfulness(scores, context_windows), _observe_latency("faithfulness", time.time() - guardrail_start_time)
 
 
-def get_safety_guardrail_results(query: str) -> tuple[float, float]:
-    """Calculates the safety score for a given query."""
+async def aget_faithfulness_guardrail_results(
+    response: str, source_docs: list
+    ) -> tuple[float, float]:
+    """Async variant of get_faithfulness_guardrail_results over the pooled async client."""
+    guardrail_start_time = time.time()
+    requests, context_windows = _faithfulness_requests(response, source_docs)
+    scores = await _apost_windows(FAITHFULNESS_ENDPOINT, requests, "fdl_faithful_score", "Faithfulness")
+    return _aggregate_faithfulness(scores, context_windows), _observe_latency("faithfulness", time.time() - guardrail_start_time)
 
-    # Validate token limits (approximate using character count)
-    # Safety limit: 4096 tokens
-    # Rough estimate: 1 token ≈ 4 characters
-    max_input_chars = 4096 * 4 * 0.85  # 85% of the theoretical limit as a safety margin
 
-    if len(query) > max_input_chars:
-        logger.warning(
-            f"Query text truncated from {len(query)} to {max_input_chars} characters to meet API limits"
-        )
-        query = query[:max_input_chars]
+def _safety_requests(query: str) -> list[dict]:
+    """Validate the safety input and split it into token-bounded request data."""
 
     # Validate input
     if not query.strip():
         logger.error("Query cannot be empty")
         raise ValueError("Query cannot be empty")
 
-    payload = json.dumps({"data": {"input": query}})
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+    windows = _input_windows(query, "GUARDRAIL_SAFETY_MAX_TOKENS", "Query", CONFIG_CHATBOT_NEW["GUARDRAIL_MAX_WINDOWS"])
+    return [{"input": window} for window in windows]
+
+
+def get_safety_guardrail_results(query: str) -> tuple[float, float]:
+    """Calculates the safety score for a given query (the highest jailbreak score over its windows)."""
     guardrail_start_time = time.time()
-    guardrail_response_safety = requests.request(
-        "POST",
-        url_safety,
-        headers=headers,
-        data=payload,
-        timeout=FDL_GAURDRAIL_REQUESTS_TIMEOUT,
-        )
-    guardrail_end_time = time.time()
-    guardrail_latency = guardrail_end_time - guardrail_start_time
+    scores = _post_windows(SAFETY_ENDPOINT, _safety_requests(query), "fdl_jailbreaking", "Safety")
+    return max(scores), _observe_latency("safety", time.time() - guardrail_start_time)
 
-    # Check if request was successful
-    if guardrail_response_safety.status_code != 200:
-        logger.error(f"Error: API request failed with status code {guardrail_response_safety.status_code}")
-        logger.error(f"Response: {guardrail_response_safety.text}")
-        raise ValueError(f"API request failed with status code {guardrail_response_safety.status_code}")
 
-    try:
-        response_dict = guardrail_response_safety.json()
-        logger.debug(f"API Response: {response_dict}")  # Debug print
+async def aget_safety_guardrail_results(query: str) -> tuple[float, float]:
+    """Async variant of get_safety_guardrail_results over the pooled async client."""
+    guardrail_start_time = time.time()
+    scores = await _apost_windows(SAFETY_ENDPOINT, _safety_requests(query), "fdl_jailbreaking", "Safety")
+    return max(scores), _observe_latency("safety", time.time() - guardrail_start_time)
 
-        # Try different possible key names
-        if "fdl_jailbreaking" in response_dict:
-            return response_dict["fdl_jailbreaking"], guardrail_latency
-        else:
-            logger.error(f"Warning: Expected key not found in response. Available keys: {list(response_dict.keys())}")
-            raise ValueError(f"Expected key not found in response. Available keys: {list(response_dict.keys())}")
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding JSON response: {e}")
-        logger.error(f"Raw response: {guardrail_response_safety.text}")
-        raise
+def _pii_requests(
+    text: str,
+    entity_categories: str | list[str] = "PII",
+    custom_entities: list[str] | None = None,
+) -> list[dict]:
+    """Validate the PII input and split it into token-bounded request data."""
+
+    # Validate input
+    if not text.strip():
+        logger.error("Input text cannot be empty")
+        raise ValueError("Input text cannot be empty")
+
+    # Entity configuration is only sent when it differs from the default
+    entity_config: dict = {}
+    if entity_categories != "PII" or custom_entities:
+        entity_config["entity_categories"] = entity_categories
+        if custom_entities:
+            entity_config["custom_entities"] = custom_entities
+
+    windows = _input_windows(text, "GUARDRAIL_PII_MAX_TOKENS", "Input", CONFIG_CHATBOT_NEW["GUARDRAIL_MAX_WINDOWS"])
+    return [{"input": window, **entity_config} for window in windows]
+
+
+def _skip_remote_pii(text: str, entity_categories: str | list[str], custom_entities: list[str] | None) -> bool:
+    """In PII_PRESCREEN_MODE "fast", whether the local pre-screen finds default-PII input clearly clean."""
+    if CONFIG_CHATBOT_NEW["PII_PRESCREEN_MODE"] != "fast" or entity_categories != "PII" or custom_entities:
+        return False
+    pii_prescreen.stats["screened"] += 1
+    if pii_prescreen.is_clearly_clean(text):
+        pii_prescreen.stats["skipped"] += 1
+        logger.debug("PII pre-screen found the input clearly clean; remote PII guardrail skipped")
+        return True
+    return False
+
+
+def _merge_pii_entities(window_entities: list[list[dict]]) -> list[dict]:
+    """
+    Union of the entities detected in each window, simplified to label, text and score.
+    Entities seen in several (overlapping) windows are kept once with their highest score.
+    """
+    merged: dict[tuple[str, str], dict] = {}
+    for entities in window_entities:
+        for entity in entities:
+            simplified = {
+                "label": entity.get("label", "unknown"),
+                "text": entity.get("text", ""),
+                "score": entity.get("score", 0.0),
+            }
+            key = (simplified["label"], simplified["text"])
+            if key not in merged or simplified["score"] > merged[key]["score"]:
+                merged[key] = simplified
+    return list(merged.values())
 
 
 def get_pii_guardrail_results(
@@ -174,88 +373,92 @@ def get_pii_guardrail_results(
         Tuple of (detected_entities_list, latency_in_seconds) where detected_entities_list
         contains dictionaries with 'label', 'text', and 'score' for each detected entity.
     """
-    # Validate token limits (approximate using character count)
-    # PII limit: 4096 tokens
-    # Rough estimate: 1 token ≈ 4 characters
-    max_input_chars = int(4096 * 4 * 0.85)  # 85% of the theoretical limit as a safety margin
-
-    if len(text) > max_input_chars:
-        logger.warning(
-            f"Input text truncated from {len(text)} to {max_input_chars} characters to meet API limits"
-        )
-        text = text[:max_input_chars]
+    guardrail_start_time = time.time()
+    requests = _pii_requests(text, entity_categories, custom_entities)
+    if _skip_remote_pii(text, entity_categories, custom_entities):
+        return [], _observe_latency("pii", time.time() - guardrail_start_time)
+    window_entities = _post_windows(PII_ENDPOINT, requests, "fdl_sensitive_information_scores", "PII")
+    return _merge_pii_entities(window_entities), _observe_latency("pii", time.time() - guardrail_start_time)
 
-    # Validate input
-    if not text.strip():
-        logger.error("Input text cannot be empty")
-        raise ValueError("Input text cannot be empty")
 
-    # Build the request data
-    data: dict = {"input": text}
+async def aget_pii_guardrail_results(
+    text: str,
+    entity_categories: str | list[str] = "PII",
+    custom_entities: list[str] | None = None,
+) -> tuple[list[dict], float]:
+    """Async variant of get_pii_guardrail_results over the pooled async client."""
+    guardrail_start_time = time.time()
+    requests = _pii_requests(text, entity_categories, custom_entities)
+    if _skip_remote_pii(text, entity_categories, custom_entities):
+        return [], _observe_latency("pii", time.time() - guardrail_start_time)
+    window_entities = await _apost_windows(PII_ENDPOINT, requests, "fdl_sensitive_information_scores", "PII")
+    return _merge_pii_entities(window_entities), _observe_latency("pii", time.time() - guardrail_start_time)
 
-    # Add entity configuration if specified
-    if entity_categories != "PII" or custom_entities:
-        data["entity_categories"] = entity_categories
-        if custom_entities:
-            data["custom_entities"] = custom_entities
 
-    payload = json.dumps({"data": data})
-    headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+def _safety_result(jailbreak_score: float, latency: float) -> dict:
+    return {"jailbreak_score": jailbreak_score, "latency_in_seconds": latency}
 
-    guardrail_start_time = time.time()
-    guardrail_response_pii = requests.request(
-        "POST",
-        url_sensitive_information,
-        headers=headers,
-        data=payload,
-        timeout=FDL_GAURDRAIL_REQUESTS_TIMEOUT,
-    )
-    guardrail_end_time = time.time()
-    guardrail_latency = guardrail_end_time - guardrail_start_time
 
-    # Check if request was successful
-    if guardrail_response_pii.status_code != 200:
-        logger.error(
-            f"Error: PII API request failed with status code {guardrail_response_pii.status_code}"
-        )
-        logger.error(f"Response: {guardrail_response_pii.text}")
-        raise ValueError(
-            f"API request failed with status code {guardrail_response_pii.status_code}"
-        )
+def _pii_result(detected_entities: list[dict], latency: float) -> dict:
+    return {
+        "pii_detected": len(detected_entities) > 0,
+        "entity_count": len(detected_entities),
+        "detected_entities": detected_entities,
+        "latency_in_seconds": latency,
+    }
 
-    try:
-        response_dict = guardrail_response_pii.json()
-        logger.debug(f"PII API Response: {response_dict}")
-
-        # Extract the sensitive information scores
-        if "fdl_sensitive_information_scores" in response_dict:
-            entities = response_dict["fdl_sensitive_information_scores"]
-            # Transform to simplified format (excluding start/end positions)
-            simplified_entities = [
-                {
-                    "label": entity.get("label", "unknown"),
-                    "text": entity.get("text", ""),
-                    "score": entity.get("score", 0.0),
-                }
-                for entity in entities
-            ]
-            return simplified_entities, guardrail_latency
+
+def _unavailable_result(error: GuardrailUnavailableError) -> dict:
+    """Structured tool output for a guardrail that could not be reached, so the agent can carry on."""
+    result: dict = {"status": "unavailable", "error": str(error)}
+    if error.retry_after is not None:
+        result["retry_after_seconds"] = round(error.retry_after, 1)
+    return result
+
+
+def _preflight_results(safety: tuple | BaseException, pii: tuple | BaseException) -> dict[str, dict]:
+    results = {}
+    for name, outcome, to_result in (("safety", safety, _safety_result), ("pii", pii, _pii_result)):
+        if isinstance(outcome, GuardrailUnavailableError):
+            logger.warning(f"Pre-flight {name} guardrail unavailable: {outcome}")
+            results[name] = _unavailable_result(outcome)
+        elif isinstance(outcome, BaseException):
+            logger.warning(f"Pre-flight {name} guardrail failed: {outcome}")
+            results[name] = {"error": str(outcome)}
         else:
-            logger.error(
-                f"Warning: Expected PII key not found. Available keys: {list(response_dict.keys())}"
-            )
-            raise ValueError(
-                f"Expected PII key not found. Available keys: {list(response_dict.keys())}"
-            )
+            results[name] = to_result(*outcome)
+    return results
 
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding PII JSON response: {e}")
-        logger.error(f"Raw response: {guardrail_response_pii.text}")
-        raise
+
+async def arun_guardrail_preflight(text: str) -> dict[str, dict]:
+    """
+    Run the jailbreak (safety) and PII checks on a user message concurrently.
+
+    Returns:
+        {"safety": tool_fiddler_guardrail_safety output, "pii": tool_fiddler_guardrail_pii output};
+        a check that failed is reported as {"error": message} instead of raising
+    """
+    safety, pii = await asyncio.gather(
+        aget_safety_guardrail_results(text),
+        aget_pii_guardrail_results(text),
+        return_exceptions=True,
+        )
+    return _preflight_results(safety, pii)
+
+
+def run_guardrail_preflight(text: str) -> dict[str, dict]:
+    """Sync variant of arun_guardrail_preflight; both requests run in parallel threads."""
+    futures = (_preflight_executor.submit(get_safety_guardrail_results, text), _preflight_executor.submit(get_pii_guardrail_results, text))
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result())
+        except Exception as e:
+            outcomes.append(e)
+    return _preflight_results(*outcomes)
 
 
-@tool
-def tool_fiddler_guardrail_safety(query: str) -> dict:
+def _tool_fiddler_guardrail_safety(query: str) -> dict:
     """Jailbreak Detection Guardrail - CRITICAL SECURITY TOOL
 
     PURPOSE: Detect and prevent jailbreak attempts before processing user queries.
@@ -282,14 +485,52 @@ def tool_fiddler_guardrail_safety(query: str) -> dict:
     Outputs: (Dictionary/JSON):
         - jailbreak_score(float): Likelihood of jailbreak (0.0 = safe, 1.0 = definite jailbreak)
         - latency_in_seconds(float): Processing time in seconds
+        If the guardrail cannot be reached: {"status": "unavailable", "error": ..., "retry_after_seconds": ...}
 
     IMPORTANT: This is a security-critical tool. When in doubt, check the query.
     """
-    jailbreak_score, latency = get_safety_guardrail_results(query)
-    return {"jailbreak_score": jailbreak_score, "latency_in_seconds": latency}
+    try:
+        return _safety_result(*get_safety_guardrail_results(query))
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
+
+async def _atool_fiddler_guardrail_safety(query: str) -> dict:
+    """Native coroutine implementation of tool_fiddler_guardrail_safety (see the sync docstring)."""
+    try:
+        return _safety_result(*await aget_safety_guardrail_results(query))
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
+
+tool_fiddler_guardrail_safety = StructuredTool.from_function(
+    func=_tool_fiddler_guardrail_safety,
+    coroutine=_atool_fiddler_guardrail_safety,
+    name="tool_fiddler_guardrail_safety",
+    )
+
+def _no_documents_result(missing: list[str]) -> dict:
+    """Structured tool output when no retrieved document resolves, so the agent can retrieve first and retry."""
+    error = (
+        f"No retrieved documents found for ids {missing}; call rag_over_fiddler_knowledge_base first"
+        if missing else
+        "No documents were retrieved in this turn; call rag_over_fiddler_knowledge_base first"
+        )
+    return {"status": "no_documents", "error": error, "missing_ids": missing}
+
+def _resolve_faithfulness_documents(config: RunnableConfig, doc_ids: list[str] | None) -> tuple[list[Document], list[str]]:
+    """Documents of this turn's retrievals to check against, and the requested IDs that are unknown."""
+    return retrieval_stash.resolve(thread_id_from_config(config), doc_ids)
+
+def _faithfulness_result(faithfulness_score: float, latency: float, source_docs: list[Document], missing: list[str]) -> dict:
+    result = {
+        "faithfulness_score": faithfulness_score,
+        "latency_in_seconds": latency,
+        "documents_checked": len(source_docs),
+        }
+    if missing:
+        result["unknown_doc_ids"] = missing
+    return result
 
-@tool
-def tool_fiddler_guardrail_faithfulness(response: str, source_docs: list):
+def _tool_fiddler_guardrail_faithfulness(response: str, config: RunnableConfig, doc_ids: list[str] | None = None) -> dict:
     """Response Faithfulness Validator - QUALITY ASSURANCE TOOL
 
     PURPOSE: Ensure AI responses are grounded in retrieved documentation, preventing hallucinations.
@@ -301,18 +542,42 @@ def tool_fiddler_guardrail_faithfulness(response: str, source_docs: list):
 
     Inputs:
         - response(str): The candidate response or query to validate
-        - source_docs(list): Retrieved documents from RAG to check against
+        - doc_ids(list[str], optional): IDs of the retrieved documents to check against (e.g. ["D1", "D3"]).
+          Omit to check against every document retrieved in this turn. NEVER pass document text.
 
     Outputs: (Dictionary/JSON)
         - faithfulness_score(float): How well response aligns with sources (0.0 = unfaithful, 1.0 = perfectly faithful)
         - latency_in_seconds(float): Processing time in seconds
+        - documents_checked(int): Number of retrieved documents used as context
+        If the guardrail cannot be reached: {"status": "unavailable", "error": ..., "retry_after_seconds": ...}
+        If no retrieved document matches: {"status": "no_documents", "error": ..., "missing_ids": [...]}
 
     """
-    faithfulness_score, latency = get_faithfulness_guardrail_results(response, source_docs)
-    return {"faithfulness_score": faithfulness_score, "latency_in_seconds": latency}
+    source_docs, missing = _resolve_faithfulness_documents(config, doc_ids)
+    if not source_docs:
+        return _no_documents_result(missing)
+    try:
+        return _faithfulness_result(*get_faithfulness_guardrail_results(response, source_docs), source_docs, missing)
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
+
+async def _atool_fiddler_guardrail_faithfulness(response: str, config: RunnableConfig, doc_ids: list[str] | None = None) -> dict:
+    """Native coroutine implementation of tool_fiddler_guardrail_faithfulness (see the sync docstring)."""
+    source_docs, missing = _resolve_faithfulness_documents(config, doc_ids)
+    if not source_docs:
+        return _no_documents_result(missing)
+    try:
+        return _faithfulness_result(*await aget_faithfulness_guardrail_results(response, source_docs), source_docs, missing)
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
+
+tool_fiddler_guardrail_faithfulness = StructuredTool.from_function(
+    func=_tool_fiddler_guardrail_faithfulness,
+    coroutine=_atool_fiddler_guardrail_faithfulness,
+    name="tool_fiddler_guardrail_faithfulness",
+    )
 
-@tool
-def tool_fiddler_guardrail_pii(text: str) -> dict:
+def _tool_fiddler_guardrail_pii(text: str) -> dict:
     """PII Detection Guardrail - DATA PRIVACY PROTECTION TOOL
 
     PURPOSE: Detect personally identifiable information (PII) in user inputs to prevent data leakage.
@@ -339,6 +604,7 @@ def tool_fiddler_guardrail_pii(text: str) -> dict:
         - entity_count(int): Number of PII entities detected
         - detected_entities(list): List of detected PII with labels, text, and confidence scores
         - latency_in_seconds(float): Processing time in seconds
+        If the guardrail cannot be reached: {"status": "unavailable", "error": ..., "retry_after_seconds": ...}
 
     SUPPORTED PII TYPES (35+ types):
         - Personal: person, date_of_birth
@@ -349,12 +615,81 @@ def tool_fiddler_guardrail_pii(text: str) -> dict:
 
     IMPORTANT: This is a privacy-critical tool. Always check user inputs for PII.
     """
-    detected_entities, latency = get_pii_guardrail_results(text)
-    pii_detected = len(detected_entities) > 0
+    try:
+        return _pii_result(*get_pii_guardrail_results(text))
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
 
-    return {
-        "pii_detected": pii_detected,
-        "entity_count": len(detected_entities),
-        "detected_entities": detected_entities,
-        "latency_in_seconds": latency,
+async def _atool_fiddler_guardrail_pii(text: str) -> dict:
+    """Native coroutine implementation of tool_fiddler_guardrail_pii (see the sync docstring)."""
+    try:
+        return _pii_result(*await aget_pii_guardrail_results(text))
+    except GuardrailUnavailableError as e:
+        return _unavailable_result(e)
+
+tool_fiddler_guardrail_pii = StructuredTool.from_function(
+    func=_tool_fiddler_guardrail_pii,
+    coroutine=_atool_fiddler_guardrail_pii,
+    name="tool_fiddler_guardrail_pii",
+    )
+
+# Endpoint behind each guardrail tool, for the keep-warm health the agent sees
+GUARDRAIL_TOOL_ENDPOINTS = {
+    tool_fiddler_guardrail_safety.name: SAFETY_ENDPOINT,
+    tool_fiddler_guardrail_faithfulness.name: FAITHFULNESS_ENDPOINT,
+    tool_fiddler_guardrail_pii.name: PII_ENDPOINT,
     }
+
+
+def unavailable_guardrail_tools() -> dict[str, dict]:
+    """Keep-warm health of the guardrail tools whose endpoint is currently failing, by tool name."""
+    unavailable = guardrail_keepwarm.unavailable()
+    return {tool: unavailable[endpoint] for tool, endpoint in GUARDRAIL_TOOL_ENDPOINTS.items() if endpoint in unavailable}
+
+
+def _guardrail_state_samples() -> list[Sample]:
+    """Circuit, keep-warm, cache, coalescer and PII pre-screen state, read at every metrics scrape."""
+    samples = []
+    for endpoint, guard in endpoint_guards.snapshot().items():
+        labels = {"endpoint": endpoint}
+        samples += [
+            Sample("guardrail.circuit_open", "gauge", "1 while the endpoint's circuit is open or half-open", labels, float(guard["state"] != "closed")),
+            Sample("guardrail.timeout_seconds", "gauge", "Current adaptive request timeout", labels, guard["timeout_seconds"]),
+            Sample("guardrail.hedged_requests", "counter", "Hedged duplicate requests sent", labels, guard["hedged"]),
+            Sample("guardrail.rejected_requests", "counter", "Requests failed fast by the circuit breaker", labels, guard["rejected"]),
+            ]
+    for endpoint, health in guardrail_keepwarm.health().items():
+        labels = {"endpoint": endpoint}
+        samples += [
+            Sample("guardrail.endpoint_up", "gauge", "0 while the endpoint's last request failed", labels, float(health["status"] != "unavailable")),
+            Sample("guardrail.cold_after_seconds", "gauge", "Estimated idle time after which the endpoint goes cold", labels, health["cold_after_seconds"]),
+            Sample("guardrail.cold_starts", "counter", "Cold starts observed after idle gaps", labels, health["cold_starts"]),
+            Sample("guardrail.keepwarm_probes", "counter", "Keep-warm probes sent", labels, health["probes"]),
+            ]
+        if health["idle_seconds"] is not None:
+            samples.append(Sample("guardrail.idle_seconds", "gauge", "Seconds since the last request reached the endpoint", labels, health["idle_seconds"]))
+    if guardrail_result_cache is not None:
+        stats = guardrail_result_cache.stats()
+        samples += [
+            Sample("guardrail.cache_entries", "gauge", "Entries in the in-memory guardrail result cache", {}, stats["size"]),
+            Sample("guardrail.cache_disk_hits", "counter", "Guardrail results served from the disk tier", {}, stats["disk_hits"]),
+            ]
+    if guardrail_coalescer is not None:
+        stats = guardrail_coalescer.stats()
+        samples += [
+            Sample("guardrail.coalescer_calls", "counter", "Async guardrail calls through the coalescer", {}, stats["calls"]),
+            Sample("guardrail.coalescer_deduplicated", "counter", "Calls that shared an identical in-flight request", {}, stats["deduplicated"]),
+            ]
+    samples += [
+        Sample("guardrail.pii_prescreen_screened", "counter", "Messages screened by the local PII pre-screen", {}, pii_prescreen.stats["screened"]),
+        Sample("guardrail.pii_prescreen_skipped", "counter", "Messages that skipped the remote PII guardrail", {}, pii_prescreen.stats["skipped"]),
+        ]
+    return samples
+
+
+metrics_registry.register_collector("guardrails", _guardrail_state_samples)
+
+
+def get_guardrail_latency_stats() -> dict[str, dict[str, float]]:
+    """Return p50/p95/p99 latencies (ms) of the guardrail checks and their HTTP requests, by guardrail / endpoint."""
+    return metrics_registry.snapshot(prefix="guardrail.")
@@ -0,0 +1,224 @@
+"""
+Guardrail result cache - skip the remote guardrails for inputs that were already scored
+
+Repeated questions, retried turns and simulator personas send the same text to the safety, PII and
+faithfulness guardrails over and over. Scores are deterministic for a given input, so results are
+kept in a bounded TTL/LRU cache keyed by a content hash of the request:
+
+    safety:        sha256(endpoint, hash(normalized input))
+    PII:           sha256(endpoint, hash(normalized input), entity categories, custom entities)
+    faithfulness:  sha256(endpoint, hash(normalized response), hash(normalized context))
+
+Normalization only collapses whitespace; case and punctuation change guardrail scores and are kept.
+An optional SQLite file backs the in-memory cache so warm entries survive restarts. PII results
+contain the detected entity text, so callers keep them out of that file (`set(..., persist=False)`).
+
+    from src.agentic_tools.guardrail_cache import guardrail_result_cache
+    key = guardrail_result_cache.key(SAFETY_ENDPOINT, {"input": "..."})
+    score = guardrail_result_cache.get(key)
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from src.config import CONFIG_CHATBOT_NEW
+from src.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Expired and overflowing disk rows are removed every this many writes rather than on each one
+_DISK_PRUNE_EVERY = 64
+
+
+def _text_digest(text: str) -> str:
+    return hashlib.sha256(_WHITESPACE_RE.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+def guardrail_cache_key(endpoint: str, data: dict[str, Any]) -> str:
+    """
+    Content hash of a guardrail request.
+
+    Args:
+        endpoint: Guardrail endpoint path the request is sent to
+        data: Request data of one token window, e.g. {"input": ...} or {"response": ..., "context": ...}
+
+    Returns:
+        Hex sha256 digest; text fields are hashed individually after whitespace normalization
+    """
+    fields = {name: _text_digest(value) if isinstance(value, str) else value for name, value in data.items()}
+    material = json.dumps([endpoint, fields], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class _SqliteResultStore:
+    """SQLite table of JSON-encoded guardrail results with wall-clock expiry and a row bound."""
+
+    def __init__(self, path: str | Path, max_entries: int, ttl_seconds: float | None, clock: Callable[[], float]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Autocommit; each statement is its own short transaction
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS guardrail_results (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS guardrail_results_stored_at ON guardrail_results (stored_at)")
+        self._prune()
+
+    def get(self, key: str) -> tuple[float, Any] | None:
+        """(stored_at, value) of a live row, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT value, stored_at FROM guardrail_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        if self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds:
+            return None
+        return stored_at, json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO guardrail_results (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), self._clock()),
+                )
+            self._writes += 1
+            if self._writes % _DISK_PRUNE_EVERY == 0:
+                self._prune_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM guardrail_results").fetchone()[0]
+
+    def _prune(self) -> None:
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM guardrail_results WHERE stored_at < ?", (self._clock() - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM guardrail_results WHERE key NOT IN "
+            "(SELECT key FROM guardrail_results ORDER BY stored_at DESC LIMIT ?)",
+            (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM guardrail_results")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class GuardrailResultCache:
+    """
+    Bounded TTL/LRU cache of guardrail results, optionally backed by a SQLite file.
+
+    Lookups go to memory first; a disk hit is promoted into memory. Writes go to both. Disk errors
+    are logged and treated as misses so a broken cache file never fails a guardrail call.
+
+    Args:
+        max_size: Entries kept in memory
+        ttl_seconds: Result lifetime in seconds, in memory and on disk (None or <= 0 disables expiry)
+        disk_path: SQLite file for the persistent tier; None keeps the cache in memory only
+        disk_max_entries: Rows kept in the SQLite file (oldest removed first)
+        clock: Wall-clock time source (disk timestamps must stay meaningful across restarts)
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float | None = None,
+        disk_path: str | Path | None = None,
+        disk_max_entries: int = 50_000,
+        clock: Callable[[], float] = time.time,
+        ):
+        self._memory: TTLLRUCache[str, Any] = TTLLRUCache(max_size, ttl_seconds, clock)
+        self._disk: _SqliteResultStore | None = None
+        self.disk_hits = 0
+        if disk_path:
+            try:
+                self._disk = _SqliteResultStore(disk_path, disk_max_entries, self._memory.ttl_seconds, clock)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Guardrail cache file {disk_path} unavailable, caching in memory only: {e}")
+
+    key = staticmethod(guardrail_cache_key)
+
+    def get(self, key: str) -> Any | None:
+        """Cached result for `key`, or None on miss / expiry."""
+        value = self._memory.get(key)
+        if value is not None or self._disk is None:
+            return value
+        try:
+            entry = self._disk.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Guardrail cache read failed: {e}")
+            return None
+        if entry is None:
+            return None
+        self.disk_hits += 1
+        self._memory.set(key, entry[1])
+        return entry[1]
+
+    def set(self, key: str, value: Any, persist: bool = True) -> None:
+        """Store a JSON-serializable guardrail result under `key`; `persist=False` keeps it out of the disk tier."""
+        self._memory.set(key, value)
+        if persist and self._disk is not None:
+            try:
+                self._disk.set(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Guardrail cache write failed: {e}")
+
+    def clear(self) -> None:
+        """Drop all entries in memory and on disk."""
+        self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def stats(self) -> dict[str, Any]:
+        """Memory hit/miss counters plus disk hits and the disk file, if any."""
+        return {
+            **self._memory.stats(),
+            "disk_hits": self.disk_hits,
+            "disk_path": self._disk.path if self._disk is not None else None,
+            }
+
+
+def _build_default_cache() -> GuardrailResultCache | None:
+    if not CONFIG_CHATBOT_NEW["GUARDRAIL_CACHE_ENABLED"]:
+        return None
+    return GuardrailResultCache(
+        max_size=CONFIG_CHATBOT_NEW["GUARDRAIL_CACHE_MAX_SIZE"],
+        ttl_seconds=CONFIG_CHATBOT_NEW["GUARDRAIL_CACHE_TTL_SECONDS"],
+        disk_path=CONFIG_CHATBOT_NEW["GUARDRAIL_CACHE_DISK_PATH"],
+        disk_max_entries=CONFIG_CHATBOT_NEW["GUARDRAIL_CACHE_DISK_MAX_ENTRIES"],
+        )
+
+
+# Process-wide cache shared by all guardrail calls (None when disabled in the config)
+guardrail_result_cache = _build_default_cache()
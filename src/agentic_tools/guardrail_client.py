@@ -0,0 +1,171 @@
+"""
+Guardrail HTTP client - pooled keep-alive connections to the Fiddler guardrail endpoints
+
+`requests.request(...)` opens a new TCP + TLS connection for every guardrail call. This module keeps
+one httpx connection pool per process (sync) and per event loop (async), reused across calls and chat
+sessions, with HTTP/2 multiplexing (`h2`, from the httpx[http2] dependency). The authorization
+headers and the compact JSON encoder are built once.
+
+    from src.agentic_tools.guardrail_client import SAFETY_ENDPOINT, guardrail_client
+    response = guardrail_client.post(SAFETY_ENDPOINT, {"input": "..."})
+    response = await guardrail_client.apost(SAFETY_ENDPOINT, {"input": "..."})
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import threading
+import weakref
+from typing import Any
+
+import httpx
+
+from src.config import CONFIG_CHATBOT_NEW
+
+logger = logging.getLogger(__name__)
+
+SAFETY_ENDPOINT = "/v3/guardrails/ftl-safety"
+FAITHFULNESS_ENDPOINT = "/v3/guardrails/ftl-response-faithfulness"
+PII_ENDPOINT = "/v3/guardrails/sensitive-information"
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+TOKEN_ENV_VAR = "FIDDLER_API_KEY_GUARDRAILS"
+
+# Compact separators: the payload is machine-read, whitespace is wasted bytes on every call
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_payload(data: dict[str, Any]) -> bytes:
+    """Serialize a guardrail request body (`{"data": {...}}`)."""
+    return _encoder.encode({"data": data}).encode("utf-8")
+
+
+class GuardrailClient:
+    """
+    Shared sync/async HTTP client for the guardrail endpoints.
+
+    Args:
+        base_url: Guardrail host, e.g. https://demo.fiddler.ai
+        timeout: Read/write timeout in seconds
+        token: Bearer token; read from FIDDLER_API_KEY_GUARDRAILS when the first pool is opened if not given
+        connect_timeout: Connection (and pool acquisition) timeout in seconds
+        max_connections: Upper bound on open connections per pool
+        max_keepalive_connections: Idle connections kept open for reuse
+        keepalive_expiry: Seconds an idle connection is kept
+        http2: Negotiate HTTP/2; defaults to whether `h2` is installed
+        transport, async_transport: Custom httpx transports (tests, stand-in servers)
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float,
+        token: str | None = None,
+        connect_timeout: float = 5.0,
+        max_connections: int = 32,
+        max_keepalive_connections: int = 16,
+        keepalive_expiry: float = 120.0,
+        http2: bool | None = None,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        ):
+        self.base_url = base_url.rstrip("/")
+        self._token = token
+        self._headers: dict[str, str] | None = None
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout, pool=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            )
+        if http2 and not HTTP2_AVAILABLE:
+            logger.info("HTTP/2 requested for guardrail calls but `h2` is not installed; using HTTP/1.1 keep-alive")
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self._transport = transport
+        self._async_transport = async_transport
+        self._client: httpx.Client | None = None
+        # httpx.AsyncClient connections belong to the loop that opened them
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def url(self, endpoint: str) -> str:
+        return f"{self.base_url}{endpoint}"
+
+    def _request_timeout(self, timeout: float | None) -> Any:
+        """Per-call read/write timeout; connect and pool acquisition keep the client's bounds."""
+        if timeout is None:
+            return httpx.USE_CLIENT_DEFAULT
+        return httpx.Timeout(timeout, connect=self.timeout.connect, pool=self.timeout.pool)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Request headers, built once (lazily, so a token loaded from .env after import is picked up)."""
+        if self._headers is None:
+            token = self._token or os.getenv(TOKEN_ENV_VAR)
+            self._headers = {"Content-Type": "application/json", "Authorization": f"Bearer {token}"}
+        return self._headers
+
+    @property
+    def client(self) -> httpx.Client:
+        """Process-wide sync client, created on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        headers=self.headers,
+                        timeout=self.timeout,
+                        limits=self.limits,
+                        http2=self.http2,
+                        transport=self._transport,
+                        )
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Async client of the running event loop, created on first use in that loop."""
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                transport=self._async_transport,
+                )
+            self._async_clients[loop] = client
+        return client
+
+    def post(self, endpoint: str, data: dict[str, Any], timeout: float | None = None) -> httpx.Response:
+        """POST `{"data": data}` to `endpoint` over the pooled sync client."""
+        return self.client.post(self.url(endpoint), content=encode_payload(data), timeout=self._request_timeout(timeout))
+
+    async def apost(self, endpoint: str, data: dict[str, Any], timeout: float | None = None) -> httpx.Response:
+        """POST `{"data": data}` to `endpoint` over the pooled async client of the running loop."""
+        return await self.async_client().post(self.url(endpoint), content=encode_payload(data), timeout=self._request_timeout(timeout))
+
+    def close(self) -> None:
+        """Close the sync pool (async pools close with their event loop or via aclose)."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        """Close the async pool of the running event loop."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+# Process-wide client shared by all guardrail calls
+guardrail_client = GuardrailClient(
+    base_url=CONFIG_CHATBOT_NEW["FIDDLER_URL_GUARDRAILS"],
+    timeout=CONFIG_CHATBOT_NEW["FDL_GAURDRAIL_REQUESTS_TIMEOUT"],
+    connect_timeout=CONFIG_CHATBOT_NEW["GUARDRAIL_HTTP_CONNECT_TIMEOUT"],
+    max_connections=CONFIG_CHATBOT_NEW["GUARDRAIL_HTTP_MAX_CONNECTIONS"],
+    max_keepalive_connections=CONFIG_CHATBOT_NEW["GUARDRAIL_HTTP_MAX_KEEPALIVE_CONNECTIONS"],
+    keepalive_expiry=CONFIG_CHATBOT_NEW["GUARDRAIL_HTTP_KEEPALIVE_EXPIRY_SECONDS"],
+    http2=CONFIG_CHATBOT_NEW["GUARDRAIL_HTTP2"],
+    )
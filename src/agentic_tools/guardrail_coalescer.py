@@ -0,0 +1,185 @@
+"""
+Guardrail request coalescer - shares work between concurrent async guardrail calls
+
+At peak, dozens of Chainlit sessions each send their own single-item requests to the same
+guardrail endpoints. GuardrailCoalescer sits in front of the async guardrail calls of each event
+loop and:
+
+- deduplicates identical in-flight payloads: concurrent calls with the same (endpoint, payload)
+  content hash share one request and its result (or error),
+- micro-batches: for endpoints with a registered batch sender, calls arriving within a
+  GUARDRAIL_COALESCE_WINDOW_MS window are sent as one batch (flushed early at max_batch_size),
+- bounds the fan-out: at most GUARDRAIL_COALESCE_MAX_CONCURRENCY requests (or batches) are in
+  flight per event loop, so bursts reuse the pooled keep-alive connections instead of opening new ones.
+
+The Fiddler guardrail endpoints currently take a single input per request, so no batch senders are
+registered by default and calls are dispatched immediately (a collection window only adds latency
+when there is nothing to batch). Register one with `coalescer.batch_senders[endpoint] = send_batch`
+where `send_batch(list_of_data) -> list_of_values` returns results in request order.
+"""
+
+import asyncio
+import logging
+import weakref
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.agentic_tools.guardrail_cache import guardrail_cache_key
+from src.config import CONFIG_CHATBOT_NEW
+
+logger = logging.getLogger(__name__)
+
+BatchSender = Callable[[list[dict[str, Any]]], Awaitable[list[Any]]]
+
+
+@dataclass
+class _LoopState:
+    """Coalescing state of one event loop (asyncio primitives belong to the loop that created them)."""
+    semaphore: asyncio.Semaphore
+    in_flight: dict[str, asyncio.Future] = field(default_factory=dict)
+    pending: dict[str, list[tuple[dict[str, Any], asyncio.Future]]] = field(default_factory=dict)
+    timers: dict[str, asyncio.TimerHandle] = field(default_factory=dict)
+    tasks: set[asyncio.Task] = field(default_factory=set)
+
+
+class GuardrailCoalescer:
+    """
+    Deduplicating, batching and concurrency-bounding front for async guardrail requests.
+
+    Args:
+        window_seconds: How long the first call of a batch waits for more (batching endpoints only)
+        max_batch_size: Batch size that triggers an immediate flush
+        max_concurrency: Requests or batches in flight per event loop
+        batch_senders: Batch senders by endpoint path, for endpoints that accept several inputs per request
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 0.003,
+        max_batch_size: int = 32,
+        max_concurrency: int = 16,
+        batch_senders: dict[str, BatchSender] | None = None,
+        ):
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max_concurrency
+        self.batch_senders: dict[str, BatchSender] = dict(batch_senders or {})
+        self._states: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState] = weakref.WeakKeyDictionary()
+        self.calls = 0
+        self.deduplicated = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            state = self._states[loop] = _LoopState(semaphore=asyncio.Semaphore(self.max_concurrency))
+        return state
+
+    async def submit(self, endpoint: str, data: dict[str, Any], fetch: Callable[[dict[str, Any]], Awaitable[Any]]) -> Any:
+        """
+        Result of `fetch(data)` for `endpoint`, shared with identical in-flight calls.
+
+        Args:
+            endpoint: Guardrail endpoint path
+            data: Request data
+            fetch: Sends a single request and returns its parsed value (used when the endpoint has no batch sender)
+        """
+        state = self._state()
+        self.calls += 1
+        key = guardrail_cache_key(endpoint, data)
+        future = state.in_flight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        state.in_flight[key] = future
+        future.add_done_callback(lambda done: state.in_flight.pop(key, None) if state.in_flight.get(key) is done else None)
+
+        sender = self.batch_senders.get(endpoint)
+        if sender is None:
+            self._spawn(state, self._send_one(state, fetch, data, future))
+        else:
+            self._enqueue(state, endpoint, sender, data, future)
+        # Shielded so that one caller being cancelled does not cancel the shared request
+        return await asyncio.shield(future)
+
+    def _spawn(self, state: _LoopState, coroutine: Awaitable[None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        state.tasks.add(task)
+        task.add_done_callback(state.tasks.discard)
+
+    async def _send_one(self, state: _LoopState, fetch: Callable[[dict[str, Any]], Awaitable[Any]], data: dict[str, Any], future: asyncio.Future) -> None:
+        async with state.semaphore:
+            try:
+                value = await fetch(data)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                return
+        future.set_result(value)
+
+    def _enqueue(self, state: _LoopState, endpoint: str, sender: BatchSender, data: dict[str, Any], future: asyncio.Future) -> None:
+        batch = state.pending.setdefault(endpoint, [])
+        batch.append((data, future))
+        if len(batch) >= self.max_batch_size:
+            self._flush(state, endpoint, sender)
+        elif endpoint not in state.timers:
+            state.timers[endpoint] = asyncio.get_running_loop().call_later(self.window_seconds, self._flush, state, endpoint, sender)
+
+    def _flush(self, state: _LoopState, endpoint: str, sender: BatchSender) -> None:
+        timer = state.timers.pop(endpoint, None)
+        if timer is not None:
+            timer.cancel()
+        batch = state.pending.pop(endpoint, [])
+        if batch:
+            self._spawn(state, self._send_batch(state, sender, batch))
+
+    async def _send_batch(self, state: _LoopState, sender: BatchSender, batch: list[tuple[dict[str, Any], asyncio.Future]]) -> None:
+        self.batches += 1
+        self.batched_items += len(batch)
+        async with state.semaphore:
+            try:
+                values = await sender([data for data, _ in batch])
+                if len(values) != len(batch):
+                    raise ValueError(f"Batch sender returned {len(values)} results for {len(batch)} requests")
+            except asyncio.CancelledError:
+                for _, future in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        for (_, future), value in zip(batch, values, strict=True):
+            if not future.done():
+                future.set_result(value)
+
+    def stats(self) -> dict[str, int]:
+        """Call, deduplication and batch counters."""
+        return {
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            }
+
+
+def _build_default_coalescer() -> GuardrailCoalescer | None:
+    if not CONFIG_CHATBOT_NEW["GUARDRAIL_COALESCE_ENABLED"]:
+        return None
+    return GuardrailCoalescer(
+        window_seconds=CONFIG_CHATBOT_NEW["GUARDRAIL_COALESCE_WINDOW_MS"] / 1000,
+        max_batch_size=CONFIG_CHATBOT_NEW["GUARDRAIL_COALESCE_MAX_BATCH_SIZE"],
+        max_concurrency=CONFIG_CHATBOT_NEW["GUARDRAIL_COALESCE_MAX_CONCURRENCY"],
+        )
+
+
+# Process-wide coalescer for the async guardrail calls (None when disabled in the config)
+guardrail_coalescer = _build_default_coalescer()
@@ -0,0 +1,266 @@
+"""
+Guardrail keep-warm - in-process scheduler that keeps the guardrail endpoints from going cold
+
+The Fiddler guardrail endpoints scale down when idle, and the first request after that pays a
+cold start of several seconds inside a user turn. GuardrailKeepWarm runs as one asyncio task in
+the chatbot process and, per endpoint:
+
+- tracks the idle time since the last request that reached the endpoint (user calls and probes),
+- detects cold starts: a request after an idle gap of at least GUARDRAIL_KEEPWARM_MIN_COLD_AFTER_SECONDS
+  that is GUARDRAIL_KEEPWARM_COLD_FACTOR times slower than the endpoint's warm median (slow calls
+  after shorter gaps are load, not cold starts). The idle gap of a cold start lowers the endpoint's
+  cold-after estimate (initially GUARDRAIL_KEEPWARM_COLD_AFTER_SECONDS); a warm answer after a
+  longer gap raises it again, up to the initial value,
+- sends one minimal probe when the idle time reaches GUARDRAIL_KEEPWARM_PROBE_MARGIN of the
+  cold-after estimate. The task sleeps until the earliest such deadline, so an endpoint with
+  steady user traffic is never probed,
+- publishes the endpoint's health (warm / cold / unavailable / unknown), so the agent can skip
+  guardrails that are known to be down.
+
+Replaces the src/utils/guardrails_warmup.py daemon, which ran every check every 30 minutes from a
+separate process.
+
+    guardrail_keepwarm.record_call(SAFETY_ENDPOINT, latency, ok=True)  # from the request path
+    guardrail_keepwarm.start(probe)                                    # on app startup
+"""
+
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from src.agentic_tools.guardrail_client import FAITHFULNESS_ENDPOINT, PII_ENDPOINT, SAFETY_ENDPOINT
+from src.agentic_tools.guardrail_resilience import GuardrailUnavailableError
+from src.config import CONFIG_CHATBOT_NEW
+
+logger = logging.getLogger(__name__)
+
+WARM, COLD, UNAVAILABLE, UNKNOWN = "warm", "cold", "unavailable", "unknown"
+
+# Smallest request data each endpoint accepts
+PROBE_REQUESTS: dict[str, dict[str, str]] = {
+    SAFETY_ENDPOINT: {"input": "ok"},
+    PII_ENDPOINT: {"input": "ok"},
+    FAITHFULNESS_ENDPOINT: {"response": "ok", "context": "ok"},
+    }
+
+# Warm latencies needed before cold starts can be told apart
+_MIN_WARM_SAMPLES = 3
+
+Probe = Callable[[str], Awaitable[Any]]
+
+
+@dataclass
+class _EndpointWarmth:
+    """Activity and cold-start history of one endpoint."""
+    cold_after: float
+    last_activity: float | None = None
+    last_ok: bool | None = None
+    retry_at: float | None = None
+    warm_latencies: deque[float] = field(default_factory=lambda: deque(maxlen=50))
+    last_cold_start: float | None = None
+    cold_starts: int = 0
+    probes: int = 0
+    probe_failures: int = 0
+
+
+class GuardrailKeepWarm:
+    """
+    Idle tracking, cold-start detection and probe scheduling for the guardrail endpoints.
+
+    Args:
+        endpoints: Endpoint paths to keep warm
+        cold_after: Initial estimate of the idle seconds after which an endpoint goes cold
+        min_cold_after: Shortest idle gap after which a slow request counts as a cold start, and lower bound of the estimate
+        probe_margin: Probe once the idle time reaches this share of the cold-after estimate
+        cold_factor: A request this many times slower than the warm median after an idle gap is a cold start
+        min_cold_extra: ...and at least this many seconds slower
+        retry_seconds: Wait before probing again after a failed probe
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str] = tuple(PROBE_REQUESTS),
+        cold_after: float = 30 * 60,
+        min_cold_after: float = 60.0,
+        probe_margin: float = 0.8,
+        cold_factor: float = 3.0,
+        min_cold_extra: float = 0.5,
+        retry_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        ):
+        self.max_cold_after = cold_after
+        self.min_cold_after = min(min_cold_after, cold_after)
+        self.probe_margin = probe_margin
+        self.cold_factor = cold_factor
+        self.min_cold_extra = min_cold_extra
+        self.retry_seconds = retry_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._endpoints = {endpoint: _EndpointWarmth(cold_after=cold_after) for endpoint in endpoints}
+        self._task: asyncio.Task | None = None
+
+    # --- tracking ---
+
+    def record_call(self, endpoint: str, latency: float, ok: bool) -> None:
+        """
+        Record a request that reached `endpoint` (user call or probe) and finished now.
+
+        Args:
+            endpoint: Endpoint path; untracked endpoints are ignored
+            latency: Seconds the request took
+            ok: Whether the endpoint answered (any status other than 5xx / 429)
+        """
+        warmth = self._endpoints.get(endpoint)
+        if warmth is None:
+            return
+        now = self._clock()
+        with self._lock:
+            if ok and warmth.last_activity is not None and len(warmth.warm_latencies) >= _MIN_WARM_SAMPLES:
+                idle = now - latency - warmth.last_activity
+                warm_median = statistics.median(warmth.warm_latencies)
+                slow = latency >= warm_median * self.cold_factor and latency - warm_median >= self.min_cold_extra
+                if slow and idle >= self.min_cold_after:
+                    warmth.cold_starts += 1
+                    warmth.last_cold_start = latency
+                    if idle < warmth.cold_after:
+                        logger.info(f"Guardrail {endpoint} went cold after {idle:.0f}s idle ({latency:.2f}s cold start); probing earlier")
+                        warmth.cold_after = idle
+                else:
+                    warmth.warm_latencies.append(latency)
+                    if not slow and idle > warmth.cold_after:
+                        # Still warm after a longer gap than estimated, e.g. after a cold start caused by a scale-down
+                        warmth.cold_after = min(self.max_cold_after, idle)
+            elif ok:
+                warmth.warm_latencies.append(latency)
+            if warmth.last_ok is not False and not ok:
+                logger.warning(f"⚠️ Guardrail {endpoint} marked unavailable")
+            elif warmth.last_ok is False and ok:
+                logger.info(f"✓ Guardrail {endpoint} available again")
+            warmth.last_activity = now
+            warmth.last_ok = ok
+            # A failing endpoint is re-probed soon, so recovery shows up in its health before the next user call
+            warmth.retry_at = None if ok else now + self.retry_seconds
+
+    def _probe_at(self, warmth: _EndpointWarmth) -> float:
+        if warmth.retry_at is not None:
+            return warmth.retry_at
+        if warmth.last_activity is None:
+            return float("-inf")
+        return warmth.last_activity + warmth.cold_after * self.probe_margin
+
+    def next_probe_in(self) -> float:
+        """Seconds until the next probe is due (0 when one is due now)."""
+        now = self._clock()
+        with self._lock:
+            return max(0.0, min((self._probe_at(warmth) - now for warmth in self._endpoints.values()), default=float("inf")))
+
+    def due_endpoints(self) -> list[str]:
+        """Endpoints that are about to go cold, or whose failed probe is due for a retry."""
+        now = self._clock()
+        with self._lock:
+            return [endpoint for endpoint, warmth in self._endpoints.items() if self._probe_at(warmth) <= now]
+
+    # --- health ---
+
+    def health(self) -> dict[str, dict[str, Any]]:
+        """Status, idle time, cold-after estimate and cold-start history by endpoint."""
+        now = self._clock()
+        with self._lock:
+            result = {}
+            for endpoint, warmth in self._endpoints.items():
+                idle = None if warmth.last_activity is None else now - warmth.last_activity
+                if warmth.last_ok is None:
+                    status = UNKNOWN
+                elif not warmth.last_ok:
+                    status = UNAVAILABLE
+                else:
+                    status = COLD if idle >= warmth.cold_after else WARM
+                warm_median = statistics.median(warmth.warm_latencies) if warmth.warm_latencies else None
+                result[endpoint] = {
+                    "status": status,
+                    "idle_seconds": idle,
+                    "cold_after_seconds": warmth.cold_after,
+                    "warm_median_ms": warm_median * 1000 if warm_median is not None else None,
+                    "last_cold_start_ms": warmth.last_cold_start * 1000 if warmth.last_cold_start is not None else None,
+                    "cold_starts": warmth.cold_starts,
+                    "probes": warmth.probes,
+                    "probe_failures": warmth.probe_failures,
+                    "retry_in_seconds": max(0.0, warmth.retry_at - now) if warmth.retry_at is not None else None,
+                    }
+            return result
+
+    def unavailable(self) -> dict[str, dict[str, Any]]:
+        """Health of the endpoints whose last request failed."""
+        return {endpoint: health for endpoint, health in self.health().items() if health["status"] == UNAVAILABLE}
+
+    # --- scheduling ---
+
+    async def probe_due(self, probe: Probe) -> list[str]:
+        """
+        Probe the due endpoints concurrently.
+
+        Args:
+            probe: Sends the minimal request of an endpoint; it reports the outcome through record_call
+
+        Returns:
+            The probed endpoints
+        """
+        due = self.due_endpoints()
+        outcomes = await asyncio.gather(*(probe(endpoint) for endpoint in due), return_exceptions=True)
+        now = self._clock()
+        with self._lock:
+            for endpoint, outcome in zip(due, outcomes, strict=True):
+                warmth = self._endpoints[endpoint]
+                warmth.probes += 1
+                if isinstance(outcome, BaseException):
+                    warmth.probe_failures += 1
+                    retry_after = outcome.retry_after if isinstance(outcome, GuardrailUnavailableError) else None
+                    # A probe rejected by an open circuit never reached the endpoint, so retry after the cooldown
+                    warmth.retry_at = now + (retry_after if retry_after is not None else self.retry_seconds)
+                    logger.debug(f"Keep-warm probe of {endpoint} failed: {outcome}")
+        return due
+
+    async def run(self, probe: Probe) -> None:
+        """Probe endpoints as they are about to go cold, until cancelled."""
+        logger.info(f"✓ Guardrail keep-warm started for {len(self._endpoints)} endpoints")
+        while True:
+            await asyncio.sleep(self.next_probe_in())
+            # User traffic may have moved the deadline while sleeping; probe_due re-checks
+            await self.probe_due(probe)
+
+    def start(self, probe: Probe) -> asyncio.Task:
+        """Run the scheduler as a task of the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(probe), name="guardrail-keepwarm")
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def _build_default_keepwarm() -> GuardrailKeepWarm:
+    return GuardrailKeepWarm(
+        cold_after=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_COLD_AFTER_SECONDS"],
+        min_cold_after=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_MIN_COLD_AFTER_SECONDS"],
+        probe_margin=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_PROBE_MARGIN"],
+        cold_factor=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_COLD_FACTOR"],
+        min_cold_extra=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_MIN_COLD_EXTRA_SECONDS"],
+        retry_seconds=CONFIG_CHATBOT_NEW["GUARDRAIL_KEEPWARM_RETRY_SECONDS"],
+        )
+
+
+# Process-wide endpoint tracker; the guardrail calls report to it whether or not the scheduler runs
+guardrail_keepwarm = _build_default_keepwarm()
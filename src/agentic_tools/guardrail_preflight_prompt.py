@@ -0,0 +1,117 @@
+"""
+Guardrail pre-flight prompt - state and system prompt helpers of the guardrail pre-flight middleware
+
+The middleware (src/middleware/guardrail_preflight_middleware.py) runs the PII and safety guardrails
+on the latest user message once per turn and shows the results to the model. Everything except the
+LangGraph hooks lives here, so it can be used and tested without the langchain v1 middleware API:
+
+    update = preflight_update(state)                  # before_agent: {"guardrail_preflight": results}
+    section = preflight_prompt_section(results)        # wrap_model_call: appended to the system prompt
+"""
+
+import json
+import logging
+from typing import Any
+
+from langchain_core.messages import HumanMessage
+
+from src.agentic_tools.fiddler_gaurdrails import arun_guardrail_preflight, run_guardrail_preflight, unavailable_guardrail_tools
+
+logger = logging.getLogger(__name__)
+
+PREFLIGHT_TOOLS = {
+    "safety": "tool_fiddler_guardrail_safety",
+    "pii": "tool_fiddler_guardrail_pii",
+    }
+
+
+def latest_user_text(state: dict[str, Any]) -> str | None:
+    """Text of the most recent HumanMessage in the state, or None when it is missing or blank."""
+    for message in reversed(state.get("messages", [])):
+        if isinstance(message, HumanMessage):
+            content = message.content
+            if isinstance(content, list):
+                content = " ".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+            return content if content.strip() else None
+    return None
+
+
+def format_preflight_results(results: dict[str, Any]) -> str:
+    """
+    Render pre-flight results as a system prompt section.
+
+    Args:
+        results: {"safety": ..., "pii": ...} as returned by run_guardrail_preflight
+
+    Returns:
+        Prompt section, or "" when there are no results
+    """
+    if not results:
+        return ""
+    lines = [
+        "## PRE-FLIGHT GUARDRAIL RESULTS (latest user message)",
+        "",
+        "These checks already ran on the latest user message. Apply the PRIVACY and SECURITY protocols to "
+        "these results and DO NOT call the listed tools again for that message.",
+        "",
+        ]
+    for key, tool_name in PREFLIGHT_TOOLS.items():
+        outcome = results.get(key)
+        if outcome is None:
+            continue
+        if outcome.get("status") == "unavailable":
+            lines.append(f"- `{tool_name}`: unavailable ({outcome['error']}); do not call the tool for this message")
+        elif "error" in outcome:
+            lines.append(f"- `{tool_name}`: unavailable ({outcome['error']}); call the tool yourself if the message needs checking")
+        else:
+            lines.append(f"- `{tool_name}`: {json.dumps(outcome)}")
+    return "\n".join(lines)
+
+
+def format_unavailable_tools(unavailable: dict[str, dict[str, Any]], results: dict[str, Any] | None = None) -> str:
+    """
+    Render the guardrail tools whose endpoint is failing as a system prompt section.
+
+    Args:
+        unavailable: Keep-warm health by tool name, as returned by unavailable_guardrail_tools
+        results: Pre-flight results of the turn; tools already reported there are left out
+
+    Returns:
+        Prompt section, or "" when every guardrail is available
+    """
+    reported = {PREFLIGHT_TOOLS[key] for key in (results or {}) if key in PREFLIGHT_TOOLS}
+    lines = []
+    for tool_name, health in unavailable.items():
+        if tool_name in reported:
+            continue
+        retry = f", rechecked in {health['retry_in_seconds']:.0f}s" if health.get("retry_in_seconds") is not None else ""
+        lines.append(f"- `{tool_name}`: endpoint unavailable{retry}; do not call the tool, and tell the user the check was skipped if it matters")
+    if not lines:
+        return ""
+    return "\n".join(["## GUARDRAIL AVAILABILITY", "", *lines])
+
+
+def preflight_prompt_section(results: dict[str, Any]) -> str:
+    """System prompt section for a model call: the turn's pre-flight results and any unavailable guardrails ("" if none)."""
+    sections = [format_preflight_results(results), format_unavailable_tools(unavailable_guardrail_tools(), results)]
+    return "\n\n".join(part for part in sections if part)
+
+
+def preflight_update(state: dict[str, Any]) -> dict[str, Any]:
+    """State update with the pre-flight results for the latest user message (empty when there is none)."""
+    text = latest_user_text(state)
+    if text is None:
+        return {"guardrail_preflight": {}}
+    results = run_guardrail_preflight(text)
+    logger.debug(f"Guardrail pre-flight results: {results}")
+    return {"guardrail_preflight": results}
+
+
+async def apreflight_update(state: dict[str, Any]) -> dict[str, Any]:
+    """Async variant of preflight_update; both checks are in flight concurrently."""
+    text = latest_user_text(state)
+    if text is None:
+        return {"guardrail_preflight": {}}
+    results = await arun_guardrail_preflight(text)
+    logger.debug(f"Guardrail pre-flight results: {results}")
+    return {"guardrail_preflight": results}
@@ -0,0 +1,326 @@
+"""
+Guardrail endpoint resilience - adaptive timeouts, hedged requests and circuit breaking
+
+A flat 60 s timeout lets one stalled guardrail endpoint hang a chat turn for a minute. Each
+endpoint gets an EndpointGuard that tracks the latency of its recent successful calls and:
+
+- times requests out after p99 x GUARDRAIL_TIMEOUT_P99_FACTOR (bounded by the flat timeout),
+- sends one duplicate (hedged) request when the first has not answered after the p95 latency,
+  and uses whichever answers first,
+- opens a circuit after GUARDRAIL_BREAKER_FAILURE_THRESHOLD consecutive failures, failing fast
+  with GuardrailUnavailableError until the cooldown has passed and a trial call succeeds.
+
+Timeouts, transport errors and 5xx / 429 responses count as failures; other statuses are passed
+through for the caller to handle. Until GUARDRAIL_LATENCY_MIN_SAMPLES calls have succeeded, the
+flat timeout applies and no requests are hedged.
+
+    response = endpoint_guards.get(SAFETY_ENDPOINT).call(lambda timeout: guardrail_client.post(SAFETY_ENDPOINT, data, timeout=timeout))
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
+
+import httpx
+
+from src.config import CONFIG_CHATBOT_NEW
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# Runs the primary and hedged attempts of sync calls that may be hedged
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="guardrail-hedge")
+
+
+class GuardrailUnavailableError(ValueError):
+    """
+    A guardrail endpoint timed out, errored or has its circuit open.
+    Subclasses ValueError, which the guardrail functions raise for failed API requests.
+    """
+
+    def __init__(self, endpoint: str, reason: str, retry_after: float | None = None):
+        super().__init__(f"Guardrail {endpoint} unavailable: {reason}")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def is_failure_response(response: httpx.Response) -> bool:
+    """Whether a response means the endpoint is failing (5xx or rate limited), as opposed to rejecting the request."""
+    return response.status_code >= 500 or response.status_code == 429
+
+
+class EndpointGuard:
+    """
+    Latency tracker, adaptive timeout, hedging and circuit breaker of one guardrail endpoint.
+
+    Args:
+        endpoint: Endpoint path, used in errors and logs
+        max_timeout: Timeout in seconds before enough latencies are known, and the adaptive timeout's upper bound
+        min_timeout: Lower bound of the adaptive timeout in seconds
+        p99_factor: Adaptive timeout = p99 latency x this factor
+        window: Number of recent successful latencies kept
+        min_samples: Latencies needed before the adaptive timeout and hedging kick in
+        hedge: Send a duplicate request once the first is slower than p95
+        min_hedge_delay: Lower bound of the hedge delay in seconds
+        failure_threshold: Consecutive failures that open the circuit
+        cooldown: Seconds the circuit stays open before a trial call is let through
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        max_timeout: float,
+        min_timeout: float = 2.0,
+        p99_factor: float = 3.0,
+        window: int = 200,
+        min_samples: int = 20,
+        hedge: bool = True,
+        min_hedge_delay: float = 0.05,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        ):
+        self.endpoint = endpoint
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.p99_factor = p99_factor
+        self.min_samples = min_samples
+        self.hedge = hedge
+        self.min_hedge_delay = min_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._trial_started_at: float | None = None
+        self.consecutive_failures = 0
+        self.calls = 0
+        self.failures = 0
+        self.hedged = 0
+        self.rejected = 0
+
+    # --- latency tracking ---
+
+    def percentile(self, q: float) -> float | None:
+        """`q` quantile (0-1) of the recent successful latencies, or None below min_samples."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1)]
+
+    def timeout(self) -> float:
+        """Adaptive request timeout in seconds."""
+        p99 = self.percentile(0.99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.p99_factor))
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before sending a hedged request, or None when hedging is off."""
+        if not self.hedge:
+            return None
+        p95 = self.percentile(0.95)
+        return None if p95 is None else max(self.min_hedge_delay, p95)
+
+    # --- circuit breaker ---
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.cooldown - (self._clock() - self._opened_at)
+                if remaining > 0:
+                    self.rejected += 1
+                    raise GuardrailUnavailableError(self.endpoint, "circuit open after repeated failures", retry_after=remaining)
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                # A trial that never reported back (e.g. a cancelled task) is given up after max_timeout
+                now = self._clock()
+                if self._trial_started_at is not None and now - self._trial_started_at < self.max_timeout:
+                    self.rejected += 1
+                    raise GuardrailUnavailableError(self.endpoint, "circuit half-open, trial call in flight", retry_after=self.cooldown)
+                self._trial_started_at = now
+            self.calls += 1
+
+    def _record_success(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self.consecutive_failures = 0
+            self._trial_started_at = None
+            if self.state != CLOSED:
+                logger.info(f"✓ Guardrail {self.endpoint} recovered, circuit closed")
+            self.state = CLOSED
+
+    def _record_failure(self, reason: str) -> None:
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self._trial_started_at = None
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"⚠️ Guardrail {self.endpoint} circuit opened for {self.cooldown:.0f}s: {reason}")
+                self.state = OPEN
+                self._opened_at = self._clock()
+
+    # --- calls ---
+
+    def _attempt(self, send: Callable[[float], httpx.Response], timeout: float) -> tuple[httpx.Response, float]:
+        start = time.perf_counter()
+        response = send(timeout)
+        return response, time.perf_counter() - start
+
+    async def _aattempt(self, send: Callable[[float], Awaitable[httpx.Response]], timeout: float) -> tuple[httpx.Response, float]:
+        start = time.perf_counter()
+        response = await send(timeout)
+        return response, time.perf_counter() - start
+
+    def _outcome(self, attempts: list[tuple[httpx.Response, float] | BaseException]) -> httpx.Response:
+        """Record the first usable attempt (or the failure) and return its response."""
+        for attempt in attempts:
+            if not isinstance(attempt, BaseException) and not is_failure_response(attempt[0]):
+                self._record_success(attempt[1])
+                return attempt[0]
+        last = attempts[-1]
+        if isinstance(last, BaseException):
+            reason = "timed out" if isinstance(last, httpx.TimeoutException) else f"{type(last).__name__}: {last}"
+            self._record_failure(reason)
+            raise GuardrailUnavailableError(self.endpoint, reason) from last
+        # Non-retryable statuses are handed back to the caller; retryable ones are failures
+        reason = f"API request failed with status code {last[0].status_code}"
+        self._record_failure(reason)
+        raise GuardrailUnavailableError(self.endpoint, reason)
+
+    def call(self, send: Callable[[float], httpx.Response]) -> httpx.Response:
+        """
+        Send a request through the guard.
+
+        Args:
+            send: Performs the request with the given timeout in seconds
+
+        Raises:
+            GuardrailUnavailableError: circuit open, timeout, transport error or 5xx / 429 response
+        """
+        self._admit()
+        timeout, delay = self.timeout(), self.hedge_delay()
+        if delay is None:
+            try:
+                return self._outcome([self._attempt(send, timeout)])
+            except GuardrailUnavailableError:
+                raise
+            except Exception as e:
+                return self._outcome([e])
+
+        pending: set[Future] = {_hedge_executor.submit(self._attempt, send, timeout)}
+        done, pending = wait(pending, timeout=delay)
+        if not done:
+            self.hedged += 1
+            pending.add(_hedge_executor.submit(self._attempt, send, timeout))
+        attempts: list[tuple[httpx.Response, float] | BaseException] = []
+        while True:
+            for future in done:
+                outcome = future.exception() or future.result()
+                attempts.append(outcome)
+                if not isinstance(outcome, BaseException) and not is_failure_response(outcome[0]):
+                    return self._outcome([outcome])
+            if not pending:
+                return self._outcome(attempts)
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    async def acall(self, send: Callable[[float], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Async variant of call; a losing hedged request is cancelled."""
+        self._admit()
+        timeout, delay = self.timeout(), self.hedge_delay()
+        if delay is None:
+            try:
+                return self._outcome([await self._aattempt(send, timeout)])
+            except GuardrailUnavailableError:
+                raise
+            except Exception as e:
+                return self._outcome([e])
+
+        pending: set[asyncio.Task] = {asyncio.ensure_future(self._aattempt(send, timeout))}
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            self.hedged += 1
+            pending.add(asyncio.ensure_future(self._aattempt(send, timeout)))
+        attempts: list[tuple[httpx.Response, float] | BaseException] = []
+        try:
+            while True:
+                for task in done:
+                    outcome = task.exception() or task.result()
+                    attempts.append(outcome)
+                    if not isinstance(outcome, BaseException) and not is_failure_response(outcome[0]):
+                        return self._outcome([outcome])
+                if not pending:
+                    return self._outcome(attempts)
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Circuit state, counters and the current adaptive timeout / hedge delay."""
+        p50, p95, p99 = self.percentile(0.50), self.percentile(0.95), self.percentile(0.99)
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "hedged": self.hedged,
+            "rejected": self.rejected,
+            "p50_ms": p50 * 1000 if p50 is not None else None,
+            "p95_ms": p95 * 1000 if p95 is not None else None,
+            "p99_ms": p99 * 1000 if p99 is not None else None,
+            "timeout_seconds": self.timeout(),
+            }
+
+
+class EndpointGuards:
+    """EndpointGuard per endpoint path, created on first use with the given settings."""
+
+    def __init__(self, **settings: Any):
+        self._settings = settings
+        self._guards: dict[str, EndpointGuard] = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint: str) -> EndpointGuard:
+        with self._lock:
+            guard = self._guards.get(endpoint)
+            if guard is None:
+                guard = self._guards[endpoint] = EndpointGuard(endpoint, **self._settings)
+            return guard
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            guards = list(self._guards.values())
+        return {guard.endpoint: guard.snapshot() for guard in guards}
+
+
+def guards_from_config() -> EndpointGuards:
+    """EndpointGuards configured from CONFIG_CHATBOT_NEW."""
+    return EndpointGuards(
+        max_timeout=CONFIG_CHATBOT_NEW["FDL_GAURDRAIL_REQUESTS_TIMEOUT"],
+        min_timeout=CONFIG_CHATBOT_NEW["GUARDRAIL_TIMEOUT_MIN_SECONDS"],
+        p99_factor=CONFIG_CHATBOT_NEW["GUARDRAIL_TIMEOUT_P99_FACTOR"],
+        window=CONFIG_CHATBOT_NEW["GUARDRAIL_LATENCY_WINDOW"],
+        min_samples=CONFIG_CHATBOT_NEW["GUARDRAIL_LATENCY_MIN_SAMPLES"],
+        hedge=CONFIG_CHATBOT_NEW["GUARDRAIL_HEDGE_ENABLED"],
+        min_hedge_delay=CONFIG_CHATBOT_NEW["GUARDRAIL_HEDGE_MIN_DELAY_SECONDS"],
+        failure_threshold=CONFIG_CHATBOT_NEW["GUARDRAIL_BREAKER_FAILURE_THRESHOLD"],
+        cooldown=CONFIG_CHATBOT_NEW["GUARDRAIL_BREAKER_COOLDOWN_SECONDS"],
+        )
+
+
+# Process-wide guards shared by all guardrail calls
+endpoint_guards = guards_from_config()
@@ -0,0 +1,327 @@
+"""
+Local Vector Index - in-process read replica of the Cassandra vector table
+
+Mirrors the `fiddler_doc_snippets_openai` table (row_id, vector, body_blob, metadata_s) into a
+brute-force NumPy index on local disk so the RAG tool can answer similarity searches without
+the WAN round-trip to Astra. The corpus is a few thousand chunks, so an exact scan over a
+memory-mapped float32 matrix is sub-millisecond and needs no ANN structure.
+
+text-embedding-3-large is a Matryoshka model: a prefix of its vector is itself a usable
+(lower-fidelity) embedding. With `coarse_dims` set, the scan runs over a small in-memory matrix of
+re-normalized prefixes (optionally int8-quantized) and only the best `rerank_candidates` rows are
+re-scored against the full-dimension vectors, which stay memory-mapped on disk.
+
+On-disk layout (one directory):
+    vectors.npy      float32 [N, D], L2-normalized rows (memory-mapped at load time)
+    documents.json   [{"row_id", "body", "metadata"}, ...] aligned with the vector rows
+    manifest.json    {"corpus_version", "dimension", "count", "source", "built_at"}
+
+Build it either from a paged export of the Cassandra table or from a corpus CSV + embeddings:
+    python -m src.agentic_tools.local_vector_index --source cassandra
+    python -m src.agentic_tools.local_vector_index --source csv --csv-path local_assets/vector_index_feed_XXX.csv
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.json"
+MANIFEST_FILE = "manifest.json"
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def _quantize_rows_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (int8 matrix, float32 per-row scale)."""
+    max_abs = np.abs(matrix).max(axis=1)
+    max_abs[max_abs == 0] = 1.0
+    scale = (max_abs / 127.0).astype(np.float32)
+    return np.round(matrix / scale[:, None]).astype(np.int8), scale
+
+
+# Bytes of float32 rows converted at a time when scanning the int8 coarse matrix; ~1 MB stays in L2
+_INT8_SCAN_BLOCK_BYTES = 1 << 20
+
+
+def _int8_matvec(matrix: np.ndarray, vector: np.ndarray) -> np.ndarray:
+    """
+    `matrix @ vector` for an int8 matrix and a float32 vector.
+
+    NumPy has no BLAS path for integer operands, and `int8 @ float32` upcasts the whole matrix into
+    a temporary on every call. Converting cache-sized blocks into one reused float32 buffer keeps
+    the scan on the BLAS path at float32 speed while the stored matrix stays 4x smaller.
+    """
+    rows = max(1, _INT8_SCAN_BLOCK_BYTES // (4 * matrix.shape[1]))
+    out = np.empty(len(matrix), dtype=np.float32)
+    buffer = np.empty((min(rows, len(matrix)), matrix.shape[1]), dtype=np.float32)
+    for start in range(0, len(matrix), rows):
+        block = matrix[start:start + rows]
+        converted = buffer[:len(block)]
+        np.copyto(converted, block, casting="unsafe")
+        np.dot(converted, vector, out=out[start:start + len(block)])
+    return out
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity index over a float32 matrix, exact or two-stage (Matryoshka prefix scan + full rerank).
+
+    Scores follow the Cassandra vector store contract (`0.5 + 0.5 * cosine`, in [0, 1], higher is
+    more similar) so results are interchangeable with `CassandraVectorStore` results. Final scores
+    are always computed at full dimension.
+
+    Args:
+        vectors: [N, D] L2-normalized rows
+        records: [{"row_id", "body", "metadata"}] aligned with the vector rows
+        manifest: Index manifest (corpus version, dimension, ...)
+        coarse_dims: Prefix length scanned in the first stage (None or >= D disables two-stage search)
+        quantize_int8: Store the coarse matrix as int8 with per-row scales
+        rerank_candidates: Number of first-stage candidates re-scored at full dimension
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        records: list[dict[str, Any]],
+        manifest: dict[str, Any],
+        coarse_dims: int | None = None,
+        quantize_int8: bool = False,
+        rerank_candidates: int = 64,
+        ):
+        if len(vectors) != len(records):
+            raise ValueError(f"Vector count ({len(vectors)}) does not match document count ({len(records)})")
+        self.vectors = vectors
+        self.records = records
+        self.manifest = manifest
+        self.rerank_candidates = rerank_candidates
+        self.coarse_dims: int | None = None
+        self._coarse: np.ndarray | None = None
+        self._coarse_scale: np.ndarray | None = None
+        if coarse_dims and vectors.ndim == 2 and coarse_dims < vectors.shape[1]:
+            self.coarse_dims = coarse_dims
+            coarse = _normalize_rows(np.asarray(vectors[:, :coarse_dims], dtype=np.float32))
+            if quantize_int8:
+                self._coarse, self._coarse_scale = _quantize_rows_int8(coarse)
+            else:
+                self._coarse = coarse
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes of the matrix scanned per query (coarse matrix when two-stage search is on)."""
+        if self._coarse is None:
+            return int(self.vectors.nbytes)
+        return int(self._coarse.nbytes + (self._coarse_scale.nbytes if self._coarse_scale is not None else 0))
+
+    @property
+    def corpus_version(self) -> str | None:
+        return self.manifest.get("corpus_version")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    # ---------- persistence ----------
+
+    @classmethod
+    def build(
+        cls,
+        directory: str,
+        row_ids: list[str],
+        vectors: list[list[float]] | np.ndarray,
+        bodies: list[str],
+        metadatas: list[dict[str, Any]],
+        corpus_version: str | None,
+        source: str,
+        ) -> "LocalVectorIndex":
+        """Normalize, persist and return a new index."""
+        matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+        records = [
+            {"row_id": row_id, "body": body, "metadata": dict(metadata or {})}
+            for row_id, body, metadata in zip(row_ids, bodies, metadatas, strict=True)
+            ]
+        manifest = {
+            "corpus_version": corpus_version,
+            "dimension": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "count": len(records),
+            "source": source,
+            "built_at": datetime.now(tz=timezone.utc).isoformat(),  # noqa: UP017
+            }
+
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VECTORS_FILE), matrix)
+        with open(os.path.join(directory, DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        # Manifest is written last so a partially written index is never picked up
+        with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"✓ Local vector index written to {directory} ({len(records)} rows, corpus version: {corpus_version})")
+        return cls(matrix, records, manifest)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True, **search_options) -> "LocalVectorIndex":
+        """
+        Load an index written by `build`; vectors are memory-mapped read-only by default.
+        `search_options` (coarse_dims, quantize_int8, rerank_candidates) configure two-stage search.
+        """
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r" if mmap else None)
+        with open(os.path.join(directory, DOCUMENTS_FILE), encoding="utf-8") as f:
+            records = json.load(f)
+        return cls(vectors, records, manifest, **search_options)
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return all(os.path.exists(os.path.join(directory, name)) for name in (VECTORS_FILE, DOCUMENTS_FILE, MANIFEST_FILE))
+
+    # ---------- search ----------
+
+    def _filter_mask(self, filter: dict[str, str] | None) -> np.ndarray | None:
+        if not filter:
+            return None
+        return np.fromiter(
+            (all(str(record["metadata"].get(key)) == str(value) for key, value in filter.items()) for record in self.records),
+            dtype=bool,
+            count=len(self.records),
+            )
+
+    def _to_document(self, position: int) -> Document:
+        record = self.records[position]
+        return Document(id=record["row_id"], page_content=record["body"], metadata=dict(record["metadata"]))
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float] | np.ndarray,
+        k: int = 4,
+        filter: dict[str, str] | None = None,
+        ) -> list[tuple[Document, float]]:
+        """Return the `k` most similar documents with Cassandra-compatible scores."""
+        if len(self.records) == 0 or k <= 0:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm:
+            query = query / norm
+
+        mask = self._filter_mask(filter)
+        if mask is not None:
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return []
+        k = min(k, len(self.records))
+
+        if self._coarse is None:
+            rows = np.arange(len(self.records))
+            similarities = self.vectors @ query
+        else:
+            rows = self._coarse_candidates(query, max(k, self.rerank_candidates), mask)
+            similarities = self.vectors[rows] @ query  # full-dimension rerank of the candidates only
+        if mask is not None:
+            similarities = np.where(mask[rows], similarities, -np.inf)
+
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        return [(self._to_document(int(rows[i])), 0.5 + 0.5 * float(similarities[i])) for i in top]
+
+    def _coarse_candidates(self, query: np.ndarray, n_candidates: int, mask: np.ndarray | None) -> np.ndarray:
+        """First stage: indices of the `n_candidates` best rows by prefix similarity, sorted ascending."""
+        assert self._coarse is not None and self.coarse_dims is not None
+        prefix = query[:self.coarse_dims]
+        norm = float(np.linalg.norm(prefix))
+        if norm:
+            prefix = prefix / norm
+        prefix = prefix.astype(np.float32, copy=False)
+        if self._coarse_scale is not None:
+            coarse_similarities = _int8_matvec(self._coarse, prefix) * self._coarse_scale
+        else:
+            coarse_similarities = self._coarse @ prefix
+        if mask is not None:
+            coarse_similarities = np.where(mask, coarse_similarities, -np.inf)
+        n_candidates = min(n_candidates, len(coarse_similarities))
+        return np.sort(np.argpartition(-coarse_similarities, n_candidates - 1)[:n_candidates])
+
+    def similarity_search_by_vector(
+        self,
+        embedding: list[float] | np.ndarray,
+        k: int = 4,
+        filter: dict[str, str] | None = None,
+        ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)]
+
+
+# ==================== BUILDERS ====================
+
+def export_from_cassandra(session, keyspace: str, table_name: str, directory: str, corpus_version: str | None, fetch_size: int = 500) -> LocalVectorIndex:
+    """Build the local index from a paged full-table export of the Cassandra vector table."""
+    from cassandra.query import SimpleStatement
+
+    statement = SimpleStatement(f"SELECT row_id, vector, body_blob, metadata_s FROM {keyspace}.{table_name}", fetch_size=fetch_size)
+    row_ids, vectors, bodies, metadatas = [], [], [], []
+    for row in session.execute(statement):  # the driver transparently fetches the next page while iterating
+        row_ids.append(row.row_id)
+        vectors.append(list(row.vector))
+        bodies.append(row.body_blob)
+        metadatas.append(dict(row.metadata_s or {}))
+    logger.info(f"Exported {len(row_ids)} rows from {keyspace}.{table_name}")
+    return LocalVectorIndex.build(directory, row_ids, vectors, bodies, metadatas, corpus_version, source=f"cassandra:{keyspace}.{table_name}")
+
+
+def build_from_csv(csv_path: str, embedding: Embeddings, directory: str, batch_size: int = 100) -> LocalVectorIndex:
+    """Build the local index from a corpus CSV (as produced by data_generation) by embedding every chunk."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=["text"])
+    df = df[df["text"].str.strip() != ""].reset_index(drop=True)
+    metadata_columns = [column for column in df.columns if column != "text"]
+    df[metadata_columns] = df[metadata_columns].fillna("")
+
+    bodies = df["text"].tolist()
+    metadatas = [{column: str(row[column]) for column in metadata_columns} for _, row in df.iterrows()]
+    vectors: list[list[float]] = []
+    for start in range(0, len(bodies), batch_size):
+        vectors.extend(embedding.embed_documents(bodies[start:start + batch_size]))
+        logger.info(f"Embedded {min(start + batch_size, len(bodies))}/{len(bodies)} chunks")
+
+    corpus_version = os.path.splitext(os.path.basename(csv_path))[0]
+    row_ids = [f"{corpus_version}:{i}" for i in range(len(bodies))]
+    return LocalVectorIndex.build(directory, row_ids, vectors, bodies, metadatas, corpus_version, source=f"csv:{csv_path}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.config import CONFIG_CHATBOT_NEW, CONFIG_VECTOR_INDEX_MGMT
+    from src.vector_index_mgmt import cassandra_connection, fetch_corpus_version, fetch_latest_csv_path, setup_llm_and_embeddings
+
+    parser = argparse.ArgumentParser(description="Build the local vector index mirror used by the RAG tool")
+    parser.add_argument("--source", choices=["cassandra", "csv"], default="cassandra", help="Export the Cassandra table or embed a corpus CSV")
+    parser.add_argument("--csv-path", default=None, help="Corpus CSV (defaults to the latest local_assets/vector_index_feed_*.csv)")
+    parser.add_argument("--output-dir", default=CONFIG_CHATBOT_NEW["LOCAL_VECTOR_INDEX_DIR"], help="Directory to write the index to")
+    args = parser.parse_args()
+
+    if args.source == "cassandra":
+        with cassandra_connection() as (cluster, session):
+            export_from_cassandra(
+                session,
+                keyspace=CONFIG_VECTOR_INDEX_MGMT["keyspace"],
+                table_name=CONFIG_VECTOR_INDEX_MGMT["TABLE_NAME"],
+                directory=args.output_dir,
+                corpus_version=fetch_corpus_version(session, CONFIG_VECTOR_INDEX_MGMT["TABLE_NAME"]),
+                )
+    else:
+        _, embedding = setup_llm_and_embeddings()
+        build_from_csv(args.csv_path or fetch_latest_csv_path(), embedding, args.output_dir, batch_size=CONFIG_VECTOR_INDEX_MGMT["embedding_batch_size"])
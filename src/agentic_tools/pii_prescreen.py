@@ -0,0 +1,122 @@
+"""
+Local PII pre-screen - deterministic detectors run before the remote PII guardrail
+
+Compiled regular expressions with checksum validation for the structured entity types of the Fiddler
+Fast PII guardrail (docs/ref--ext--PII_guardrails_docs.md):
+
+    email, phone_number, credit_card_number (Luhn), social_security_number, iban (mod-97), ip_address
+
+Names, addresses, dates of birth and similar free-form entities cannot be found this way, so the
+pre-screen never replaces the remote guardrail. It only decides whether a message is *clearly clean*:
+no detector candidate, no long digit run, and no cue word that usually accompanies free-form PII
+("my name", "address", "born", "passport", ...). With `PII_PRESCREEN_MODE = "fast"`, clearly clean
+messages skip the remote call; everything else is still sent to the Fiddler endpoint.
+
+    candidates = prescreen("reach me at jane@example.com")  # [PIICandidate(label="email", ...)]
+    is_clearly_clean("How do I set up drift alerts?")         # True
+"""
+
+import ipaddress
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PIICandidate:
+    """A span matched by a local detector (and its checksum, where the entity type has one)."""
+    label: str
+    text: str
+    start: int
+    end: int
+
+
+def luhn_valid(number: str) -> bool:
+    """Luhn checksum of the digits in `number` (payment card numbers)."""
+    digits = [int(char) for char in number if char.isdigit()]
+    if len(digits) < 13:
+        return False
+    total = 0
+    for i, digit in enumerate(reversed(digits)):
+        if i % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def iban_valid(iban: str) -> bool:
+    """ISO 13616 mod-97 check of an IBAN (spaces ignored)."""
+    compact = iban.replace(" ", "").upper()
+    if not 15 <= len(compact) <= 34:
+        return False
+    rearranged = compact[4:] + compact[:4]
+    return int("".join(str(int(char, 36)) for char in rearranged)) % 97 == 1
+
+
+def _ip_valid(text: str) -> bool:
+    try:
+        return not ipaddress.ip_address(text).is_unspecified
+    except ValueError:
+        return False
+
+
+def _phone_valid(text: str) -> bool:
+    return 10 <= sum(char.isdigit() for char in text) <= 15
+
+
+# (label, pattern, validator); patterns are anchored on non-word boundaries so identifiers such as
+# model versions or hashes inside longer tokens do not match
+DETECTORS: tuple[tuple[str, re.Pattern[str], Callable[[str], bool] | None], ...] = (
+    ("email", re.compile(r"(?<![\w.+-])[\w.+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}(?![\w-])"), None),
+    ("credit_card_number", re.compile(r"(?<![\d-])\d(?:[ -]?\d){12,18}(?![\d-])"), luhn_valid),
+    ("social_security_number", re.compile(r"(?<![\d-])(?!000|666|9\d\d)\d{3}([- ])(?!00)\d{2}\1(?!0000)\d{4}(?![\d-])"), None),
+    ("iban", re.compile(r"(?<![A-Za-z0-9])[A-Z]{2}\d{2}(?: ?[A-Z0-9]){11,30}(?![A-Za-z0-9])"), iban_valid),
+    ("ip_address", re.compile(r"(?<![\w.:])(?:\d{1,3}(?:\.\d{1,3}){3}|(?:[0-9A-Fa-f]{0,4}:){2,7}[0-9A-Fa-f]{0,4})(?![\w.:])"), _ip_valid),
+    ("phone_number", re.compile(r"(?<![\w+])(?:\+\d{1,3}[ .-]?)?(?:\(\d{2,4}\)[ .-]?)?\d{2,4}(?:[ .-]?\d{2,4}){1,3}(?!\w)"), _phone_valid),
+    )
+
+# Words that usually accompany the free-form entity types no detector covers
+_CUE_RE = re.compile(
+    r"\b(?:my name|name is|i am called|call me|address|street|avenue|zip|postcode|postal code|born|birthday|"
+    r"date of birth|dob|passport|driver'?s licen[cs]e|licen[cs]e number|ssn|social security|account number|"
+    r"routing number|tax id|medical record|diagnos\w*|patient|insurance)\b",
+    re.IGNORECASE,
+    )
+# Any run of 6+ digits (account numbers, IDs) sends the message to the remote guardrail
+_DIGIT_RUN_RE = re.compile(r"\d(?:[ -]?\d){5,}")
+
+# Messages screened in fast mode and how many of them skipped the remote call
+stats: Counter[str] = Counter()
+
+
+def prescreen(text: str) -> list[PIICandidate]:
+    """
+    Structured PII candidates found by the local detectors, in text order.
+    Spans claimed by an earlier detector (e.g. a card number) are not reported again by later ones
+    (e.g. phone numbers).
+    """
+    candidates: list[PIICandidate] = []
+    claimed: list[tuple[int, int]] = []
+    for label, pattern, validator in DETECTORS:
+        for match in pattern.finditer(text):
+            start, end = match.span()
+            if any(start < claimed_end and claimed_start < end for claimed_start, claimed_end in claimed):
+                continue
+            if validator is not None and not validator(match.group()):
+                continue
+            candidates.append(PIICandidate(label, match.group(), start, end))
+            claimed.append((start, end))
+    return sorted(candidates, key=lambda candidate: candidate.start)
+
+
+def has_pii_cues(text: str) -> bool:
+    """Whether `text` contains cue words or digit runs that call for the remote guardrail."""
+    return _CUE_RE.search(text) is not None or _DIGIT_RUN_RE.search(text) is not None
+
+
+def is_clearly_clean(text: str) -> bool:
+    """True when no detector fires and no cue suggests free-form PII; such input can skip the remote call in fast mode."""
+    return not has_pii_cues(text) and not prescreen(text)
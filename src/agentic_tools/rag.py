@@ -1,30 +1,141 @@
+import asyncio
+import contextvars
 import logging
 import json
-from typing import Any, cast
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Literal, cast
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import Cassandra as CassandraVectorStore
-from langchain_core.tools import Tool, tool  # noqa: F401
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool, Tool, tool  # noqa: F401
 # from langchain.tools.retriever import create_retriever_tool
 
-from src.vector_index_mgmt import open_cassandra_connection, close_cassandra_connection
+from src.vector_index_mgmt import open_cassandra_connection, close_cassandra_connection, fetch_corpus_version, afetch_corpus_version
+from src.agentic_tools.rag_cache import CachedEmbeddings, EmbeddingCache, SemanticResultCache
+from src.agentic_tools.local_vector_index import LocalVectorIndex
+from src.agentic_tools.bm25_index import BM25Index
+from src.agentic_tools.rag_postprocessing import adaptive_cutoff, document_key, pack_documents, reciprocal_rank_fusion, with_scores
+from src.agentic_tools.rag_warm_cache import load_warm_cache
+from src.agentic_tools.retrieval_stash import retrieval_stash, thread_id_from_config
 from src.config import CONFIG_VECTOR_INDEX_MGMT , CONFIG_CHATBOT_NEW
+from src.utils.metrics import registry as metrics_registry, timed
 
 logger = logging.getLogger(__name__)
 
+# Source partitions of the corpus (`source_type` metadata written by data_generation.generate_corpus_from_sources)
+SourceType = Literal["docs", "notebooks", "blogs", "resources"]
+
 _cassandra_cluster = None
 _cassandra_session = None
-_embedding: OpenAIEmbeddings | None = None
+_embedding: CachedEmbeddings | None = None
 _vector_store: CassandraVectorStore | None = None
+_local_index: LocalVectorIndex | None = None
+_bm25_index: BM25Index | None = None
+
+# Process-wide query-embedding cache; survives re-initialization of the Cassandra resources
+_embedding_cache = EmbeddingCache(
+    max_size=CONFIG_CHATBOT_NEW["EMBEDDING_CACHE_MAX_SIZE"],
+    ttl_seconds=CONFIG_CHATBOT_NEW["EMBEDDING_CACHE_TTL_SECONDS"],
+    )
+
+# Process-wide retrieval-result cache, invalidated whenever the loaded corpus version changes
+_result_cache = SemanticResultCache(
+    max_size=CONFIG_CHATBOT_NEW["RESULT_CACHE_MAX_SIZE"],
+    similarity_threshold=CONFIG_CHATBOT_NEW["RESULT_CACHE_SIMILARITY_THRESHOLD"],
+    ttl_seconds=CONFIG_CHATBOT_NEW["RESULT_CACHE_TTL_SECONDS"],
+    )
+_corpus_version_checked_at: float | None = None
+
+# Worker threads for the concurrent vector searches of the sync multi-query tool
+_search_executor = ThreadPoolExecutor(max_workers=CONFIG_CHATBOT_NEW["MULTI_QUERY_MAX_QUERIES"], thread_name_prefix="rag-search")
+
+def _submit_in_context(fn: Callable[..., Any], *args: Any) -> Future:
+    """Run `fn(*args)` on the search executor in a copy of the caller's context, so its spans nest under the tool span."""
+    return _search_executor.submit(contextvars.copy_context().run, fn, *args)
+
+def _load_local_index() -> LocalVectorIndex | None:
+    """Load the local vector index mirror if present and consistent with the Cassandra corpus version."""
+    index_dir = CONFIG_CHATBOT_NEW["LOCAL_VECTOR_INDEX_DIR"]
+    if not CONFIG_CHATBOT_NEW["USE_LOCAL_VECTOR_INDEX"] or not LocalVectorIndex.exists(index_dir):
+        logger.info("Local vector index not available; similarity search will use Cassandra")
+        return None
+    try:
+        index = LocalVectorIndex.load(
+            index_dir,
+            coarse_dims=CONFIG_CHATBOT_NEW["LOCAL_VECTOR_INDEX_COARSE_DIMS"],
+            quantize_int8=CONFIG_CHATBOT_NEW["LOCAL_VECTOR_INDEX_COARSE_INT8"],
+            rerank_candidates=CONFIG_CHATBOT_NEW["LOCAL_VECTOR_INDEX_RERANK_CANDIDATES"],
+            )
+    except Exception as e:
+        logger.warning(f"Failed to load local vector index from {index_dir}, falling back to Cassandra: {e}")
+        return None
+
+    remote_version = _result_cache.corpus_version
+    if remote_version is not None and index.corpus_version != remote_version:
+        logger.warning(f"Local vector index is stale (local: {index.corpus_version}, Cassandra: {remote_version}); falling back to Cassandra")
+        return None
+    logger.info(
+        f"✓ Local vector index loaded ({len(index)} rows, corpus version: {index.corpus_version}, "
+        f"scan matrix: {index.memory_bytes / 1e6:.1f} MB, coarse dims: {index.coarse_dims or 'off'})"
+        )
+    return index
+
+def _load_bm25_index() -> BM25Index | None:
+    """Load the BM25 index if present and built from the corpus version currently in Cassandra."""
+    index_dir = CONFIG_CHATBOT_NEW["BM25_INDEX_DIR"]
+    if not CONFIG_CHATBOT_NEW["HYBRID_BM25_ENABLED"] or not BM25Index.exists(index_dir):
+        logger.info("BM25 index not available; retrieval is vector-only")
+        return None
+    try:
+        load_start = time.perf_counter()
+        index = BM25Index.load(index_dir)
+    except Exception as e:
+        logger.warning(f"Failed to load BM25 index from {index_dir}, retrieval is vector-only: {e}")
+        return None
+
+    remote_version = _result_cache.corpus_version
+    if remote_version is not None and index.corpus_version != remote_version:
+        logger.warning(f"BM25 index is stale (local: {index.corpus_version}, Cassandra: {remote_version}); retrieval is vector-only")
+        return None
+    logger.info(f"✓ BM25 index loaded in {(time.perf_counter() - load_start) * 1000:.1f} ms ({len(index)} documents, corpus version: {index.corpus_version})")
+    return index
+
+def _load_warm_cache() -> None:
+    """Pre-fill the embedding and result caches with the precomputed frequent questions, if a warm cache file exists."""
+    path = CONFIG_CHATBOT_NEW["RAG_WARM_CACHE_PATH"]
+    if not CONFIG_CHATBOT_NEW["RAG_WARM_CACHE_ENABLED"] or not os.path.exists(path):
+        logger.info("RAG warm cache not available; caches start cold")
+        return
+    try:
+        load_start = time.perf_counter()
+        loaded = load_warm_cache(
+            path,
+            _embedding_cache,
+            _result_cache,
+            embedding_model=CONFIG_VECTOR_INDEX_MGMT["embedding_model"],
+            dimensions=CONFIG_VECTOR_INDEX_MGMT["embedding_dimensions"],
+            )
+    except Exception as e:
+        logger.warning(f"Failed to load RAG warm cache from {path}, caches start cold: {e}")
+        return
+    logger.info(f"✓ RAG warm cache loaded in {(time.perf_counter() - load_start) * 1000:.1f} ms ({loaded['embeddings']} embeddings, {loaded['results']} result sets)")
 
 def init_rag_resources() -> tuple[bool, str]:
     """Initialize global Cassandra vector store resources once for reuse."""
-    global _cassandra_cluster, _cassandra_session, _embedding, _vector_store
+    global _cassandra_cluster, _cassandra_session, _embedding, _vector_store, _local_index, _bm25_index
     if _vector_store is not None and _cassandra_session is not None:
         return True, "Already initialized"
     try:
-        _embedding = OpenAIEmbeddings(
-            model=CONFIG_VECTOR_INDEX_MGMT["embedding_model"],
-            dimensions=CONFIG_VECTOR_INDEX_MGMT["embedding_dimensions"],
+        _embedding = CachedEmbeddings(
+            base=OpenAIEmbeddings(
+                model=CONFIG_VECTOR_INDEX_MGMT["embedding_model"],
+                dimensions=CONFIG_VECTOR_INDEX_MGMT["embedding_dimensions"],
+                ),
+            cache=_embedding_cache,
             )
         _cassandra_cluster, _cassandra_session = cast(tuple[Any, Any], open_cassandra_connection())
         _vector_store = CassandraVectorStore(
@@ -33,13 +144,19 @@ def init_rag_resources() -> tuple[bool, str]:
             keyspace=CONFIG_VECTOR_INDEX_MGMT["keyspace"],
             table_name=CONFIG_VECTOR_INDEX_MGMT["TABLE_NAME"],
             )
-        logger.info("✓ RAG resources initialized (persistent Cassandra session)")
+        _refresh_corpus_version()
+        _load_warm_cache()
+        _local_index = _load_local_index()
+        _bm25_index = _load_bm25_index()
+        logger.info(f"✓ RAG resources initialized (persistent Cassandra session, corpus version: {_result_cache.corpus_version})")
         return True, "Initialized"
     except Exception as e:
         logger.error(f"Error initializing RAG resources: {e}")
         # Ensure globals are cleared on failure
         _vector_store = None
         _embedding = None
+        _local_index = None
+        _bm25_index = None
         if _cassandra_cluster or _cassandra_session:
             try:
                 close_cassandra_connection(_cassandra_cluster, _cassandra_session)
@@ -51,7 +168,7 @@ def init_rag_resources() -> tuple[bool, str]:
 
 def shutdown_rag_resources() -> None:
     """Shutdown global Cassandra vector store resources safely."""
-    global _cassandra_cluster, _cassandra_session, _embedding, _vector_store
+    global _cassandra_cluster, _cassandra_session, _embedding, _vector_store, _local_index, _bm25_index
     try:
         if _cassandra_cluster or _cassandra_session:
             close_cassandra_connection(_cassandra_cluster, _cassandra_session)
@@ -60,10 +177,240 @@ def shutdown_rag_resources() -> None:
         _cassandra_session = None
         _embedding = None
         _vector_store = None
-        logger.info("✓ RAG resources shut down")
+        _local_index = None
+        _bm25_index = None
+        logger.info(f"✓ RAG resources shut down; retrieval latency: {metrics_registry.dump(prefix='rag.')}")
+
+def get_rag_cache_stats() -> dict[str, dict[str, Any]]:
+    """Return hit/miss counters of the RAG caches."""
+    return {
+        "embedding_cache": _embedding_cache.stats(),
+        "result_cache": _result_cache.stats(),
+        }
 
-@tool
-def rag_over_fiddler_knowledge_base(query: str) -> str:
+def get_rag_latency_stats() -> dict[str, dict[str, float]]:
+    """Return p50/p95/p99 latencies (ms) of the retrieval phases: rag.embed, rag.ann.*, rag.decode, rag.rank, rag.format."""
+    return metrics_registry.snapshot(prefix="rag.")
+
+def _corpus_version_check_due() -> bool:
+    """Rate limit corpus version checks to one per RESULT_CACHE_VERSION_CHECK_SECONDS."""
+    global _corpus_version_checked_at
+    now = time.monotonic()
+    if _corpus_version_checked_at is not None and now - _corpus_version_checked_at < CONFIG_CHATBOT_NEW["RESULT_CACHE_VERSION_CHECK_SECONDS"]:
+        return False
+    _corpus_version_checked_at = now
+    return _cassandra_session is not None
+
+def _apply_corpus_version(corpus_version: str | None) -> None:
+    """Invalidate the result cache and drop stale local indexes when the corpus version changes."""
+    global _local_index, _bm25_index
+    _result_cache.ensure_corpus_version(corpus_version)
+    if _local_index is not None and corpus_version is not None and _local_index.corpus_version != corpus_version:
+        logger.warning(f"Local vector index went stale (local: {_local_index.corpus_version}, Cassandra: {corpus_version}); falling back to Cassandra")
+        _local_index = None
+    if _bm25_index is not None and corpus_version is not None and _bm25_index.corpus_version != corpus_version:
+        logger.warning(f"BM25 index went stale (local: {_bm25_index.corpus_version}, Cassandra: {corpus_version}); retrieval is vector-only")
+        _bm25_index = None
+
+def _refresh_corpus_version() -> None:
+    """
+    Re-read the corpus version marker (rate limited) and invalidate derived state on change.
+    A failed read leaves the cache and indexes as they are; the next check retries.
+    """
+    if not _corpus_version_check_due():
+        return
+    try:
+        corpus_version = fetch_corpus_version(_cassandra_session, CONFIG_VECTOR_INDEX_MGMT["TABLE_NAME"])
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fetch corpus version, keeping {_result_cache.corpus_version}: {e}")
+        return
+    _apply_corpus_version(corpus_version)
+
+async def _arefresh_corpus_version() -> None:
+    """Async variant of _refresh_corpus_version using the driver's execute_async."""
+    if not _corpus_version_check_due():
+        return
+    try:
+        corpus_version = await afetch_corpus_version(_cassandra_session, CONFIG_VECTOR_INDEX_MGMT["TABLE_NAME"])
+    except Exception as e:
+        logger.warning(f"⚠️ Could not fetch corpus version, keeping {_result_cache.corpus_version}: {e}")
+        return
+    _apply_corpus_version(corpus_version)
+
+def _source_filter(source_type: str | None) -> dict[str, str] | None:
+    """Metadata filter restricting retrieval to one source partition (None searches everything)."""
+    return {"source_type": source_type} if source_type else None
+
+def _ann_kwargs(filter: dict[str, str] | None) -> dict[str, Any]:
+    """cassio metric_ann_search arguments for a metadata filter (metadata_s predicate)."""
+    return {"metadata": filter} if filter is not None else {}
+
+def _decode_hits(hits: list[dict[str, Any]]) -> list[tuple[Document, float]]:
+    """Turn raw cassio ANN rows into (Document, score) pairs, scoring cosine on 0-1 like CassandraVectorStore."""
+    with timed("rag.decode", rows=len(hits)):
+        return [
+            (Document(id=hit["row_id"], page_content=hit["body_blob"], metadata=hit["metadata"]), 0.5 + 0.5 * hit["distance"])
+            for hit in hits
+            ]
+
+def _search_by_vector(query_vector: list[float], k: int, filter: dict[str, str] | None = None) -> list[tuple[Any, float]]:
+    """
+    Scored similarity search served by the local index mirror when loaded, else by Cassandra behind the result cache.
+    `filter` is pushed down into the vector query (metadata_s predicate in Cassandra) and is part of the cache key.
+    """
+    _refresh_corpus_version()
+    if _local_index is not None:
+        with timed("rag.ann.local", k=k):
+            return _local_index.similarity_search_with_score_by_vector(query_vector, k=k, filter=filter)
+
+    assert _vector_store is not None
+    partition = json.dumps(filter, sort_keys=True) if filter else None
+    scored = _result_cache.lookup(query_vector, k, partition)
+    if scored is None:
+        # Public cassio table query, decoded locally so ANN and decode are timed separately
+        with timed("rag.ann.cassandra", k=k):
+            hits = list(_vector_store.table.metric_ann_search(vector=query_vector, n=k, metric="cos", **_ann_kwargs(filter)))
+        scored = _decode_hits(hits)
+        _result_cache.store(query_vector, k, scored, partition)
+    return scored
+
+async def _asearch_by_vector(query_vector: list[float], k: int, filter: dict[str, str] | None = None) -> list[tuple[Any, float]]:
+    """Async variant of _search_by_vector; the Cassandra ANN query is awaited via execute_async futures."""
+    await _arefresh_corpus_version()
+    if _local_index is not None:
+        with timed("rag.ann.local", k=k):
+            return _local_index.similarity_search_with_score_by_vector(query_vector, k=k, filter=filter)
+
+    assert _vector_store is not None
+    partition = json.dumps(filter, sort_keys=True) if filter else None
+    scored = _result_cache.lookup(query_vector, k, partition)
+    if scored is None:
+        with timed("rag.ann.cassandra", k=k):
+            hits = list(await _vector_store.table.ametric_ann_search(vector=query_vector, n=k, metric="cos", **_ann_kwargs(filter)))
+        scored = _decode_hits(hits)
+        _result_cache.store(query_vector, k, scored, partition)
+    return scored
+
+def _compress_query(query: str, compress: bool | None) -> str | None:
+    """Query used for extractive compression, or None when compression is off for this call (default from config)."""
+    enabled = CONFIG_CHATBOT_NEW["RAG_COMPRESSION_ENABLED"] if compress is None else compress
+    return query if enabled else None
+
+def _candidate_k() -> int:
+    """Number of candidates fetched per query: ADAPTIVE_K_MAX when adaptive top-k is on, else TOP_K_RETRIEVAL."""
+    if CONFIG_CHATBOT_NEW["ADAPTIVE_K_ENABLED"]:
+        return max(CONFIG_CHATBOT_NEW["ADAPTIVE_K_MAX"], CONFIG_CHATBOT_NEW["TOP_K_RETRIEVAL"])
+    return CONFIG_CHATBOT_NEW["TOP_K_RETRIEVAL"]
+
+def _select_documents(scored: list[tuple[Any, float]]) -> list[tuple[Any, float]]:
+    """Apply the adaptive top-k cut-off to best-first scored candidates."""
+    if not CONFIG_CHATBOT_NEW["ADAPTIVE_K_ENABLED"]:
+        return scored[:CONFIG_CHATBOT_NEW["TOP_K_RETRIEVAL"]]
+    return adaptive_cutoff(
+        scored,
+        base_k=CONFIG_CHATBOT_NEW["TOP_K_RETRIEVAL"],
+        max_k=CONFIG_CHATBOT_NEW["ADAPTIVE_K_MAX"],
+        score_floor=CONFIG_CHATBOT_NEW["ADAPTIVE_K_SCORE_FLOOR"],
+        elbow_ratio=CONFIG_CHATBOT_NEW["ADAPTIVE_K_ELBOW_RATIO"],
+        flat_spread=CONFIG_CHATBOT_NEW["ADAPTIVE_K_FLAT_SPREAD"],
+        )
+
+def _lexical_candidates(query: str, filter: dict[str, str] | None = None) -> list[tuple[Any, float]]:
+    """
+    BM25's own top hits for `query` across the corpus (same source filter as the vector search), with scores
+    normalized to 0-1 by BM25Index.full_match_score. Hits below BM25_SCORE_FLOOR are dropped.
+    """
+    if _bm25_index is None:
+        return []
+    full_match = _bm25_index.full_match_score(query)
+    if full_match <= 0:
+        return []
+    hits = [(doc, min(score / full_match, 1.0)) for doc, score in _bm25_index.search(query, k=CONFIG_CHATBOT_NEW["BM25_TOP_K"], filter=filter)]
+    return [(doc, score) for doc, score in hits if score >= CONFIG_CHATBOT_NEW["BM25_SCORE_FLOOR"]]
+
+def _rank_query(
+    query: str,
+    scored: list[tuple[Any, float]],
+    filter: dict[str, str] | None = None,
+    ) -> tuple[list, dict[str, float], dict[str, float]]:
+    """
+    Select documents from the scored vector candidates of one query (adaptive cut-off) and fuse them with
+    BM25's own hits (reciprocal-rank fusion), so exact-term chunks the embedding missed are still returned.
+    Returns the fused ranking, the vector similarity of each selected document and the normalized lexical score
+    of each BM25 hit (both by document_key).
+    """
+    with timed("rag.rank", candidates=len(scored)):
+        selected = _select_documents(scored)
+        lexical = _lexical_candidates(query, filter)
+        rankings = [[doc for doc, _ in ranking] for ranking in (selected, lexical) if ranking]
+        documents = reciprocal_rank_fusion(rankings, k=CONFIG_CHATBOT_NEW["RRF_K"])
+        return documents, {document_key(doc): score for doc, score in selected}, {document_key(doc): score for doc, score in lexical}
+
+def _format_documents(documents: list, thread_id: str, compress_query: str | None = None) -> str:
+    """
+    Serialize retrieved documents into the tool output format, keyed by their retrieval stash IDs.
+    Overlapping chunks are merged and the content is packed into the configured token budget;
+    the JSON is emitted without indentation since every whitespace character costs context tokens.
+    With `compress_query`, each chunk is reduced to the sentences most relevant to it (extractive compression).
+    The packed documents are stashed for the thread so the faithfulness guardrail can resolve them by ID.
+    """
+    if not documents:
+        return "No relevant documents found in the knowledge base."
+
+    with timed("rag.format", documents=len(documents)):
+        packed = pack_documents(
+            documents,
+            token_budget=CONFIG_CHATBOT_NEW["RAG_CONTEXT_TOKEN_BUDGET"],
+            encoding_name=CONFIG_CHATBOT_NEW["RAG_CONTEXT_ENCODING"],
+            min_overlap=CONFIG_CHATBOT_NEW["RAG_MERGE_MIN_OVERLAP_CHARS"],
+            compress_query=compress_query,
+            max_spans=CONFIG_CHATBOT_NEW["RAG_COMPRESSION_MAX_SPANS"],
+            )
+
+        doc_ids = retrieval_stash.add(thread_id, packed)
+        formatted_results = {}
+        for doc_id, doc in zip(doc_ids, packed, strict=True):
+            content = doc.page_content
+            metadata = doc.metadata if doc.metadata else {}
+            formatted_results[doc_id] = {
+                "metadata": metadata,
+                "content": content
+                }
+
+        return json.dumps(formatted_results, ensure_ascii=False, separators=(",", ":"))
+
+def _retrieval_output(
+    queries: list[str],
+    candidates: list[list[tuple[Any, float]]],
+    config: RunnableConfig,
+    compress: bool | None = None,
+    limit: int | None = None,
+    filter: dict[str, str] | None = None,
+    ) -> str:
+    """
+    Post-retrieval pipeline shared by the RAG tools: select each query's vector candidates and fuse them with
+    its BM25 hits, fuse the per-query rankings (keeping each document's best scores), then attach scores and format.
+    """
+    ranked = [_rank_query(query, scored, filter) for query, scored in zip(queries, candidates, strict=True)]
+    scores: dict[str, float] = {}
+    lexical_scores: dict[str, float] = {}
+    for _, query_scores, query_lexical_scores in ranked:
+        for key, score in query_scores.items():
+            scores[key] = max(score, scores.get(key, score))
+        for key, score in query_lexical_scores.items():
+            lexical_scores[key] = max(score, lexical_scores.get(key, score))
+    # A single ranking passes through fusion unchanged
+    documents = reciprocal_rank_fusion([documents for documents, _, _ in ranked], k=CONFIG_CHATBOT_NEW["RRF_K"], limit=limit)
+    logger.debug(f"RAG cache stats: {get_rag_cache_stats()}")
+    documents = with_scores(with_scores(documents, scores), lexical_scores, key="lexical_score")
+    return _format_documents(documents, thread_id_from_config(config), _compress_query(" ".join(queries), compress))
+
+def _rag_over_fiddler_knowledge_base(
+    query: str,
+    config: RunnableConfig,
+    source_type: SourceType | None = None,
+    compress: bool | None = None,
+    ) -> str:
     """RAG Knowledge Retrieval - PRIMARY INFORMATION SOURCE
     PURPOSE: Search Fiddler's documentation vector database for relevant information.
 
@@ -76,10 +423,92 @@ def rag_over_fiddler_knowledge_base(query: str) -> str:
 
     MANDATORY WORKFLOW - ALWAYS FOLLOW THIS SEQUENCE:
     1. Call this tool with optimized query
-    2. IMMEDIATELY call tool_fiddler_guardrail_faithfulness to validate retrieval quality
+    2. IMMEDIATELY call tool_fiddler_guardrail_faithfulness to validate retrieval quality (pass document IDs, never document text)
+
+    Inputs:
+        - query(str): Optimized search query with only key terms for maximum cosine similarity
+        - source_type(str, optional): Search only one part of the knowledge base:
+          "docs" (product documentation), "notebooks" (example notebooks), "blogs", "resources" (whitepapers, guides).
+          Omit to search everything.
+        - compress(bool, optional): true to return only the sentences of each document that match the query
+          (shorter context for narrow factual questions); false to return whole documents. Omit for the default.
+    Output(str): Relevant documents keyed by document ID (D1, D2, ...) with metadata; `relevance_score` (0-1, higher is better) is the vector similarity,
+    `lexical_score` (0-1) the keyword match for documents found by exact terms. A document may carry either or both.
+    Only documents that clear a relevance threshold are returned, so fewer documents means fewer good matches.
+    """
+    try:
+        global _vector_store
+        if _vector_store is None:
+            ok, msg = init_rag_resources()
+            logger.warning(f"RAG resources initialized during query stage (not during chat start): {msg}")
+            if not ok or _vector_store is None:
+                logger.error(f"Error: RAG resources not initialized: {msg}")
+                return f"Error: RAG resources not initialized: {msg}"
+
+        with timed("rag.embed", queries=1):
+            query_vector = _vector_store.embedding.embed_query(query)
+        filter = _source_filter(source_type)
+
+        candidates = _search_by_vector(query_vector, _candidate_k(), filter)
+        return _retrieval_output([query], [candidates], config, compress, filter=filter)
+
+    except Exception as e:
+        logger.error(f"Error in Cassandra search: {e}")
+        return f"Error: {str(e)}\n Please fix your mistakes."
+
+async def _arag_over_fiddler_knowledge_base(
+    query: str,
+    config: RunnableConfig,
+    source_type: SourceType | None = None,
+    compress: bool | None = None,
+    ) -> str:
+    """Native coroutine implementation of rag_over_fiddler_knowledge_base (see the sync docstring)."""
+    try:
+        if _vector_store is None:
+            ok, msg = await asyncio.to_thread(init_rag_resources)
+            logger.warning(f"RAG resources initialized during query stage (not during chat start): {msg}")
+            if not ok or _vector_store is None:
+                logger.error(f"Error: RAG resources not initialized: {msg}")
+                return f"Error: RAG resources not initialized: {msg}"
+
+        with timed("rag.embed", queries=1):
+            query_vector = await _vector_store.embedding.aembed_query(query)
+        filter = _source_filter(source_type)
+
+        candidates = await _asearch_by_vector(query_vector, _candidate_k(), filter)
+        return _retrieval_output([query], [candidates], config, compress, filter=filter)
+
+    except Exception as e:
+        logger.error(f"Error in Cassandra search: {e}")
+        return f"Error: {str(e)}\n Please fix your mistakes."
 
-    Input(str): Optimized search query with only key terms for maximum cosine similarity
-    Output(str): Concatenated relevant documents with metadata
+def _prepare_queries(queries: list[str]) -> list[str]:
+    """Strip, de-duplicate and cap the query list of the multi-query tool."""
+    unique = list(dict.fromkeys(query.strip() for query in queries if query and query.strip()))
+    max_queries = CONFIG_CHATBOT_NEW["MULTI_QUERY_MAX_QUERIES"]
+    if len(unique) > max_queries:
+        logger.warning(f"Multi-query retrieval received {len(unique)} queries; only the first {max_queries} are used")
+    return unique[:max_queries]
+
+def _rag_over_fiddler_knowledge_base_multi(
+    queries: list[str],
+    config: RunnableConfig,
+    source_type: SourceType | None = None,
+    compress: bool | None = None,
+    ) -> str:
+    """RAG Knowledge Retrieval (MULTI-QUERY) - use INSTEAD of several rag_over_fiddler_knowledge_base calls
+    PURPOSE: Search Fiddler's documentation with several phrasings of the same information need in ONE tool call.
+
+    WHEN TO USE:
+    - When you would otherwise call rag_over_fiddler_knowledge_base 2 or more times in a turn
+    - When the question covers several sub-topics (e.g. "alerts" and "custom metrics")
+
+    Inputs:
+        - queries(list[str]): 2-4 short search queries with only key terms
+        - source_type(str, optional): "docs", "notebooks", "blogs" or "resources" to search one part of the knowledge base
+        - compress(bool, optional): true to return only the matching sentences of each document
+    Output(str): Deduplicated, rank-fused relevant documents keyed by document ID (D1, D2, ...) with metadata and
+    `relevance_score` (vector similarity) and/or `lexical_score` (keyword match)
     """
     try:
         global _vector_store
@@ -90,26 +519,65 @@ def rag_over_fiddler_knowledge_base(query: str) -> str:
                 logger.error(f"Error: RAG resources not initialized: {msg}")
                 return f"Error: RAG resources not initialized: {msg}"
 
-        documents = _vector_store.similarity_search(query, k=CONFIG_CHATBOT_NEW['TOP_K_RETRIEVAL'])
+        queries = _prepare_queries(queries)
+        if not queries:
+            return "Error: at least one non-empty query is required."
 
-        if not documents:
-            return "No relevant documents found in the knowledge base."
+        k = _candidate_k()
+        filter = _source_filter(source_type)
+        with timed("rag.embed", queries=len(queries)):
+            query_vectors = cast(CachedEmbeddings, _vector_store.embedding).embed_queries(queries)
+        searches = [_submit_in_context(_search_by_vector, query_vector, k, filter) for query_vector in query_vectors]
+        candidates = [search.result() for search in searches]
+        return _retrieval_output(queries, candidates, config, compress, limit=CONFIG_CHATBOT_NEW["MULTI_QUERY_MAX_DOCUMENTS"], filter=filter)
 
-        formatted_results = {}
-        for i, doc in enumerate(documents, 1):
-            content = doc.page_content
-            metadata = doc.metadata if doc.metadata else {}
-            formatted_results[f"Document {i}"] = {
-                "metadata": metadata,
-                "content": content
-                }
+    except Exception as e:
+        logger.error(f"Error in Cassandra search: {e}")
+        return f"Error: {str(e)}\n Please fix your mistakes."
 
-        return json.dumps(formatted_results , indent=4)
+async def _arag_over_fiddler_knowledge_base_multi(
+    queries: list[str],
+    config: RunnableConfig,
+    source_type: SourceType | None = None,
+    compress: bool | None = None,
+    ) -> str:
+    """Native coroutine implementation of rag_over_fiddler_knowledge_base_multi (see the sync docstring)."""
+    try:
+        if _vector_store is None:
+            ok, msg = await asyncio.to_thread(init_rag_resources)
+            logger.warning(f"RAG resources initialized during query stage (not during chat start): {msg}")
+            if not ok or _vector_store is None:
+                logger.error(f"Error: RAG resources not initialized: {msg}")
+                return f"Error: RAG resources not initialized: {msg}"
+
+        queries = _prepare_queries(queries)
+        if not queries:
+            return "Error: at least one non-empty query is required."
+
+        k = _candidate_k()
+        filter = _source_filter(source_type)
+        with timed("rag.embed", queries=len(queries)):
+            query_vectors = await cast(CachedEmbeddings, _vector_store.embedding).aembed_queries(queries)
+        candidates = await asyncio.gather(*(_asearch_by_vector(query_vector, k, filter) for query_vector in query_vectors))
+        return _retrieval_output(queries, list(candidates), config, compress, limit=CONFIG_CHATBOT_NEW["MULTI_QUERY_MAX_DOCUMENTS"], filter=filter)
 
     except Exception as e:
         logger.error(f"Error in Cassandra search: {e}")
         return f"Error: {str(e)}\n Please fix your mistakes."
 
+# Single tool with both implementations: `invoke` runs the sync path, `ainvoke` (used by app.astream) awaits the coroutine
+rag_over_fiddler_knowledge_base = StructuredTool.from_function(
+    func=_rag_over_fiddler_knowledge_base,
+    coroutine=_arag_over_fiddler_knowledge_base,
+    name="rag_over_fiddler_knowledge_base",
+    )
+
+rag_over_fiddler_knowledge_base_multi = StructuredTool.from_function(
+    func=_rag_over_fiddler_knowledge_base_multi,
+    coroutine=_arag_over_fiddler_knowledge_base_multi,
+    name="rag_over_fiddler_knowledge_base_multi",
+    )
+
 
 """
 
@@ -0,0 +1,255 @@
+"""
+Caching layer for the RAG retrieval tool.
+
+EmbeddingCache keeps query embeddings as compact float32 vectors keyed by a
+normalized form of the query, so recurring questions skip the OpenAI round-trip.
+CachedEmbeddings wraps any LangChain `Embeddings` and is passed to the vector store
+in place of the raw OpenAIEmbeddings client.
+
+SemanticResultCache returns a previously retrieved document set when a new query
+embedding is close enough (cosine) to a cached one, skipping the Cassandra ANN query.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, cast
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Common English filler words; kept small on purpose so that domain terms never collide
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "could", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "please", "should", "so", "tell",
+    "that", "the", "there", "this", "to", "was", "we", "what", "when", "where", "which", "who",
+    "why", "will", "with", "would", "you", "your",
+    })
+
+# Punctuation stripped from token edges only, so identifiers like `fdl.Model` survive
+_EDGE_PUNCTUATION = "\"'`?!.,;:()[]{}<>"
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache keying: lowercase, collapse whitespace, drop stop words.
+    Falls back to the full token list when a query is made only of stop words.
+    """
+    tokens = [token.strip(_EDGE_PUNCTUATION) for token in _WHITESPACE_RE.split(query.lower())]
+    tokens = [token for token in tokens if token]
+    content_tokens = [token for token in tokens if token not in STOP_WORDS]
+    return " ".join(content_tokens or tokens)
+
+
+class EmbeddingCache(TTLLRUCache[str, np.ndarray]):
+    """Bounded TTL/LRU cache of query embeddings stored as float32 arrays."""
+
+    def get_vector(self, query: str) -> np.ndarray | None:
+        return self.get(normalize_query(query))
+
+    def put_vector(self, query: str, vector: list[float] | np.ndarray) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        array.setflags(write=False)
+        self.set(normalize_query(query), array)
+        return array
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves `embed_query` from an EmbeddingCache.
+    Document embedding (used during ingestion) is passed through uncached.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.base.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.base.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        cached = self.cache.get_vector(text)
+        if cached is not None:
+            return cached.tolist()
+        return self.cache.put_vector(text, self.base.embed_query(text)).tolist()
+
+    async def aembed_query(self, text: str) -> list[float]:
+        cached = self.cache.get_vector(text)
+        if cached is not None:
+            return cached.tolist()
+        return self.cache.put_vector(text, await self.base.aembed_query(text)).tolist()
+
+    def _split_cached(self, texts: list[str]) -> tuple[list[list[float] | None], list[int]]:
+        vectors: list[list[float] | None] = []
+        missing: list[int] = []
+        for i, text in enumerate(texts):
+            cached = self.cache.get_vector(text)
+            vectors.append(cached.tolist() if cached is not None else None)
+            if cached is None:
+                missing.append(i)
+        return vectors, missing
+
+    def embed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Embed several queries; cache misses are sent to the base model as one batched request."""
+        # OpenAI embeds queries and documents identically, so the batch endpoint can serve queries
+        vectors, missing = self._split_cached(texts)
+        if missing:
+            fresh = self.base.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh, strict=True):
+                vectors[i] = self.cache.put_vector(texts[i], vector).tolist()
+        return cast(list[list[float]], vectors)
+
+    async def aembed_queries(self, texts: list[str]) -> list[list[float]]:
+        """Async variant of embed_queries."""
+        vectors, missing = self._split_cached(texts)
+        if missing:
+            fresh = await self.base.aembed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh, strict=True):
+                vectors[i] = self.cache.put_vector(texts[i], vector).tolist()
+        return cast(list[list[float]], vectors)
+
+
+class SemanticResultCache:
+    """
+    Retrieval-result cache keyed by query-vector similarity.
+
+    Query vectors are L2-normalized and kept in one preallocated float32 matrix so a lookup
+    is a single matrix-vector product. Entries expire after `ttl_seconds`, the least recently
+    used entry is evicted when full, and everything is dropped when the corpus version changes.
+
+    Args:
+        max_size: Maximum number of cached queries
+        similarity_threshold: Minimum cosine similarity for a hit
+        ttl_seconds: Entry lifetime in seconds (None or <= 0 disables expiry)
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        similarity_threshold: float,
+        ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        ):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds if ttl_seconds and ttl_seconds > 0 else None
+        self.corpus_version: str | None = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._vectors: np.ndarray | None = None  # allocated on first store, once the dimension is known
+        self._results: list[Any] = [None] * max_size
+        self._partitions: list[str | None] = [None] * max_size
+        self._k = np.zeros(max_size, dtype=np.int32)
+        self._stored_at = np.zeros(max_size, dtype=np.float64)
+        self._last_used = np.zeros(max_size, dtype=np.float64)
+        self._occupied = np.zeros(max_size, dtype=bool)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector: list[float] | np.ndarray) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def _live_mask(self, now: float) -> np.ndarray:
+        mask = self._occupied.copy()
+        if self.ttl_seconds is not None:
+            mask &= (now - self._stored_at) <= self.ttl_seconds
+        return mask
+
+    def ensure_corpus_version(self, corpus_version: str | None) -> None:
+        """Drop all entries if `corpus_version` differs from the one the cache was filled against."""
+        with self._lock:
+            if corpus_version == self.corpus_version:
+                return
+            if self._occupied.any():
+                logger.info(f"Corpus version changed ({self.corpus_version} -> {corpus_version}); clearing semantic result cache")
+                self.invalidations += 1
+            self.corpus_version = corpus_version
+            self._clear_locked()
+
+    def _clear_locked(self) -> None:
+        self._occupied[:] = False
+        self._results = [None] * self.max_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear_locked()
+
+    def _partition_mask(self, partition: str | None) -> np.ndarray:
+        return np.fromiter((stored == partition for stored in self._partitions), dtype=bool, count=self.max_size)
+
+    def lookup(self, query_vector: list[float] | np.ndarray, k: int, partition: str | None = None) -> Any | None:
+        """
+        Return the cached result of the most similar query retrieved with at least `k` documents
+        from the same `partition` (e.g. a metadata filter), or None if no cached query reaches
+        the similarity threshold.
+        """
+        query = self._normalize(query_vector)
+        with self._lock:
+            now = self._clock()
+            mask = self._live_mask(now) & (self._k >= k) & self._partition_mask(partition)
+            if self._vectors is None or not mask.any():
+                self.misses += 1
+                return None
+            similarities = self._vectors @ query
+            similarities[~mask] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            result = self._results[best]
+            return result[:k] if isinstance(result, list) else result
+
+    def store(self, query_vector: list[float] | np.ndarray, k: int, result: Any, partition: str | None = None) -> None:
+        """Cache `result` (retrieved with `k` documents from `partition`) under `query_vector`."""
+        query = self._normalize(query_vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, query.shape[0]), dtype=np.float32)
+            now = self._clock()
+            live = self._live_mask(now)
+            self._occupied &= live
+            if not self._occupied.all():
+                slot = int(np.argmin(self._occupied))
+            else:
+                slot = int(np.argmin(self._last_used))
+            self._vectors[slot] = query
+            self._results[slot] = result
+            self._partitions[slot] = partition
+            self._k[slot] = k
+            self._stored_at[slot] = now
+            self._last_used[slot] = now
+            self._occupied[slot] = True
+
+    def __len__(self) -> int:
+        return int(self._occupied.sum())
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "corpus_version": self.corpus_version,
+            }
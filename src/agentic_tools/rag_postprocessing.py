@@ -0,0 +1,316 @@
+"""
+Post-processing of retrieved documents for the RAG tool.
+
+Rank fusion across retrievers (vector ANN, BM25), score-aware adaptive top-k, context packing (merging the
+overlapping chunks produced by the 3000/600 recursive splitter, whitespace compaction and
+a token budget) and query-time extractive compression live here so the tool module only
+orchestrates retrieval and formatting.
+"""
+
+import hashlib
+import logging
+import re
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+from src.agentic_tools.bm25_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(document: Document) -> str:
+    """Stable identity of a chunk across retrievers (vector store ids and BM25 positions differ)."""
+    return hashlib.sha1(document.page_content.encode("utf-8")).hexdigest()
+
+
+def reciprocal_rank_fusion(ranked_lists: list[list[Document]], k: int = 60, limit: int | None = None) -> list[Document]:
+    """
+    Fuse several best-first rankings with reciprocal-rank fusion: score(d) = sum(1 / (k + rank)).
+    Duplicates across lists are merged; ties keep first-seen order.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in ranked_lists:
+        for rank, document in enumerate(ranking, 1):
+            key = document_key(document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, document)
+    fused = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [documents[key] for key in fused[:limit]]
+
+
+# ==================== ADAPTIVE TOP-K ====================
+
+def adaptive_cutoff(
+    scored: list[tuple[Document, float]],
+    base_k: int,
+    max_k: int,
+    score_floor: float,
+    elbow_ratio: float,
+    flat_spread: float,
+    ) -> list[tuple[Document, float]]:
+    """
+    Pick how many of the best-first `scored` documents to keep.
+
+    - documents scoring below `score_floor` are dropped
+    - the list is cut at the first "elbow": a drop between neighbours larger than `elbow_ratio`
+      of the top score's margin above the floor
+    - k stays at `base_k` unless the top `base_k` scores are within `flat_spread` of each other,
+      in which case it grows (up to `max_k`) while later scores stay within that spread
+    """
+    kept = [(document, score) for document, score in scored if score >= score_floor]
+    if not kept:
+        return []
+
+    limit = min(base_k, len(kept))
+    if len(kept) >= base_k and kept[0][1] - kept[base_k - 1][1] <= flat_spread:
+        while limit < min(max_k, len(kept)) and kept[0][1] - kept[limit][1] <= flat_spread:
+            limit += 1
+
+    margin = max(kept[0][1] - score_floor, 1e-6)
+    selected = kept[:1]
+    for i in range(1, limit):
+        if (kept[i - 1][1] - kept[i][1]) / margin > elbow_ratio:
+            break
+        selected.append(kept[i])
+    return selected
+
+
+def with_scores(documents: list[Document], scores: dict[str, float], key: str = "relevance_score") -> list[Document]:
+    """Copy `documents` with their similarity score (looked up by document_key) added to the metadata."""
+    scored_documents = []
+    for document in documents:
+        score = scores.get(document_key(document))
+        metadata = dict(document.metadata) if score is None else {**document.metadata, key: round(score, 4)}
+        scored_documents.append(Document(page_content=document.page_content, metadata=metadata, id=document.id))
+    return scored_documents
+
+
+# ==================== CONTEXT PACKING ====================
+
+# Chunks produced by data_generation.split_text_with_markdown_headers carry this header prefix
+_CONTEXT_HEADER_RE = re.compile(r"^(\[CONTEXT: [^\]\n]*\]\n\n)")
+_SOURCE_LINE_RE = re.compile(r"^(?:DOC|NOTEBOOK|BLOG|RESOURCES)_URL:\S+", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def compact_whitespace(text: str) -> str:
+    """
+    Strip trailing whitespace from every line and keep at most one blank line between blocks.
+    Leading indentation is kept, so code in fenced blocks and nested markdown lists survive unchanged.
+    """
+    text = "\n".join(line.rstrip() for line in text.splitlines())
+    return _BLANK_LINES_RE.sub("\n\n", text).strip("\n")
+
+
+def _split_context_header(text: str) -> tuple[str, str]:
+    match = _CONTEXT_HEADER_RE.match(text)
+    return (match.group(1), text[match.end():]) if match else ("", text)
+
+
+def _suffix_prefix_overlap(left: str, right: str, min_overlap: int, max_overlap: int) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right` (0 if shorter than `min_overlap`)."""
+    upper = min(len(left), len(right), max_overlap)
+    if upper < min_overlap:
+        return 0
+    probe = right[:min_overlap]
+    window_start = len(left) - upper
+    position = left.find(probe, window_start)
+    while position != -1:
+        length = len(left) - position
+        if right.startswith(left[position:]):
+            return length
+        position = left.find(probe, position + 1)
+    return 0
+
+
+def merge_overlapping_text(left: str, right: str, min_overlap: int, max_overlap: int) -> str | None:
+    """
+    Merge two chunks that were split from the same section with overlap (or contain one another).
+    A shared `[CONTEXT: ...]` header is kept once. Returns None when the chunks are unrelated.
+    """
+    left_header, left_body = _split_context_header(left)
+    right_header, right_body = _split_context_header(right)
+    if left_header and right_header and left_header != right_header:
+        return None
+    header = left_header or right_header
+
+    if right_body in left_body:
+        return header + left_body
+    if left_body in right_body:
+        return header + right_body
+    overlap = _suffix_prefix_overlap(left_body, right_body, min_overlap, max_overlap)
+    if overlap:
+        return header + left_body + right_body[overlap:]
+    overlap = _suffix_prefix_overlap(right_body, left_body, min_overlap, max_overlap)
+    if overlap:
+        return header + right_body + left_body[overlap:]
+    return None
+
+
+def source_of(document: Document) -> str | None:
+    """Source URL of a chunk from its metadata, or from the `*_URL:` line the corpus embeds in the text."""
+    for key in ("url", "source"):
+        if document.metadata.get(key):
+            return str(document.metadata[key])
+    match = _SOURCE_LINE_RE.search(document.page_content[:500])
+    return match.group(0) if match else None
+
+
+def merge_overlapping_documents(documents: list[Document], min_overlap: int = 50, max_overlap: int = 1000) -> list[Document]:
+    """
+    Merge adjacent / overlapping chunks of the same source, keeping best-rank order.
+    Chunks with different known sources are never merged.
+    """
+    merged: list[Document] = []
+    for document in documents:
+        for i, packed in enumerate(merged):
+            packed_source, source = source_of(packed), source_of(document)
+            if packed_source and source and packed_source != source:
+                continue
+            text = merge_overlapping_text(packed.page_content, document.page_content, min_overlap, max_overlap)
+            if text is not None:
+                merged[i] = Document(page_content=text, metadata={**document.metadata, **packed.metadata}, id=packed.id)
+                break
+        else:
+            merged.append(document)
+    return merged
+
+
+@lru_cache(maxsize=4)
+def _get_encoding(encoding_name: str):
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer '{encoding_name}' unavailable, estimating tokens as chars / 4: {e}")
+        return None
+
+
+def count_tokens(text: str, encoding_name: str) -> int:
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding_name: str) -> str:
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def token_windows(text: str, max_tokens: int, encoding_name: str, overlap_tokens: int = 0) -> list[str]:
+    """
+    Split `text` into consecutive windows of at most `max_tokens` tokens, each starting
+    `overlap_tokens` before the end of the previous one. Text within the budget is returned whole.
+    """
+    step = max(1, max_tokens - overlap_tokens)
+    encoding = _get_encoding(encoding_name)
+    if encoding is None:
+        max_chars, step_chars = max_tokens * 4, step * 4
+        if len(text) <= max_chars:
+            return [text]
+        return [text[start:start + max_chars] for start in range(0, len(text) - (max_chars - step_chars), step_chars)]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    return [encoding.decode(tokens[start:start + max_tokens]) for start in range(0, len(tokens) - (max_tokens - step), step)]
+
+
+def pack_documents(
+    documents: list[Document],
+    token_budget: int,
+    encoding_name: str,
+    min_overlap: int = 50,
+    min_tail_tokens: int = 64,
+    compress_query: str | None = None,
+    max_spans: int = 6,
+    ) -> list[Document]:
+    """
+    Context-packing stage of the RAG tool: merge overlapping chunks, optionally compress each one
+    to the `max_spans` spans most relevant to `compress_query`, compact whitespace and keep
+    documents in rank order until `token_budget` is spent. The last document is truncated to the
+    remaining budget when at least `min_tail_tokens` are left, otherwise dropped.
+    """
+    packed: list[Document] = []
+    remaining = token_budget
+    for document in merge_overlapping_documents(documents, min_overlap=min_overlap):
+        if compress_query:
+            document = compress_document(document, compress_query, max_spans=max_spans)
+        text = compact_whitespace(document.page_content)
+        tokens = count_tokens(text, encoding_name)
+        if tokens > remaining:
+            if remaining < min_tail_tokens:
+                break
+            text = truncate_to_tokens(text, remaining, encoding_name)
+            tokens = remaining
+        packed.append(Document(page_content=text, metadata=document.metadata, id=document.id))
+        remaining -= tokens
+        if remaining <= 0:
+            break
+    return packed
+
+
+# ==================== EXTRACTIVE COMPRESSION ====================
+
+_SENTENCE_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9`*\[(])")
+_SPAN_GAP = "\n…\n"  # marks text dropped between kept spans
+
+
+def split_spans(text: str) -> list[str]:
+    """
+    Split chunk text into scoring units: sentences of prose lines, with fenced code blocks and
+    markdown table rows kept whole so compression never cuts through code.
+    """
+    spans: list[str] = []
+    code_block: list[str] = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if code_block:
+            code_block.append(line)
+            if stripped.startswith("```"):
+                spans.append("\n".join(code_block))
+                code_block = []
+        elif stripped.startswith("```"):
+            code_block = [line]
+        elif stripped.startswith(("|", "#", "-", "*")) or not stripped:
+            if stripped:
+                spans.append(stripped)
+        else:
+            spans.extend(sentence for sentence in _SENTENCE_BOUNDARY_RE.split(stripped) if sentence)
+    if code_block:
+        spans.append("\n".join(code_block))
+    return spans
+
+
+def compress_document(document: Document, query: str, max_spans: int = 6) -> Document:
+    """
+    Keep only the `max_spans` spans of `document` that score highest against `query` (BM25 over
+    the chunk's own spans), in their original order, plus the chunk's `[CONTEXT: ...]` header and
+    source URL line. Documents that already fit are returned unchanged; when no span matches the
+    query the leading spans are kept.
+    """
+    header, body = _split_context_header(document.page_content)
+    source_line = ""
+    source_match = _SOURCE_LINE_RE.match(body)
+    if source_match:
+        source_line = source_match.group(0) + "\n"
+        body = body[source_match.end():].lstrip("\n")
+
+    spans = split_spans(body)
+    if len(spans) <= max_spans:
+        return document
+
+    scores = BM25Index.build(spans).scores(query)
+    ranked = sorted(range(len(spans)), key=lambda i: scores[i], reverse=True)
+    keep = sorted(ranked[:max_spans]) if scores[ranked[0]] > 0 else list(range(max_spans))
+
+    parts = [spans[keep[0]]]
+    for previous, current in zip(keep, keep[1:], strict=False):
+        parts.append("\n" if current == previous + 1 else _SPAN_GAP)
+        parts.append(spans[current])
+    return Document(page_content=header + source_line + "".join(parts), metadata=document.metadata, id=document.id)
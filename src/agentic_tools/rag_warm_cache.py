@@ -0,0 +1,291 @@
+"""
+RAG Warm Cache - precomputed embeddings and retrieval results for the most frequent questions
+
+An offline job mines recorded traffic for the queries the RAG tool is asked most often:
+    - trace exports of `FiddlerClient(jsonl_capture_enabled=True)` (`data_generator/data/*.jsonl`):
+      the `query` / `queries` arguments of the rag_over_fiddler_knowledge_base[_multi] tool spans
+    - batch_orchestrator conversation CSVs (`data_generator/data/*.csv`): the user turns
+It groups near-duplicate queries into clusters (greedy leader clustering on embedding cosine),
+embeds and retrieves the top clusters once, and writes everything to one JSON file.
+
+`init_rag_resources()` loads that file into the EmbeddingCache and SemanticResultCache, so the first
+users of a fresh pod do not pay the embedding and ANN round-trips for the most common questions.
+Retrieval results are only loaded when the file was built against the live corpus version;
+embeddings only depend on the embedding model and are loaded regardless.
+
+Build it (needs OpenAI + Cassandra credentials):
+    python -m src.agentic_tools.rag_warm_cache
+    python -m src.agentic_tools.rag_warm_cache --traces data_generator/data/chatbot_run_export.jsonl --top-n 100
+"""
+
+import base64
+import csv
+import json
+import logging
+import os
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.agentic_tools.rag_cache import EmbeddingCache, SemanticResultCache, normalize_query
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+RAG_TOOL_NAMES = ("rag_over_fiddler_knowledge_base", "rag_over_fiddler_knowledge_base_multi")
+USER_ROLES = ("human", "user")
+MAX_QUESTION_CHARS = 500  # longer user turns are conversation, not questions worth caching
+MAX_ALIASES = 5           # member queries (besides the representative) whose embeddings are shipped per cluster
+
+
+# ---------- mining ----------
+
+def _tool_queries(tool_input: Any) -> list[str]:
+    if isinstance(tool_input, str):
+        try:
+            tool_input = json.loads(tool_input)
+        except json.JSONDecodeError:
+            return []
+    if not isinstance(tool_input, dict):
+        return []
+    queries = tool_input.get("queries") or [tool_input.get("query")]
+    return [query for query in queries if isinstance(query, str)]
+
+
+def mine_trace_export(path: str) -> Counter[str]:
+    """Queries passed to the RAG tools in a JSONL trace export, with their counts."""
+    counts: Counter[str] = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                span = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if span.get("tool_name") in RAG_TOOL_NAMES:
+                counts.update(query.strip() for query in _tool_queries(span.get("tool_input")) if query.strip())
+    return counts
+
+
+def mine_conversations_csv(path: str) -> Counter[str]:
+    """User turns of a batch_orchestrator conversation CSV (id, persona, role, content), with their counts."""
+    counts: Counter[str] = Counter()
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            content = (row.get("content") or "").strip()
+            if row.get("role") in USER_ROLES and content and len(content) <= MAX_QUESTION_CHARS:
+                counts[content] += 1
+    return counts
+
+
+# ---------- clustering ----------
+
+@dataclass
+class QuestionCluster:
+    """Near-duplicate queries; `representative` is the most frequent member."""
+    representative: str
+    vector: np.ndarray
+    count: int = 0
+    members: list[tuple[str, np.ndarray]] = field(default_factory=list)
+
+
+def cluster_questions(counts: Counter[str], embedding: Embeddings, threshold: float, top_n: int, batch_size: int = 256) -> list[QuestionCluster]:
+    """
+    Greedy leader clustering of `counts` by embedding cosine similarity.
+
+    Queries are first collapsed by `normalize_query` (the cache key), then visited from most to
+    least frequent; each joins the first cluster whose leader is within `threshold`, else starts one.
+
+    Returns:
+        The `top_n` clusters with the highest total count
+    """
+    by_key: dict[str, tuple[str, int]] = {}
+    for text, count in counts.most_common():
+        key = normalize_query(text)
+        if not key:
+            continue
+        representative, total = by_key.get(key, (text, 0))
+        by_key[key] = (representative, total + count)
+    items = sorted(by_key.values(), key=lambda item: -item[1])
+    if not items:
+        return []
+
+    texts = [text for text, _ in items]
+    vectors = np.asarray(
+        [vector for start in range(0, len(texts), batch_size) for vector in embedding.embed_documents(texts[start:start + batch_size])],
+        dtype=np.float32,
+        )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+
+    clusters: list[QuestionCluster] = []
+    leaders = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+    for (text, count), vector in zip(items, vectors, strict=True):
+        similarities = leaders @ vector
+        best = int(np.argmax(similarities)) if len(clusters) else -1
+        if best < 0 or similarities[best] < threshold:
+            clusters.append(QuestionCluster(representative=text, vector=vector))
+            leaders = np.vstack([leaders, vector])
+            best = len(clusters) - 1
+        else:
+            clusters[best].members.append((text, vector))
+        clusters[best].count += count
+
+    clusters.sort(key=lambda cluster: -cluster.count)
+    return clusters[:top_n]
+
+
+# ---------- serialization ----------
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+def _decode_vector(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype="<f4")
+
+
+def build_warm_cache(
+    clusters: list[QuestionCluster],
+    search: Callable[[list[float]], list[tuple[Document, float]]],
+    k: int,
+    corpus_version: str | None,
+    embedding_model: str,
+    dimensions: int,
+    ) -> dict[str, Any]:
+    """
+    Run `search` (query vector -> scored documents, as `rag._search_by_vector`) for each cluster
+    representative and assemble the warm-cache payload.
+    """
+    entries = []
+    for cluster in clusters:
+        scored = search(cluster.vector.tolist())
+        entries.append({
+            "count": cluster.count,
+            "queries": [
+                {"text": text, "vector": _encode_vector(vector)}
+                for text, vector in [(cluster.representative, cluster.vector), *cluster.members[:MAX_ALIASES]]
+                ],
+            "k": k,
+            "results": [
+                {"id": document.id, "page_content": document.page_content, "metadata": document.metadata, "score": float(score)}
+                for document, score in scored
+                ],
+            })
+    return {
+        "format_version": FORMAT_VERSION,
+        "corpus_version": corpus_version,
+        "embedding_model": embedding_model,
+        "dimensions": dimensions,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "entries": entries,
+        }
+
+
+def save_warm_cache(payload: dict[str, Any], path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    logger.info(f"✓ RAG warm cache written to {path} ({len(payload['entries'])} question clusters, corpus version: {payload['corpus_version']})")
+
+
+def load_warm_cache(
+    path: str,
+    embedding_cache: EmbeddingCache,
+    result_cache: SemanticResultCache,
+    embedding_model: str,
+    dimensions: int,
+    ) -> dict[str, int]:
+    """
+    Fill the caches from a warm-cache file. Nothing is loaded when the embedding model or dimension
+    differ; retrieval results are skipped when the file's corpus version is not the result cache's.
+
+    Returns:
+        Counts of loaded {"embeddings", "results"}
+    """
+    with open(path, encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("format_version") != FORMAT_VERSION:
+        logger.warning(f"⚠️ RAG warm cache {path} has format version {payload.get('format_version')}, expected {FORMAT_VERSION}; skipped")
+        return {"embeddings": 0, "results": 0}
+    if payload.get("embedding_model") != embedding_model or payload.get("dimensions") != dimensions:
+        logger.warning(f"⚠️ RAG warm cache {path} was built with {payload.get('embedding_model')}/{payload.get('dimensions')}; skipped")
+        return {"embeddings": 0, "results": 0}
+
+    load_results = payload.get("corpus_version") is not None and payload.get("corpus_version") == result_cache.corpus_version
+    if not load_results:
+        logger.warning(f"RAG warm cache corpus version {payload.get('corpus_version')} != {result_cache.corpus_version}; loading embeddings only")
+
+    loaded = {"embeddings": 0, "results": 0}
+    # Reverse order so the most frequent clusters are the most recently used entries (evicted last)
+    for entry in reversed(payload["entries"]):
+        vectors = [(query["text"], _decode_vector(query["vector"])) for query in entry["queries"]]
+        for text, vector in vectors:
+            embedding_cache.put_vector(text, vector)
+            loaded["embeddings"] += 1
+        if load_results and vectors:
+            scored = [
+                (Document(id=result.get("id"), page_content=result["page_content"], metadata=result.get("metadata") or {}), result["score"])
+                for result in entry["results"]
+                ]
+            result_cache.store(vectors[0][1], entry["k"], scored)
+            loaded["results"] += 1
+    return loaded
+
+
+def mine(traces: Iterable[str], conversations: Iterable[str]) -> Counter[str]:
+    """Combined query counts of all trace exports and conversation CSVs."""
+    counts: Counter[str] = Counter()
+    for path in traces:
+        counts.update(mine_trace_export(path))
+    for path in conversations:
+        counts.update(mine_conversations_csv(path))
+    return counts
+
+
+if __name__ == "__main__":
+    import argparse
+    import glob
+
+    from src.agentic_tools import rag
+    from src.config import CONFIG_CHATBOT_NEW, CONFIG_VECTOR_INDEX_MGMT
+
+    parser = argparse.ArgumentParser(description="Build the RAG warm cache from recorded traffic")
+    parser.add_argument("--traces", nargs="*", default=None, help="JSONL trace exports (defaults to data_generator/data/*.jsonl)")
+    parser.add_argument("--conversations", nargs="*", default=None, help="Conversation CSVs (defaults to data_generator/data/*.csv)")
+    parser.add_argument("--top-n", type=int, default=CONFIG_CHATBOT_NEW["RAG_WARM_CACHE_TOP_N"], help="Number of question clusters to precompute")
+    parser.add_argument("--threshold", type=float, default=CONFIG_CHATBOT_NEW["RAG_WARM_CACHE_CLUSTER_THRESHOLD"], help="Cosine similarity to join a cluster")
+    parser.add_argument("--output", default=CONFIG_CHATBOT_NEW["RAG_WARM_CACHE_PATH"], help="Warm cache file to write")
+    args = parser.parse_args()
+
+    counts = mine(
+        args.traces if args.traces is not None else glob.glob("data_generator/data/*.jsonl"),
+        args.conversations if args.conversations is not None else glob.glob("data_generator/data/*.csv"),
+        )
+    logger.info(f"Mined {sum(counts.values())} queries ({len(counts)} distinct)")
+
+    ok, message = rag.init_rag_resources()
+    if not ok:
+        raise SystemExit(f"RAG resources failed to initialize: {message}")
+    try:
+        k = rag._candidate_k()
+        clusters = cluster_questions(counts, rag._embedding, args.threshold, min(args.top_n, CONFIG_CHATBOT_NEW["RESULT_CACHE_MAX_SIZE"]))
+        payload = build_warm_cache(
+            clusters,
+            search=lambda vector: rag._search_by_vector(vector, k),
+            k=k,
+            corpus_version=rag._result_cache.corpus_version,
+            embedding_model=CONFIG_VECTOR_INDEX_MGMT["embedding_model"],
+            dimensions=CONFIG_VECTOR_INDEX_MGMT["embedding_dimensions"],
+            )
+        save_warm_cache(payload, args.output)
+    finally:
+        rag.shutdown_rag_resources()
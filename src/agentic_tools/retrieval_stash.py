@@ -0,0 +1,104 @@
+"""
+Retrieval stash - server-side copy of the documents the RAG tools returned in the current turn
+
+The RAG tools register every document they return here under a short ID (`D1`, `D2`, ...) scoped
+to the conversation thread. The faithfulness guardrail then takes those IDs (or nothing, meaning
+"everything retrieved this turn") and resolves the text server-side, so the model never has to
+re-emit the retrieved documents as tool-call arguments.
+
+Threads are keyed by the LangGraph `thread_id` of the injected RunnableConfig; the chat handler
+calls `start_turn` for each user message so IDs only ever refer to the current turn.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+
+from src.agentic_tools.rag_postprocessing import document_key
+from src.config import CONFIG_CHATBOT_NEW
+from src.utils.ttl_cache import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREAD_ID = "default"
+
+
+def thread_id_from_config(config: RunnableConfig | None) -> str:
+    """LangGraph thread id of a tool call, or DEFAULT_THREAD_ID when invoked outside a thread."""
+    configurable = (config or {}).get("configurable") or {}
+    return str(configurable.get("thread_id") or DEFAULT_THREAD_ID)
+
+
+@dataclass
+class _TurnDocuments:
+    documents: dict[str, Document] = field(default_factory=dict)  # doc id -> document, in retrieval order
+    ids_by_key: dict[str, str] = field(default_factory=dict)      # document_key -> doc id
+
+
+class RetrievalStash:
+    """
+    Per-thread store of the documents retrieved during the current turn.
+
+    Args:
+        max_threads: Maximum number of conversation threads kept (least recently used dropped first)
+        ttl_seconds: Lifetime of an idle thread's stash
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(self, max_threads: int, ttl_seconds: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self._threads: TTLLRUCache[str, _TurnDocuments] = TTLLRUCache(max_threads, ttl_seconds, clock)
+        self._lock = threading.Lock()
+
+    def start_turn(self, thread_id: str) -> None:
+        """Forget the documents of the previous turn of `thread_id`."""
+        self._threads.set(thread_id, _TurnDocuments())
+
+    def add(self, thread_id: str, documents: list[Document]) -> list[str]:
+        """Register `documents` for the current turn and return their IDs (a document seen before keeps its ID)."""
+        with self._lock:
+            turn = self._threads.get(thread_id)
+            if turn is None:
+                turn = _TurnDocuments()
+                self._threads.set(thread_id, turn)
+            doc_ids = []
+            for document in documents:
+                key = document_key(document)
+                doc_id = turn.ids_by_key.get(key)
+                if doc_id is None:
+                    doc_id = f"D{len(turn.documents) + 1}"
+                    turn.ids_by_key[key] = doc_id
+                turn.documents[doc_id] = document
+                doc_ids.append(doc_id)
+            return doc_ids
+
+    def resolve(self, thread_id: str, doc_ids: list[str] | None = None) -> tuple[list[Document], list[str]]:
+        """
+        Look up documents of the current turn of `thread_id`.
+        With no `doc_ids`, every document retrieved this turn is returned.
+
+        Returns:
+            Tuple of (documents found, requested IDs that are unknown)
+        """
+        with self._lock:
+            turn = self._threads.get(thread_id)
+            stashed = dict(turn.documents) if turn is not None else {}
+        if not doc_ids:
+            return list(stashed.values()), []
+        requested = list(dict.fromkeys(doc_id.strip().upper() for doc_id in doc_ids))
+        found = [stashed[doc_id] for doc_id in requested if doc_id in stashed]
+        missing = [doc_id for doc_id in requested if doc_id not in stashed]
+        if missing:
+            logger.warning(f"Unknown document ids for thread {thread_id}: {missing}")
+        return found, missing
+
+
+# Process-wide stash shared by the RAG tools (writers) and the faithfulness guardrail (reader)
+retrieval_stash = RetrievalStash(
+    max_threads=CONFIG_CHATBOT_NEW["RETRIEVAL_STASH_MAX_THREADS"],
+    ttl_seconds=CONFIG_CHATBOT_NEW["RETRIEVAL_STASH_TTL_SECONDS"],
+    )
@@ -42,22 +42,29 @@ from fiddler_langgraph.tracing.instrumentation import (  # todo - use this later
     )
 
 from src.middleware.fiddler_context_middleware import create_fiddler_context_middleware
+from src.middleware.guardrail_preflight_middleware import create_guardrail_preflight_middleware
 from opentelemetry.exporter.otlp.proto.http import Compression
 from opentelemetry.sdk.trace import SpanLimits
 
 from src.agentic_tools.rag import (
     rag_over_fiddler_knowledge_base,
+    rag_over_fiddler_knowledge_base_multi,
     init_rag_resources,
+    get_rag_latency_stats,
     # shutdown_rag_resources,
     )
+from src.agentic_tools.retrieval_stash import retrieval_stash
 from src.agentic_tools.validator_url import validate_url
 from src.agentic_tools.fiddler_gaurdrails import (
+    get_guardrail_latency_stats,
+    start_guardrail_keepwarm,
     tool_fiddler_guardrail_faithfulness,
     tool_fiddler_guardrail_safety,
     tool_fiddler_guardrail_pii,
     )
 
 from src.utils.custom_logging import setup_logging
+from src.utils.metrics import start_metrics_server
 # from utils.pretty_formatter import try_pretty_formatting
 from src.config import CONFIG_CHATBOT_NEW as config  # noqa: N811
 
@@ -132,6 +139,7 @@ tools = [
     tool_fiddler_guardrail_faithfulness,
     validate_url,
     rag_over_fiddler_knowledge_base,
+    rag_over_fiddler_knowledge_base_multi,
     ]
 logger.info("✓ Tools configured successfully")
 
@@ -142,7 +150,8 @@ app = create_agent(
     tools=tools,
     system_prompt=SYSTEM_INSTRUCTIONS_PROMPT,
     checkpointer=checkpointer,
-    middleware=[create_fiddler_context_middleware]
+    # Pre-flight PII + safety checks run before the first model call of each turn
+    middleware=[create_guardrail_preflight_middleware, create_fiddler_context_middleware]
     )
 
 # todo : test HEXOP
@@ -207,6 +216,13 @@ async def chat_profile(current_user: cl.User | None, metadata: str | None):
         )
     ]
 
+@cl.on_app_startup
+async def on_app_startup():
+    """Keep the guardrail endpoints warm from the server's event loop and serve the metrics."""
+    start_guardrail_keepwarm()
+    if config["METRICS_SERVER_ENABLED"]:
+        start_metrics_server(config["METRICS_SERVER_PORT"], config["METRICS_SERVER_HOST"])
+
 @cl.on_chat_start
 async def on_chat_start():
     """Initialize a new chat session with Chain of Thought toggle."""
@@ -259,6 +275,9 @@ async def on_message(message: cl.Message):
     """Handle incoming messages and stream responses."""
     thread_config = cl.user_session.get("thread_config")
 
+    # Document IDs handed to the faithfulness guardrail only refer to this turn's retrievals
+    retrieval_stash.start_turn(cl.user_session.get("session_id"))
+
     # Add the new user message to existing conversation
     user_message = HumanMessage(content=message.content)
 
@@ -320,6 +339,8 @@ async def on_message(message: cl.Message):
 async def on_chat_end():
     """Clean up when chat ends"""
     logger.info("Chat session ended")
+    logger.info(f"RAG retrieval latency so far (ms): {get_rag_latency_stats()}")
+    logger.info(f"Guardrail latency so far (ms): {get_guardrail_latency_stats()}")
 
     # # Shutdown RAG resources
     # try:
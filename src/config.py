@@ -1,3 +1,4 @@
+import os
 from typing import Any
 
 CONFIG_DATA_GENERATION : dict[str, Any] = {
@@ -40,6 +41,7 @@ CONFIG_VECTOR_INDEX_MGMT = {
     "temperature": 0,
     "squad_table": "squad",
     "chatbot_history_table": "fiddler_chatbot_history",
+    "corpus_version_table": "fiddler_corpus_version",  # Marker of the CSV feed last loaded per table
     "embedding_batch_size": 100,  # For processing embeddings in batches to avoid token limits
     "max_retry_attempts": 3,
     "retry_delay": 2.0,
@@ -66,13 +68,127 @@ CONFIG_CHATBOT_OLD = {
 CONFIG_CHATBOT_NEW : dict[str, Any ] = {
     # "FIDDLER_URL": "https://preprod.cloud.fiddler.ai",
     "FIDDLER_URL": "https://demo.fiddler.ai",
-    "FIDDLER_URL_GUARDRAILS": "https://demo.fiddler.ai",
+    # The FIDDLER_URL_GUARDRAILS environment variable overrides this, e.g. to use src/utils/guardrail_stub_server.py
+    "FIDDLER_URL_GUARDRAILS": os.getenv("FIDDLER_URL_GUARDRAILS", "https://demo.fiddler.ai"),
     # "FIDDLER_URL_GUARDRAILS": "https://guardrails.cloud.fiddler.ai",
 
     "FIDDLER_APP_ID": "762ad3d0-562c-4d5c-8090-c6195593a0b1",
 
     "FDL_GAURDRAIL_REQUESTS_TIMEOUT": 60,
+
+    # Pooled keep-alive HTTP client for the guardrail endpoints (guardrail_client.GuardrailClient)
+    "GUARDRAIL_HTTP_CONNECT_TIMEOUT": 5,
+    "GUARDRAIL_HTTP_MAX_CONNECTIONS": 32,
+    "GUARDRAIL_HTTP_MAX_KEEPALIVE_CONNECTIONS": 16,
+    "GUARDRAIL_HTTP_KEEPALIVE_EXPIRY_SECONDS": 120,
+    "GUARDRAIL_HTTP2": True,  # needs `h2` (installed with the httpx[http2] dependency); falls back to HTTP/1.1 without it
+
+    # Content-hash cache of guardrail results (guardrail_cache.GuardrailResultCache)
+    "GUARDRAIL_CACHE_ENABLED": True,
+    "GUARDRAIL_CACHE_MAX_SIZE": 4096,
+    "GUARDRAIL_CACHE_TTL_SECONDS": 24 * 60 * 60,
+    "GUARDRAIL_CACHE_DISK_PATH": None,            # e.g. "local_assets/guardrail_cache.sqlite3" to keep entries across restarts (PII results stay in memory)
+    "GUARDRAIL_CACHE_DISK_MAX_ENTRIES": 50_000,
+
+    # Guardrail input limits (fiddler_gaurdrails); longer inputs are split into token windows scored concurrently
+    "GUARDRAIL_TOKEN_ENCODING": "cl100k_base",     # local tokenizer used to count guardrail input tokens
+    "GUARDRAIL_TOKEN_SAFETY_MARGIN": 0.9,          # share of each API limit used; the service tokenizer can count a few more tokens
+    "GUARDRAIL_SAFETY_MAX_TOKENS": 4096,
+    "GUARDRAIL_PII_MAX_TOKENS": 4096,
+    "GUARDRAIL_FAITHFULNESS_CONTEXT_MAX_TOKENS": 3500,
+    "GUARDRAIL_FAITHFULNESS_RESPONSE_MAX_TOKENS": 350,
+    "GUARDRAIL_WINDOW_OVERLAP_TOKENS": 32,         # so entities and phrases on a window boundary are seen whole
+    "GUARDRAIL_MAX_WINDOWS": 8,                    # requests per guardrail call; text beyond is not scored (logged)
+
+    # Per-endpoint adaptive timeout, hedging and circuit breaker (guardrail_resilience.EndpointGuard)
+    # FDL_GAURDRAIL_REQUESTS_TIMEOUT is the timeout until enough latencies are known, and the upper bound after
+    "GUARDRAIL_LATENCY_WINDOW": 200,               # recent successful calls the percentiles are taken over
+    "GUARDRAIL_LATENCY_MIN_SAMPLES": 20,           # calls needed before the adaptive timeout and hedging apply
+    "GUARDRAIL_TIMEOUT_P99_FACTOR": 3.0,           # adaptive timeout = p99 latency x this factor
+    "GUARDRAIL_TIMEOUT_MIN_SECONDS": 2.0,
+    "GUARDRAIL_HEDGE_ENABLED": True,               # duplicate a request still unanswered after the p95 latency
+    "GUARDRAIL_HEDGE_MIN_DELAY_SECONDS": 0.05,
+    "GUARDRAIL_BREAKER_FAILURE_THRESHOLD": 5,      # consecutive failures that open the circuit
+    "GUARDRAIL_BREAKER_COOLDOWN_SECONDS": 30,      # fail fast for this long before a trial call
+
+    # Cross-session coalescing of async guardrail calls (guardrail_coalescer.GuardrailCoalescer)
+    "GUARDRAIL_COALESCE_ENABLED": True,
+    "GUARDRAIL_COALESCE_WINDOW_MS": 3,             # batch collection window (endpoints with a batch sender only)
+    "GUARDRAIL_COALESCE_MAX_BATCH_SIZE": 32,
+    "GUARDRAIL_COALESCE_MAX_CONCURRENCY": 16,      # requests in flight per event loop; keep <= GUARDRAIL_HTTP_MAX_CONNECTIONS
+
+    # Local regex/checksum PII pre-screen (pii_prescreen); "off" sends every message to the PII guardrail,
+    # "fast" skips the remote call for clearly clean messages (names or addresses without cue words are not caught)
+    "PII_PRESCREEN_MODE": "off",
+
+    # In-process keep-warm of the guardrail endpoints (guardrail_keepwarm.GuardrailKeepWarm)
+    "GUARDRAIL_KEEPWARM_ENABLED": True,
+    "GUARDRAIL_KEEPWARM_COLD_AFTER_SECONDS": 30 * 60,   # initial idle-to-cold estimate, lowered by observed cold starts
+    "GUARDRAIL_KEEPWARM_MIN_COLD_AFTER_SECONDS": 60,    # shorter idle gaps never count as cold starts (slow calls there are load)
+    "GUARDRAIL_KEEPWARM_PROBE_MARGIN": 0.8,             # probe at this share of the cold-after estimate
+    "GUARDRAIL_KEEPWARM_COLD_FACTOR": 3.0,              # x warm median latency that counts as a cold start
+    "GUARDRAIL_KEEPWARM_MIN_COLD_EXTRA_SECONDS": 0.5,
+    "GUARDRAIL_KEEPWARM_RETRY_SECONDS": 30,             # wait before re-probing an unavailable endpoint
+
+    # Prometheus text metrics (guardrail latencies, status codes, windowing, cache, circuit) on /metrics.
+    # The listener has no authentication, so it binds loopback unless METRICS_SERVER_HOST is set (e.g. 0.0.0.0 in a container)
+    "METRICS_SERVER_ENABLED": True,
+    "METRICS_SERVER_HOST": os.getenv("METRICS_SERVER_HOST", "127.0.0.1"),
+    "METRICS_SERVER_PORT": 9464,
+
     "TOP_K_RETRIEVAL": 4,
-    }
 
-GUARDRAILS_WARMUP_INTERVAL_MINUTES = 30
+    # Query-embedding cache in front of OpenAIEmbeddings (rag_cache.EmbeddingCache)
+    "EMBEDDING_CACHE_MAX_SIZE": 2048,
+    "EMBEDDING_CACHE_TTL_SECONDS": 24 * 60 * 60,
+
+    # Semantic retrieval-result cache (rag_cache.SemanticResultCache)
+    "RESULT_CACHE_MAX_SIZE": 512,
+    "RESULT_CACHE_TTL_SECONDS": 60 * 60,
+    "RESULT_CACHE_SIMILARITY_THRESHOLD": 0.95,  # cosine similarity between query embeddings
+    "RESULT_CACHE_VERSION_CHECK_SECONDS": 60,   # how often the corpus version marker is re-read
+
+    # Warm cache of frequent questions loaded into both caches at startup (rag_warm_cache)
+    "RAG_WARM_CACHE_ENABLED": True,
+    "RAG_WARM_CACHE_PATH": "local_assets/rag_warm_cache.json",
+    "RAG_WARM_CACHE_TOP_N": 200,                # question clusters precomputed by the offline job
+    "RAG_WARM_CACHE_CLUSTER_THRESHOLD": 0.9,    # cosine similarity for two queries to count as the same question
+
+    # In-process read replica of the vector table (local_vector_index.LocalVectorIndex)
+    "USE_LOCAL_VECTOR_INDEX": True,  # serve similarity search locally when the mirror exists, else Cassandra
+    "LOCAL_VECTOR_INDEX_DIR": "local_assets/local_vector_index",
+    "LOCAL_VECTOR_INDEX_COARSE_DIMS": 256,          # Matryoshka prefix scanned first (None = exact full-dimension scan)
+    "LOCAL_VECTOR_INDEX_COARSE_INT8": True,         # int8-quantize the coarse prefix matrix
+    "LOCAL_VECTOR_INDEX_RERANK_CANDIDATES": 64,     # coarse candidates re-scored at full dimension
+
+    # Hybrid lexical + vector retrieval (bm25_index.BM25Index hits are fused with the vector hits by reciprocal-rank fusion)
+    "HYBRID_BM25_ENABLED": True,
+    "BM25_INDEX_DIR": "local_assets/bm25_index",
+    "RRF_K": 60,  # rank-damping constant of reciprocal-rank fusion
+    "BM25_TOP_K": 4,  # BM25 hits fused per query, on top of the vector hits
+    "BM25_SCORE_FLOOR": 0.5,  # minimum BM25 score relative to a chunk containing every query term once
+
+    # Multi-query retrieval tool (rag_over_fiddler_knowledge_base_multi)
+    "MULTI_QUERY_MAX_QUERIES": 4,
+    "MULTI_QUERY_MAX_DOCUMENTS": 8,
+
+    # Score-aware adaptive top-k (rag_postprocessing.adaptive_cutoff); scores are 0.5 + 0.5 * cosine
+    "ADAPTIVE_K_ENABLED": True,       # False -> always return TOP_K_RETRIEVAL documents
+    "ADAPTIVE_K_MAX": 8,              # candidates fetched per query; k grows up to this when scores are flat
+    "ADAPTIVE_K_SCORE_FLOOR": 0.6,    # absolute similarity floor
+    "ADAPTIVE_K_ELBOW_RATIO": 0.3,    # cut where a score drop exceeds this share of the top score's margin above the floor
+    "ADAPTIVE_K_FLAT_SPREAD": 0.01,   # top scores within this spread count as flat
+
+    # Per-thread stash of retrieved documents, resolved by ID in the faithfulness guardrail (retrieval_stash.RetrievalStash)
+    "RETRIEVAL_STASH_MAX_THREADS": 1024,
+    "RETRIEVAL_STASH_TTL_SECONDS": 2 * 60 * 60,
+
+    # Context packing of the RAG tool output (rag_postprocessing.pack_documents)
+    "RAG_CONTEXT_TOKEN_BUDGET": 4000,      # tokens of retrieved content returned per tool call
+    "RAG_CONTEXT_ENCODING": "o200k_base",  # tiktoken encoding of the agent model (gpt-4o)
+    "RAG_MERGE_MIN_OVERLAP_CHARS": 50,     # shortest suffix/prefix match treated as splitter overlap
+
+    # Query-time extractive compression (rag_postprocessing.compress_document); tools can override per call
+    "RAG_COMPRESSION_ENABLED": False,
+    "RAG_COMPRESSION_MAX_SPANS": 6,  # sentences / code blocks kept per chunk
+    }
@@ -39,6 +39,7 @@ from packaging import version
 from utils.notebook_to_md import convert_notebooks_jupyter_nbconvert, convert_notebooks_native_regex
 from utils.flatten_folders import flatten_all_files_individually, concatenate_files_in_leaf_folders
 from utils.custom_logging import setup_logging
+from agentic_tools.bm25_index import build_from_csv as build_bm25_index_from_csv
 
 from config import CONFIG_DATA_GENERATION as config  # noqa: N811
 
@@ -59,6 +60,8 @@ FIDDLER_MD_NOTEBOOKS_DIR = os.path.join(LOCAL_DATA_ASSETS_DIR, "md-notebooks")
 FIDDLER_MD_BLOGS_DIR     = os.path.join(LOCAL_DATA_ASSETS_DIR, "md-blogs")
 FIDDLER_MD_RESOURCES_DIR = os.path.join(LOCAL_DATA_ASSETS_DIR, "md-resources")
 
+BM25_INDEX_DIR = os.path.join(LOCAL_DATA_ASSETS_DIR, "bm25_index")
+
 
 FIDDLER_MAIN_REPO_URL     = config["FIDDLER_MAIN_REPO_URL"]
 FIDDLER_EXAMPLES_REPO_URL = config["FIDDLER_EXAMPLES_REPO_URL"]
@@ -74,6 +77,8 @@ USE_MARKDOWN_HEADER_SPLITTER = config["USE_MARKDOWN_HEADER_SPLITTER"]
 MARKDOWN_HEADERS_TO_SPLIT_ON = config["MARKDOWN_HEADERS_TO_SPLIT_ON"]
 MARKDOWN_STRIP_HEADERS = config["MARKDOWN_STRIP_HEADERS"]
 MARKDOWN_RETURN_EACH_LINE = config["MARKDOWN_RETURN_EACH_LINE"]
+# Header context prefix added to each chunk by split_text_with_markdown_headers
+CONTEXT_PREFIX_PATTERN = re.compile(r"^\[CONTEXT: ([^\]\n]*)\]")
 
 KEEP_REPOS = config["KEEP_REPOS"]
 KEEP_CSV_FILES = config["KEEP_CSV_FILES"]
@@ -682,15 +687,29 @@ def split_text_with_markdown_headers(text: str) -> list[str]:
             raise RuntimeError("FATAL ERROR: Error splitting text via FALLBACK method") from e
 
 
+def header_path_of_chunk(chunk: str) -> str:
+    """
+    Header path of a chunk from its `[CONTEXT: Header 1: A | Header 2: B]` prefix, as "A > B".
+    Returns an empty string for chunks without header context.
+    """
+    match = CONTEXT_PREFIX_PATTERN.match(chunk)
+    if not match:
+        return ""
+    headers = [part.split(": ", 1)[-1].strip() for part in match.group(1).split(" | ")]
+    return " > ".join(header for header in headers if header)
+
+
 def generate_corpus_from_sources() -> Path:
     """
     Generate a corpus by combining all markdown content and splitting it into chunks.
-    Creates a DataFrame and saves it as a CSV file for vector indexing.
+    Creates a DataFrame and saves it as a CSV file for vector indexing. Besides `text`, each chunk
+    carries `source_type`, `url` and `header_path` columns, which become `metadata_s` fields in the
+    vector table and let the RAG tool search a single source partition.
     Returns: Path to the generated CSV file
     """
     logger.info("Starting corpus generation with text splitting...")
 
-    source_docs = []
+    source_docs: list[tuple[str, str, str]] = []  # (source_type, url, text)
 
     # Collect processed documentation files
     if os.path.exists(FIDDLER_MD_DOCS_DIR):
@@ -704,9 +723,9 @@ def generate_corpus_from_sources() -> Path:
                             file_content = f.read()
                             # Embed the URL/path of the doc in the content for reference
                             doc_url = os.path.join('https://docs.fiddler.ai/', filename).replace('__', '/')
-                            doc_url = f'DOC_URL:{doc_url[:-3]}'  # Remove .md extension
+                            doc_url = doc_url[:-3]  # Remove .md extension
                             doc_content = f'DOC_CONTENT:{file_content}'
-                            source_docs.append(f'{doc_url}\n{doc_content}')
+                            source_docs.append(("docs", doc_url, f'DOC_URL:{doc_url}\n{doc_content}'))
                     except Exception as e:
                         logger.error(f"Failed to read documentation file {file_path}: {str(e)}")
 
@@ -721,9 +740,9 @@ def generate_corpus_from_sources() -> Path:
                         with open(file_path, encoding='utf-8') as f:
                             file_content = f.read()
                             # Mark as notebook content
-                            doc_url = f'NOTEBOOK_URL:{file_path[:-3]}'
+                            doc_url = file_path[:-3]
                             doc_content = f'NOTEBOOK_CONTENT:{file_content}'
-                            source_docs.append(f'{doc_url}\n{doc_content}')
+                            source_docs.append(("notebooks", doc_url, f'NOTEBOOK_URL:{doc_url}\n{doc_content}'))
                     except Exception as e:
                         logger.error(f"Failed to read notebook file {file_path}: {str(e)}")
 
@@ -738,9 +757,9 @@ def generate_corpus_from_sources() -> Path:
                         with open(file_path, encoding='utf-8') as f:
                             file_content = f.read()
                             doc_url = os.path.join(FIDDLER_WEBSITE_BLOG_URL, filename).replace('__', '/')
-                            doc_url = f'BLOG_URL:{doc_url[:-3]}'
+                            doc_url = doc_url[:-3]
                             doc_content = f'BLOG_CONTENT:{file_content}'
-                            source_docs.append(f'{doc_url}\n{doc_content}')
+                            source_docs.append(("blogs", doc_url, f'BLOG_URL:{doc_url}\n{doc_content}'))
                     except Exception as e:
                         logger.error(f"Failed to read blog file {file_path}: {str(e)}")
 
@@ -755,9 +774,9 @@ def generate_corpus_from_sources() -> Path:
                         with open(file_path, encoding='utf-8') as f:
                             file_content = f.read()
                             doc_url = os.path.join(FIDDLER_WEBSITE_RESOURCES_URL, filename).replace('__', '/')
-                            doc_url = f'RESOURCES_URL:{doc_url[:-3]}'
+                            doc_url = doc_url[:-3]
                             doc_content = f'RESOURCES_CONTENT:{file_content}'
-                            source_docs.append(f'{doc_url}\n{doc_content}')
+                            source_docs.append(("resources", doc_url, f'RESOURCES_URL:{doc_url}\n{doc_content}'))
                     except Exception as e:
                         logger.error(f"Failed to read resources file {file_path}: {str(e)}")
 
@@ -768,17 +787,20 @@ def generate_corpus_from_sources() -> Path:
     logger.info(f"Collected {len(source_docs)} source documents")
 
     # Clean and prepare corpus
-    source_docs_trimmed = [item.strip() for item in source_docs if item.strip()]
+    source_docs_trimmed = [(source_type, url, text.strip()) for source_type, url, text in source_docs if text.strip()]
     logger.info(f"Cleaned corpus contains {len(source_docs_trimmed)} documents")
 
     splitter_method = "MarkdownHeaderTextSplitter" if USE_MARKDOWN_HEADER_SPLITTER else "RecursiveCharacterTextSplitter"
     logger.info(f"Splitting corpus into chunks using {splitter_method}...")
 
     corpus_chunks = []
-    for i, doc in tqdm(enumerate(source_docs_trimmed), total=len(source_docs_trimmed), desc="Processing MD Documents"):
+    for i, (source_type, url, doc) in tqdm(enumerate(source_docs_trimmed), total=len(source_docs_trimmed), desc="Processing MD Documents"):
         try:
             texts = split_text_with_markdown_headers(doc)
-            corpus_chunks.extend(texts)
+            corpus_chunks.extend(
+                {"text": text, "source_type": source_type, "url": url, "header_path": header_path_of_chunk(text)}
+                for text in texts
+                )
 
         except Exception as e:
             logger.error(f"Failed to split document {i + 1}: {str(e)}")
@@ -791,7 +813,7 @@ def generate_corpus_from_sources() -> Path:
         raise RuntimeError("No chunks generated from corpus")
 
     # Create DataFrame and save to CSV
-    df = pd.DataFrame({'text': corpus_chunks})
+    df = pd.DataFrame(corpus_chunks, columns=['text', 'source_type', 'url', 'header_path'])
 
     # Create output filename
     output_filename = f'vector_index_feed_{dt.datetime.now(dt.UTC).strftime("%Y%m%d%H%M%S")}.csv'  # type: ignore[attr-defined]
@@ -808,6 +830,18 @@ def generate_corpus_from_sources() -> Path:
         raise RuntimeError("Failed to save corpus CSV") from e
 
 
+def build_lexical_index(corpus_path: Path) -> None:
+    """
+    Build the BM25 index over the chunk texts of a generated corpus CSV.
+    The RAG tool loads it at startup and fuses it with the vector results.
+    """
+    try:
+        build_bm25_index_from_csv(str(corpus_path), BM25_INDEX_DIR)
+    except Exception as e:
+        # The chatbot falls back to vector-only retrieval without this index
+        logger.error(f"Failed to build BM25 index for {corpus_path}: {str(e)}")
+
+
 def corpus_data_generation_process() -> Path | None:
     """
     Main function to orchestrate the complete data management workflow.
@@ -838,6 +872,7 @@ def corpus_data_generation_process() -> Path | None:
         corpus_path = generate_corpus_from_sources()
 
         if corpus_path:
+            build_lexical_index(corpus_path)
             logger.info(f"Corpus CSV generated at: {corpus_path}")
             logger.info("Local markdown data management workflow completed successfully!")
             return corpus_path
@@ -1,8 +1,17 @@
-"""Middleware module for Fiddler context management."""
+"""Middleware module for Fiddler context management and guardrail pre-flight checks."""
 
 from src.middleware.fiddler_context_middleware import (
     create_fiddler_context_middleware,
     set_context_from_tool_messages,
 )
+from src.middleware.guardrail_preflight_middleware import (
+    GuardrailPreflightMiddleware,
+    create_guardrail_preflight_middleware,
+)
 
-__all__ = ["create_fiddler_context_middleware", "set_context_from_tool_messages"]
+__all__ = [
+    "GuardrailPreflightMiddleware",
+    "create_fiddler_context_middleware",
+    "create_guardrail_preflight_middleware",
+    "set_context_from_tool_messages",
+]
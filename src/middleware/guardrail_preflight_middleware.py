@@ -0,0 +1,79 @@
+"""
+Guardrail Pre-flight Middleware for LangGraph v1
+
+Runs the PII and jailbreak (safety) guardrails on the latest user message in `before_agent`, i.e.
+once per turn before the first model call, with both requests in flight concurrently. The results
+are stored in the agent state under `guardrail_preflight` and appended to the system prompt of
+every model call in the turn, so the model applies the privacy and security protocols without
+spending tool calls (and LLM round-trips) on the two checks. Guardrail tools whose endpoint the
+keep-warm tracker reports as failing are listed too, so the model does not call them.
+
+The state and prompt logic lives in src/agentic_tools/guardrail_preflight_prompt.py; this module
+only binds it to the langchain v1 middleware hooks.
+"""
+
+from collections.abc import Awaitable, Callable
+from typing import Any, NotRequired
+
+from langchain.agents.middleware import (
+    AgentMiddleware,
+    AgentState,
+    ModelRequest,
+    ModelResponse,
+)
+
+from src.agentic_tools.guardrail_preflight_prompt import apreflight_update, preflight_prompt_section, preflight_update
+
+
+class GuardrailPreflightState(AgentState):
+    """Agent state extended with the pre-flight guardrail results of the current turn."""
+    guardrail_preflight: NotRequired[dict[str, Any]]
+
+
+def _with_preflight_prompt(request: ModelRequest) -> ModelRequest:
+    """Copy of a model request with the turn's pre-flight results and any unavailable guardrails appended to the system prompt."""
+    section = preflight_prompt_section((request.state or {}).get("guardrail_preflight") or {})
+    if not section:
+        return request
+    system_prompt = f"{request.system_prompt}\n\n---\n\n{section}" if request.system_prompt else section
+    return request.override(system_prompt=system_prompt)
+
+
+class GuardrailPreflightMiddleware(AgentMiddleware):
+    """
+    Middleware that runs the PII and safety guardrails concurrently before the agent's first
+    model call of each turn and exposes the results to the model through the system prompt.
+
+    Supports both sync and async execution contexts; guardrail failures are reported to the
+    model as unavailable rather than failing the turn.
+    """
+
+    state_schema = GuardrailPreflightState
+
+    def before_agent(self, state: GuardrailPreflightState, runtime: Any) -> dict[str, Any] | None:
+        """Synchronous version of the pre-flight step."""
+        return preflight_update(state)
+
+    async def abefore_agent(self, state: GuardrailPreflightState, runtime: Any) -> dict[str, Any] | None:
+        """Asynchronous version of the pre-flight step."""
+        return await apreflight_update(state)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse]
+    ) -> ModelResponse:
+        """Synchronous version of the prompt injection."""
+        return handler(_with_preflight_prompt(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]]
+    ) -> ModelResponse:
+        """Asynchronous version of the prompt injection."""
+        return await handler(_with_preflight_prompt(request))
+
+
+# Create a singleton instance for use as middleware
+create_guardrail_preflight_middleware = GuardrailPreflightMiddleware()
@@ -0,0 +1,318 @@
+"""
+Guardrail Stub Server - local stand-in for the Fiddler guardrail endpoints
+
+Serves `/v3/guardrails/ftl-safety`, `/v3/guardrails/ftl-response-faithfulness` and
+`/v3/guardrails/sensitive-information` with the real response schemas and deterministic scores:
+
+- safety: a high `fdl_jailbreaking` score when the input contains a known jailbreak phrase
+- PII: emails and phone numbers found by regex, as `fdl_sensitive_information_scores`
+- faithfulness: share of the response's words that appear in the context, as `fdl_faithful_score`
+
+A StubBehaviour (for all endpoints, or per endpoint) shapes how it answers:
+
+- latency: a fixed median, or a log-normal distribution given the median and p99
+- errors: a share of requests answered with an error status (503 by default, 429 for rate limiting)
+- stalls: a share of requests held for `stall_seconds`, to trigger client timeouts and hedging
+- cold starts: after `cold_after_seconds` without requests, the endpoint takes `cold_start_seconds`
+  to warm up, and every request that arrives in the meantime waits for it
+
+It counts requests, injected errors and cold starts per endpoint and the peak number of requests in
+flight, so tests and load runs can check pooling, caching, coalescing, hedging and circuit breaking
+without network access. Point the chatbot at it with the FIDDLER_URL_GUARDRAILS environment variable.
+
+Usage:
+    uv run python -m src.utils.guardrail_stub_server --port 8099 --latency-ms 50 --latency-p99-ms 400 \\
+        --error-rate 0.02 --cold-after-s 300 --cold-start-ms 4000
+    FIDDLER_URL_GUARDRAILS=http://127.0.0.1:8099 uv run chainlit run src/chatbot_chainlit_react.py
+
+    with GuardrailStubServer(behaviour=StubBehaviour(latency_seconds=0.05, error_rate=0.1)) as server:
+        client = GuardrailClient(server.url, timeout=5, token="stub")
+"""
+
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SAFETY_PATH = "/v3/guardrails/ftl-safety"
+FAITHFULNESS_PATH = "/v3/guardrails/ftl-response-faithfulness"
+PII_PATH = "/v3/guardrails/sensitive-information"
+
+JAILBREAK_PHRASES = ("ignore previous instructions", "ignore all previous", "jailbreak", "developer mode", "system prompt")
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_WORD_RE = re.compile(r"[a-z0-9]{4,}")
+
+
+def score_safety(data: dict[str, Any]) -> dict[str, Any]:
+    text = data["input"].lower()
+    return {"fdl_jailbreaking": 0.97 if any(phrase in text for phrase in JAILBREAK_PHRASES) else 0.02}
+
+
+def score_pii(data: dict[str, Any]) -> dict[str, Any]:
+    text = data["input"]
+    entities = [
+        {"label": label, "text": match.group(), "score": 0.99, "start": match.start(), "end": match.end()}
+        for label, pattern in (("email", _EMAIL_RE), ("phone_number", _PHONE_RE))
+        for match in pattern.finditer(text)
+        ]
+    return {"fdl_sensitive_information_scores": entities}
+
+
+def score_faithfulness(data: dict[str, Any]) -> dict[str, Any]:
+    response_words = set(_WORD_RE.findall(data["response"].lower()))
+    context_words = set(_WORD_RE.findall(data["context"].lower()))
+    score = len(response_words & context_words) / len(response_words) if response_words else 1.0
+    return {"fdl_faithful_score": round(score, 4)}
+
+
+SCORERS = {SAFETY_PATH: score_safety, PII_PATH: score_pii, FAITHFULNESS_PATH: score_faithfulness}
+
+# z-score of the 99th percentile of a standard normal distribution
+_Z_P99 = 2.3263
+
+
+@dataclass
+class StubBehaviour:
+    """
+    How an endpoint of the stub server answers.
+
+    Args:
+        latency_seconds: Median response latency
+        latency_p99_seconds: 99th percentile latency; latencies are log-normal when set, fixed otherwise
+        error_rate: Share of requests answered with `error_status`
+        error_status: Status code of injected errors (503, 500, 429, ...)
+        stall_rate: Share of requests held for `stall_seconds` before answering normally
+        stall_seconds: How long stalled requests are held
+        cold_after_seconds: Idle time after which the endpoint goes cold (None: always warm)
+        cold_start_seconds: Time a cold endpoint takes to warm up
+    """
+    latency_seconds: float = 0.0
+    latency_p99_seconds: float | None = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    stall_rate: float = 0.0
+    stall_seconds: float = 30.0
+    cold_after_seconds: float | None = None
+    cold_start_seconds: float = 0.0
+
+    def sample_latency(self, rng: random.Random) -> float:
+        """One response latency in seconds."""
+        if self.latency_p99_seconds is None or self.latency_seconds <= 0 or self.latency_p99_seconds <= self.latency_seconds:
+            return self.latency_seconds
+        sigma = math.log(self.latency_p99_seconds / self.latency_seconds) / _Z_P99
+        return rng.lognormvariate(math.log(self.latency_seconds), sigma)
+
+
+class GuardrailStubServer:
+    """
+    Threaded HTTP server answering the guardrail endpoints.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        latency_seconds: Fixed delay added to every response (shorthand for a behaviour with only a latency)
+        behaviour: How every endpoint answers; overrides latency_seconds
+        endpoint_behaviours: Behaviour of individual endpoint paths, overriding `behaviour`
+        seed: Seed of the random latencies, errors and stalls
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        behaviour: StubBehaviour | None = None,
+        endpoint_behaviours: dict[str, StubBehaviour] | None = None,
+        seed: int | None = None,
+        ):
+        self.behaviour = behaviour or StubBehaviour(latency_seconds=latency_seconds)
+        self.endpoint_behaviours: dict[str, StubBehaviour] = dict(endpoint_behaviours or {})
+        self.requests: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.stalls: Counter[str] = Counter()
+        self.cold_starts: Counter[str] = Counter()
+        self.aborted: Counter[str] = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rng = random.Random(seed)
+        self._last_request: dict[str, float] = {}
+        self._warm_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                status, payload = server.handle(self.path, body)
+                encoded = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(encoded)))
+                    self.end_headers()
+                    self.wfile.write(encoded)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout, cancelled call) before the response was ready
+                    server.record_aborted(self.path)
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                logger.debug(f"Stub guardrail server: {format % args}")
+
+        return Handler
+
+    def behaviour_for(self, path: str) -> StubBehaviour:
+        return self.endpoint_behaviours.get(path, self.behaviour)
+
+    def _plan(self, path: str, behaviour: StubBehaviour) -> tuple[float, bool]:
+        """Delay in seconds and whether to inject an error, for a request to `path` arriving now."""
+        now = time.monotonic()
+        delay = 0.0
+        if behaviour.cold_after_seconds is not None:
+            last = self._last_request.get(path)
+            if last is None or now - last >= behaviour.cold_after_seconds:
+                self.cold_starts[path] += 1
+                self._warm_at[path] = now + behaviour.cold_start_seconds
+            # Requests that arrive while the endpoint warms up wait for it as well
+            delay += max(0.0, self._warm_at.get(path, now) - now)
+        self._last_request[path] = now
+        delay += behaviour.sample_latency(self._rng)
+        if behaviour.stall_rate and self._rng.random() < behaviour.stall_rate:
+            self.stalls[path] += 1
+            delay += behaviour.stall_seconds
+        failed = bool(behaviour.error_rate) and self._rng.random() < behaviour.error_rate
+        if failed:
+            self.errors[path] += 1
+        return delay, failed
+
+    def handle(self, path: str, body: bytes) -> tuple[int, dict[str, Any]]:
+        """Status code and JSON payload for a POST of `body` to `path`."""
+        scorer = SCORERS.get(path)
+        if scorer is None:
+            return 404, {"detail": f"Unknown guardrail endpoint {path}"}
+        behaviour = self.behaviour_for(path)
+        with self._lock:
+            self.requests[path] += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            delay, failed = self._plan(path, behaviour)
+        try:
+            if delay:
+                time.sleep(delay)
+            if failed:
+                return behaviour.error_status, {"detail": "Injected stub error"}
+            try:
+                return 200, scorer(json.loads(body)["data"])
+            except (KeyError, TypeError, json.JSONDecodeError) as e:
+                return 422, {"detail": f"Invalid request body: {e}"}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._last_request[path] = time.monotonic()
+
+    def record_aborted(self, path: str) -> None:
+        """Count a request whose client disconnected before the response could be written."""
+        with self._lock:
+            self.aborted[path] += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Requests, injected errors and stalls, cold starts and aborted requests per endpoint, plus the peak concurrency."""
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "errors": dict(self.errors),
+                "stalls": dict(self.stalls),
+                "cold_starts": dict(self.cold_starts),
+                "aborted": dict(self.aborted),
+                "max_in_flight": self.max_in_flight,
+                }
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "GuardrailStubServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="guardrail-stub-server", daemon=True)
+        self._thread.start()
+        logger.info(f"✓ Stub guardrail server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "GuardrailStubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Fiddler guardrail endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median response latency")
+    parser.add_argument("--latency-p99-ms", type=float, default=None, help="p99 latency; makes latencies log-normal")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of requests held for --stall-ms")
+    parser.add_argument("--stall-ms", type=float, default=30_000.0)
+    parser.add_argument("--cold-after-s", type=float, default=None, help="Idle seconds after which an endpoint goes cold")
+    parser.add_argument("--cold-start-ms", type=float, default=0.0, help="Warm-up time of a cold endpoint")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    behaviour = StubBehaviour(
+        latency_seconds=args.latency_ms / 1000,
+        latency_p99_seconds=args.latency_p99_ms / 1000 if args.latency_p99_ms is not None else None,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stall_rate=args.stall_rate,
+        stall_seconds=args.stall_ms / 1000,
+        cold_after_seconds=args.cold_after_s,
+        cold_start_seconds=args.cold_start_ms / 1000,
+        )
+    logging.basicConfig(level=logging.INFO)
+    server = GuardrailStubServer(args.host, args.port, behaviour=behaviour, seed=args.seed)
+    print(f"Stub guardrail server listening on {server.url} (Ctrl+C to stop)")
+    print(f"Point the chatbot at it with FIDDLER_URL_GUARDRAILS={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Stub guardrail server stats: {json.dumps(server.stats())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+In-process latency metrics
+
+Fixed-bucket latency histograms (log-spaced, ~10% resolution from 0.1 ms to 2 min) kept in a
+process-wide registry. Percentiles (p50/p95/p99) are interpolated from the buckets, so recording
+is O(log buckets) and memory is constant regardless of traffic.
+
+`timed(name)` records a block into the histogram `name` and wraps it in an OpenTelemetry span of
+the same name, which nests under whatever span is current (e.g. the LangGraphInstrumentor tool span).
+
+Histograms and counters can carry labels (e.g. the guardrail endpoint), and modules can register
+collectors for values they already track (cache, circuit breaker, ...). `render_prometheus()`
+renders all of it in the Prometheus text exposition format, and `start_metrics_server(port)` serves
+that on `/metrics` from a background thread:
+
+    registry.histogram("guardrail.request", labels={"endpoint": endpoint}).observe(latency)
+    registry.counter("guardrail.responses", labels={"endpoint": endpoint, "status": "200"}).inc()
+"""
+
+import bisect
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, NamedTuple
+
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds: 0.1 ms * 1.1^i, up to ~2 minutes
+DEFAULT_BUCKETS: tuple[float, ...] = tuple(0.0001 * 1.1 ** i for i in range(148))
+
+_tracer = trace.get_tracer("fiddler_chatbot")
+
+Labels = dict[str, str]
+
+
+def _series(name: str, labels: Labels | None) -> str:
+    """`name{key="value",...}`, or just `name` without labels."""
+    if not labels:
+        return name
+    escaped = {key: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for key, value in labels.items()}
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in sorted(escaped.items())) + "}"
+
+
+class LatencyHistogram:
+    """
+    Thread-safe latency histogram over fixed bucket upper bounds (seconds).
+
+    Args:
+        name: Metric name
+        description: Human readable description
+        buckets: Increasing bucket upper bounds; observations above the last bound go to an overflow bucket
+        labels: Label values that tell this series apart from others of the same name
+    """
+
+    def __init__(self, name: str, description: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS, labels: Labels | None = None):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.labels: Labels = dict(labels or {})
+        self._counts = [0] * (len(buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the `q` quantile (0-1) by linear interpolation inside the containing bucket."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = q * self.count
+            cumulative = 0
+            for index, bucket_count in enumerate(self._counts):
+                if bucket_count and cumulative + bucket_count >= target:
+                    lower = self.buckets[index - 1] if index > 0 else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.max
+                    estimate = lower + (upper - lower) * (target - cumulative) / bucket_count
+                    return min(max(estimate, self.min), self.max)
+                cumulative += bucket_count
+            return self.max
+
+    def bucket_counts(self) -> list[tuple[float, int]]:
+        """Cumulative (upper bound, count) pairs, ending with (+inf, total)."""
+        with self._lock:
+            counts = list(self._counts)
+        pairs, cumulative = [], 0
+        for bound, bucket_count in zip([*self.buckets, math.inf], counts, strict=True):
+            cumulative += bucket_count
+            pairs.append((bound, cumulative))
+        return pairs
+
+    def summary(self) -> dict[str, float]:
+        """Count, mean and p50/p95/p99/max in milliseconds."""
+        return {
+            "count": self.count,
+            "mean_ms": (self.sum / self.count * 1000) if self.count else 0.0,
+            "p50_ms": self.percentile(0.50) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+            }
+
+
+class Counter:
+    """Thread-safe monotonically increasing count of one labelled series."""
+
+    def __init__(self, name: str, description: str = "", labels: Labels | None = None):
+        self.name = name
+        self.description = description
+        self.labels: Labels = dict(labels or {})
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Sample(NamedTuple):
+    """One value reported by a collector."""
+    name: str
+    kind: str  # "gauge" or "counter"
+    description: str
+    labels: Labels
+    value: float
+
+
+Collector = Callable[[], Iterable[Sample]]
+
+
+class MetricsRegistry:
+    """Named collection of (optionally labelled) latency histograms and counters, plus collectors."""
+
+    def __init__(self):
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._counters: dict[str, Counter] = {}
+        self._collectors: dict[str, Collector] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, description: str = "", labels: Labels | None = None) -> LatencyHistogram:
+        """Return the histogram `name` with `labels`, creating it on first use."""
+        key = _series(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram(name, description, labels=labels)
+            return histogram
+
+    def counter(self, name: str, description: str = "", labels: Labels | None = None) -> Counter:
+        """Return the counter `name` with `labels`, creating it on first use."""
+        key = _series(name, labels)
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = Counter(name, description, labels=labels)
+            return counter
+
+    def register_collector(self, name: str, collector: Collector) -> None:
+        """Add (or replace) a callable whose samples are read at every render_prometheus call."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def histograms(self) -> list[LatencyHistogram]:
+        with self._lock:
+            return list(self._histograms.values())
+
+    def counters(self) -> list[Counter]:
+        with self._lock:
+            return list(self._counters.values())
+
+    def collect(self) -> list[Sample]:
+        """Samples of all registered collectors; a failing collector is logged and skipped."""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        samples: list[Sample] = []
+        for name, collector in collectors:
+            try:
+                samples.extend(collector())
+            except Exception as e:
+                logger.warning(f"⚠️ Metrics collector {name} failed: {e}")
+        return samples
+
+    def snapshot(self, prefix: str = "") -> dict[str, dict[str, float]]:
+        """Summaries of all histograms whose name starts with `prefix`, keyed by series (`name{labels}`)."""
+        return {
+            _series(histogram.name, histogram.labels): histogram.summary()
+            for histogram in self.histograms() if histogram.name.startswith(prefix)
+            }
+
+    def dump(self, path: str | None = None, prefix: str = "") -> str:
+        """Serialize the snapshot as JSON, optionally writing it to `path`."""
+        payload = json.dumps(self.snapshot(prefix), indent=2, sort_keys=True)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            logger.info(f"✓ Latency metrics written to {path}")
+        return payload
+
+    def reset(self) -> None:
+        """Drop all histograms and counters (collectors stay registered)."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render_prometheus(self, bucket_step: int = 8) -> str:
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4).
+
+        Histograms are exported in seconds as `<name>_seconds`, counters as `<name>_total`; dots
+        and other characters Prometheus does not allow in names become underscores.
+
+        Args:
+            bucket_step: Export every n-th histogram bucket bound (8 gives ~2x spacing, 19 buckets)
+        """
+        families: dict[str, tuple[str, str, list[str]]] = {}
+
+        def family(name: str, kind: str, description: str) -> list[str]:
+            return families.setdefault(name, (kind, description, []))[2]
+
+        for histogram in self.histograms():
+            name = _metric_name(histogram.name) + "_seconds"
+            lines = family(name, "histogram", histogram.description or f"{histogram.name} latency")
+            pairs = histogram.bucket_counts()
+            for index, (bound, cumulative) in enumerate(pairs):
+                if math.isinf(bound) or (index + 1) % bucket_step == 0:
+                    le = "+Inf" if math.isinf(bound) else f"{bound:.6g}"
+                    lines.append(f"{_series(name + '_bucket', {**histogram.labels, 'le': le})} {cumulative}")
+            lines.append(f"{_series(name + '_sum', histogram.labels)} {histogram.sum:.6f}")
+            lines.append(f"{_series(name + '_count', histogram.labels)} {pairs[-1][1]}")
+        for counter in self.counters():
+            name = _metric_name(counter.name) + "_total"
+            family(name, "counter", counter.description or counter.name).append(f"{_series(name, counter.labels)} {counter.value:g}")
+        for sample in self.collect():
+            name = _metric_name(sample.name) + ("_total" if sample.kind == "counter" else "")
+            family(name, sample.kind, sample.description).append(f"{_series(name, sample.labels)} {sample.value:g}")
+
+        out = []
+        for name, (kind, description, lines) in sorted(families.items()):
+            out.append(f"# HELP {name} {description}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+
+@contextmanager
+def timed(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Time the block into histogram `name` and trace it as an OpenTelemetry span with `attributes`."""
+    with _tracer.start_as_current_span(name, attributes=attributes) as span:
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            registry.histogram(name).observe(time.perf_counter() - start)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    metrics: MetricsRegistry = registry
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics server: {format % args}")
+
+
+_metrics_server: ThreadingHTTPServer | None = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1", metrics: MetricsRegistry = registry) -> ThreadingHTTPServer | None:
+    """
+    Serve `metrics` on `http://host:port/metrics` from a daemon thread (idempotent per process).
+
+    Returns:
+        The server, or None when the port could not be bound (logged, the app keeps running)
+    """
+    global _metrics_server
+    if _metrics_server is not None:
+        return _metrics_server
+    handler = type("MetricsHandler", (_MetricsHandler,), {"metrics": metrics})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as e:
+        logger.warning(f"⚠️ Metrics server could not bind {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    _metrics_server = server
+    logger.info(f"✓ Prometheus metrics served on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+def stop_metrics_server() -> None:
+    global _metrics_server
+    if _metrics_server is not None:
+        _metrics_server.shutdown()
+        _metrics_server.server_close()
+        _metrics_server = None
@@ -10,6 +10,7 @@ graph LR
 
 """
 
+import asyncio
 import glob
 import os
 import sys
@@ -528,6 +529,10 @@ def populate_vector_store_safely(df: pd.DataFrame, session, embedding, table_nam
     try:
         # 1. Load the pre-chunked documents from the DataFrame
         logger.info("Loading pre-chunked documents from the DataFrame...")
+        # Extra columns (source_type, url, header_path) become metadata_s entries, a map<text, text>:
+        # coerce them to strings so missing values are stored as "" rather than "nan"
+        metadata_columns = [column for column in df.columns if column != "text"]
+        df = df.assign(**{column: df[column].fillna("").astype(str) for column in metadata_columns})
         loader = DataFrameLoader(df, page_content_column="text")
         documents = loader.load()
         logger.info(f"Loaded {len(documents)} document chunks.")
@@ -1000,6 +1005,77 @@ def create_chatbot_history_table(session) -> None:
         logger.error(f"❌ Failed to create chatbot history table: {e}")
         raise
 
+# ==================== CORPUS VERSION TRACKING ====================
+
+def record_corpus_version(session, table_name: str, corpus_version: str) -> None:
+    """
+    Record which corpus (CSV feed) was last loaded into `table_name`.
+    Readers (e.g. the RAG result cache) use this marker to invalidate derived state.
+    """
+    try:
+        session.execute(f"""--sql
+            CREATE TABLE IF NOT EXISTS {config["keyspace"]}.{config["corpus_version_table"]}
+            (
+                table_name text PRIMARY KEY,
+                corpus_version text,
+                updated_at timestamp
+            )
+            """)
+        session.execute(
+            f"INSERT INTO {config['keyspace']}.{config['corpus_version_table']} (table_name, corpus_version, updated_at) VALUES (%s, %s, %s)",
+            (table_name, corpus_version, datetime.now()),
+            )
+        logger.info(f"✅ Recorded corpus version '{corpus_version}' for table '{table_name}'")
+    except Exception as e:
+        logger.error(f"❌ Failed to record corpus version: {e}")
+        raise
+
+async def aexecute(session, query, parameters=None):
+    """
+    Await a query issued with the driver's non-blocking `execute_async`.
+    The driver completes ResponseFutures on its own IO thread; the result is handed back to the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _on_result(rows):
+        if not future.done():
+            future.set_result(rows)
+
+    def _on_error(exc):
+        if not future.done():
+            future.set_exception(exc)
+
+    response_future = session.execute_async(query, parameters)
+    response_future.add_callbacks(
+        callback=lambda rows: loop.call_soon_threadsafe(_on_result, rows),
+        errback=lambda exc: loop.call_soon_threadsafe(_on_error, exc),
+        )
+    return await future
+
+def fetch_corpus_version(session, table_name: str) -> str | None:
+    """
+    Return the corpus version last recorded for `table_name`, or None if none was recorded.
+    Driver errors propagate, so a failed read is never mistaken for a version change.
+    """
+    rows = session.execute(
+        f"SELECT corpus_version FROM {config['keyspace']}.{config['corpus_version_table']} WHERE table_name = %s",
+        (table_name,),
+        )
+    row = rows.one()
+    return row.corpus_version if row else None
+
+async def afetch_corpus_version(session, table_name: str) -> str | None:
+    """
+    Non-blocking variant of fetch_corpus_version for use inside the chatbot event loop.
+    """
+    rows = await aexecute(
+        session,
+        f"SELECT corpus_version FROM {config['keyspace']}.{config['corpus_version_table']} WHERE table_name = %s",
+        (table_name,),
+        )
+    return rows[0].corpus_version if rows else None
+
 # ==================== OPENAI EMBEDDING UTILITIES ====================
 
 def test_openai_embeddings(text: str = "What is the latest release version of Fiddler?") -> None:
@@ -1152,6 +1228,8 @@ def load_vector_data(csv_path:str, replace_existing: bool = False) -> LoadResult
             load_result = populate_vector_store_safely(df, session, myEmbedding, config["TABLE_NAME"], replace_existing=replace_existing)
 
             if load_result.result == OperationResult.SUCCESS:
+                record_corpus_version(session, config["TABLE_NAME"], os.path.splitext(os.path.basename(csv_path))[0])
+
                 logger.info("\n3. Testing vector store...")
                 # Create a simple vector store instance for testing
                 vector_store = Cassandra(
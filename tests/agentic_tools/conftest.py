@@ -0,0 +1,62 @@
+"""
+Shared fixtures for the agentic tools tests.
+"""
+from collections.abc import Callable
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import GuardrailClient
+from src.agentic_tools.guardrail_coalescer import GuardrailCoalescer
+from src.agentic_tools.guardrail_keepwarm import GuardrailKeepWarm
+from src.agentic_tools.guardrail_resilience import EndpointGuards
+
+
+@pytest.fixture(autouse=True)
+def isolated_guardrail_state(monkeypatch):
+    """Fresh endpoint guards, coalescer and keep-warm tracker and no result cache, so guardrail tests do not see each other's calls."""
+    monkeypatch.setattr(fiddler_gaurdrails, "endpoint_guards", EndpointGuards(max_timeout=5))
+    monkeypatch.setattr(fiddler_gaurdrails, "guardrail_coalescer", GuardrailCoalescer())
+    monkeypatch.setattr(fiddler_gaurdrails, "guardrail_result_cache", None)
+    monkeypatch.setattr(fiddler_gaurdrails, "guardrail_keepwarm", GuardrailKeepWarm())
+
+
+class FakeClock:
+    """Time source for the `clock=` parameters; tests move it by assigning `now`."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+@pytest.fixture
+def mock_guardrail_client(monkeypatch) -> Callable[..., GuardrailClient]:
+    """
+    Install a GuardrailClient over httpx.MockTransport as fiddler_gaurdrails.guardrail_client.
+
+    Call it with the request handler, and optionally a separate (sync or async) handler for the async client.
+    """
+
+    def install(handler: Handler, async_handler: Callable | None = None) -> GuardrailClient:
+        client = GuardrailClient(
+            "https://guardrails.test",
+            timeout=5,
+            token="t",
+            transport=httpx.MockTransport(handler),
+            async_transport=httpx.MockTransport(async_handler or handler),
+            )
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_client", client)
+        return client
+
+    return install
@@ -0,0 +1,67 @@
+"""
+Unit tests for the BM25 lexical index and reciprocal-rank fusion.
+"""
+from langchain_core.documents import Document
+
+from src.agentic_tools.bm25_index import BM25Index, tokenize
+from src.agentic_tools.rag_postprocessing import reciprocal_rank_fusion
+
+CORPUS = [
+    "Use fdl.Model.from_name to fetch an onboarded model.",
+    "Alerts notify you when drift exceeds a threshold.",
+    "Drift monitoring compares production data against a baseline.",
+    ]
+
+
+class TestTokenize:
+    """Test identifier-aware tokenization."""
+
+    def test_dotted_identifiers_keep_full_and_parts(self):
+        """Test that `fdl.Model` is indexed whole and by component."""
+        assert tokenize("fdl.Model") == ["fdl.model", "fdl", "model"]
+
+
+class TestBM25Index:
+    """Test BM25 scoring, filtering and persistence."""
+
+    def test_exact_identifier_ranks_first(self):
+        """Test that an API name query finds the chunk mentioning it."""
+        index = BM25Index.build(CORPUS)
+        results = index.search("fdl.Model", k=2)
+        assert results[0][0].page_content == CORPUS[0]
+
+    def test_no_match_returns_empty(self):
+        """Test that queries without any known term return nothing."""
+        assert BM25Index.build(CORPUS).search("kubernetes", k=3) == []
+
+    def test_metadata_filter(self):
+        """Test that filtered-out documents are never returned."""
+        index = BM25Index.build(CORPUS, metadatas=[{"source_type": "docs"}, {"source_type": "blogs"}, {"source_type": "docs"}])
+        results = index.search("drift", k=3, filter={"source_type": "docs"})
+        assert [doc.page_content for doc, _ in results] == [CORPUS[2]]
+
+    def test_full_match_score_is_the_sum_of_idf(self):
+        """Test that a document matching the query terms once scores close to full_match_score, and unknown terms count for nothing."""
+        index = BM25Index.build(CORPUS)
+        assert index.full_match_score("fdl.Model.from_name kubernetes") == index.full_match_score("fdl.Model.from_name")
+        assert index.scores("fdl.Model.from_name")[0] / index.full_match_score("fdl.Model.from_name") > 0.8
+        assert index.full_match_score("kubernetes") == 0.0
+
+    def test_save_load_round_trip(self, tmp_path):
+        """Test that a saved index loads back with identical scores."""
+        index = BM25Index.build(CORPUS, corpus_version="vector_index_feed_1")
+        index.save(str(tmp_path))
+
+        loaded = BM25Index.load(str(tmp_path))
+        assert loaded.corpus_version == "vector_index_feed_1"
+        assert (loaded.scores("drift baseline") == index.scores("drift baseline")).all()
+
+
+class TestReciprocalRankFusion:
+    """Test rank fusion across retrievers."""
+
+    def test_documents_in_both_lists_rank_first(self):
+        """Test that agreement between rankings wins and duplicates are merged."""
+        a, b, c = (Document(page_content=text) for text in ("a", "b", "c"))
+        fused = reciprocal_rank_fusion([[a, b], [c, b]], limit=3)
+        assert [doc.page_content for doc in fused] == ["b", "a", "c"]
@@ -0,0 +1,142 @@
+"""
+Unit tests for the content-hash guardrail result cache.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_cache import GuardrailResultCache, guardrail_cache_key
+from src.agentic_tools.guardrail_client import FAITHFULNESS_ENDPOINT, PII_ENDPOINT, SAFETY_ENDPOINT
+
+
+
+class TestGuardrailCacheKey:
+    """Test the request content hash"""
+
+    def test_whitespace_is_normalized_but_case_is_not(self):
+        """Whitespace differences share a key; case changes the key"""
+        assert guardrail_cache_key(SAFETY_ENDPOINT, {"input": "a  b\n"}) == guardrail_cache_key(SAFETY_ENDPOINT, {"input": "a b"})
+        assert guardrail_cache_key(SAFETY_ENDPOINT, {"input": "A b"}) != guardrail_cache_key(SAFETY_ENDPOINT, {"input": "a b"})
+
+    def test_endpoint_and_entity_categories_are_part_of_the_key(self):
+        """The same text gets different keys per endpoint and per PII entity configuration"""
+        text = {"input": "call me at 555-0100"}
+        assert guardrail_cache_key(SAFETY_ENDPOINT, text) != guardrail_cache_key(PII_ENDPOINT, text)
+        assert guardrail_cache_key(PII_ENDPOINT, text) != guardrail_cache_key(PII_ENDPOINT, {**text, "entity_categories": "PHI"})
+
+    def test_faithfulness_response_and_context_are_hashed_separately(self):
+        """Moving text between response and context changes the key"""
+        first = guardrail_cache_key(FAITHFULNESS_ENDPOINT, {"response": "ab", "context": "c"})
+        second = guardrail_cache_key(FAITHFULNESS_ENDPOINT, {"response": "a", "context": "bc"})
+        assert first != second
+
+
+class TestGuardrailResultCache:
+    """Test the memory and disk tiers"""
+
+    def test_entries_expire_after_ttl(self, clock):
+        """A result is served until the TTL elapses"""
+        cache = GuardrailResultCache(max_size=4, ttl_seconds=60, clock=clock)
+        cache.set("k", 0.1)
+        clock.now += 59
+        assert cache.get("k") == 0.1
+        clock.now += 2
+        assert cache.get("k") is None
+
+    def test_falsy_results_are_cached(self):
+        """A zero score and an empty entity list are hits, not misses"""
+        cache = GuardrailResultCache(max_size=4)
+        cache.set("score", 0.0)
+        cache.set("entities", [])
+        assert cache.get("score") == 0.0
+        assert cache.get("entities") == []
+
+    def test_disk_entries_survive_a_restart(self, tmp_path):
+        """A new cache over the same SQLite file serves results written by the previous one"""
+        path = tmp_path / "guardrails.sqlite3"
+        first = GuardrailResultCache(max_size=4, ttl_seconds=60, disk_path=path)
+        first.set("k", [{"label": "email", "text": "a@b.co", "score": 0.9}])
+        first.close()
+
+        second = GuardrailResultCache(max_size=4, ttl_seconds=60, disk_path=path)
+        assert second.get("k") == [{"label": "email", "text": "a@b.co", "score": 0.9}]
+        assert second.stats()["disk_hits"] == 1
+        second.close()
+
+    def test_expired_disk_entries_are_not_served(self, clock, tmp_path):
+        """The disk tier applies the same TTL, measured in wall-clock time"""
+        path = tmp_path / "guardrails.sqlite3"
+        GuardrailResultCache(max_size=4, ttl_seconds=60, disk_path=path, clock=clock).set("k", 0.3)
+        clock.now += 120
+        assert GuardrailResultCache(max_size=4, ttl_seconds=60, disk_path=path, clock=clock).get("k") is None
+
+    def test_disk_rows_are_bounded(self, clock, tmp_path):
+        """Opening the file prunes it down to the newest disk_max_entries rows"""
+        path = tmp_path / "guardrails.sqlite3"
+        cache = GuardrailResultCache(max_size=100, disk_path=path, disk_max_entries=10, clock=clock)
+        for i in range(30):
+            clock.now += 1
+            cache.set(f"k{i}", i)
+        cache.close()
+
+        reopened = GuardrailResultCache(max_size=100, disk_path=path, disk_max_entries=10, clock=clock)
+        assert len(reopened._disk) == 10
+        assert reopened.get("k29") == 29
+        assert reopened.get("k0") is None
+
+
+class TestGuardrailFunctionsUseCache:
+    """Test that repeated guardrail inputs skip the remote call"""
+
+    @pytest.fixture
+    def calls(self, monkeypatch, mock_guardrail_client) -> list[httpx.Request]:
+        sent: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request)
+            if request.url.path == SAFETY_ENDPOINT:
+                return httpx.Response(200, json={"fdl_jailbreaking": 0.02})
+            if request.url.path == FAITHFULNESS_ENDPOINT:
+                return httpx.Response(200, json={"fdl_faithful_score": 0.8})
+            if b"a@b.co" in request.content and b"retry" not in request.content:
+                return httpx.Response(200, json={"fdl_sensitive_information_scores": [{"label": "email", "text": "a@b.co", "score": 0.9}]})
+            return httpx.Response(503, text="unavailable")
+
+        mock_guardrail_client(handler)
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_result_cache", GuardrailResultCache(max_size=16, ttl_seconds=60))
+        return sent
+
+    def test_repeated_safety_input_is_scored_once(self, calls):
+        """Sync and async calls with the same (whitespace-normalized) input share one remote call"""
+        assert fiddler_gaurdrails.get_safety_guardrail_results("what is drift?")[0] == 0.02
+        assert asyncio.run(fiddler_gaurdrails.aget_safety_guardrail_results("what is  drift?"))[0] == 0.02
+        assert len(calls) == 1
+
+    def test_faithfulness_is_cached_per_response_and_context(self, calls):
+        """A different context for the same response is scored again"""
+        fiddler_gaurdrails.get_faithfulness_guardrail_results("Drift is change.", ["doc one"])
+        fiddler_gaurdrails.get_faithfulness_guardrail_results("Drift is change.", ["doc one"])
+        fiddler_gaurdrails.get_faithfulness_guardrail_results("Drift is change.", ["doc two"])
+        assert len(calls) == 2
+
+    def test_errors_are_not_cached(self, calls):
+        """A failed call raises each time instead of caching the failure"""
+        for _ in range(2):
+            with pytest.raises(ValueError, match="503"):
+                fiddler_gaurdrails.get_pii_guardrail_results("retry a@b.co")
+        assert len(calls) == 2
+
+    def test_pii_results_stay_out_of_the_disk_tier(self, calls, monkeypatch, tmp_path):
+        """PII results (which contain the entity text) are cached in memory but never written to SQLite"""
+        cache = GuardrailResultCache(max_size=16, ttl_seconds=60, disk_path=tmp_path / "guardrails.sqlite3")
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_result_cache", cache)
+
+        assert fiddler_gaurdrails.get_pii_guardrail_results("my a@b.co")[0][0]["text"] == "a@b.co"
+        assert fiddler_gaurdrails.get_pii_guardrail_results("my a@b.co")[0][0]["text"] == "a@b.co"
+        fiddler_gaurdrails.get_safety_guardrail_results("what is drift?")
+        assert len(calls) == 2
+        assert len(cache._disk) == 1
+        assert all(b"a@b.co" not in path.read_bytes() for path in tmp_path.iterdir())
+        cache.close()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the pooled guardrail HTTP client.
+"""
+import asyncio
+import json
+
+import httpx
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import SAFETY_ENDPOINT, GuardrailClient, encode_payload
+
+
+def _recording_transport(requests: list[httpx.Request], body: dict) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json=body)
+    return httpx.MockTransport(handler)
+
+
+class TestEncodePayload:
+    """Test the shared request serializer"""
+
+    def test_compact_utf8_body(self):
+        """Bodies are wrapped in `data`, without whitespace, and keep non-ASCII text"""
+        assert encode_payload({"input": "héllo"}) == '{"data":{"input":"héllo"}}'.encode("utf-8")
+
+
+class TestGuardrailClient:
+    """Test the sync and async pools"""
+
+    def test_post_sends_prebuilt_headers_and_reuses_client(self):
+        """Each call uses the same pooled client with the bearer token and JSON content type"""
+        sent: list[httpx.Request] = []
+        client = GuardrailClient("https://guardrails.test/", timeout=5, token="secret", transport=_recording_transport(sent, {"ok": True}))
+
+        first_pool = client.client
+        client.post(SAFETY_ENDPOINT, {"input": "a"})
+        client.post(SAFETY_ENDPOINT, {"input": "b"})
+
+        assert client.client is first_pool
+        assert [str(request.url) for request in sent] == ["https://guardrails.test/v3/guardrails/ftl-safety"] * 2
+        assert sent[0].headers["authorization"] == "Bearer secret"
+        assert sent[0].headers["content-type"] == "application/json"
+        assert json.loads(sent[1].content) == {"data": {"input": "b"}}
+        client.close()
+
+    def test_token_is_read_from_environment_on_first_use(self, monkeypatch):
+        """A token loaded into the environment after construction is still used"""
+        client = GuardrailClient("https://guardrails.test", timeout=5)
+        monkeypatch.setenv("FIDDLER_API_KEY_GUARDRAILS", "late-token")
+        assert client.headers["Authorization"] == "Bearer late-token"
+
+    def test_per_call_timeout_keeps_connect_and_pool_bounds(self):
+        """A per-call timeout replaces the read/write timeout only; connect and pool keep the client's limits"""
+        sent: list[httpx.Request] = []
+        client = GuardrailClient(
+            "https://guardrails.test",
+            timeout=5,
+            token="t",
+            connect_timeout=2,
+            transport=_recording_transport(sent, {"ok": True}),
+            async_transport=_recording_transport(sent, {"ok": True}),
+            )
+        client.post(SAFETY_ENDPOINT, {"input": "a"}, timeout=0.5)
+        asyncio.run(client.apost(SAFETY_ENDPOINT, {"input": "b"}, timeout=0.5))
+        client.post(SAFETY_ENDPOINT, {"input": "c"})
+
+        assert [request.extensions["timeout"] for request in sent] == [
+            {"connect": 2, "read": 0.5, "write": 0.5, "pool": 2},
+            {"connect": 2, "read": 0.5, "write": 0.5, "pool": 2},
+            {"connect": 2, "read": 5, "write": 5, "pool": 2},
+            ]
+        client.close()
+
+    def test_async_client_is_per_event_loop(self):
+        """Concurrent async calls share the loop's pool; a new loop gets its own pool"""
+        sent: list[httpx.Request] = []
+        client = GuardrailClient("https://guardrails.test", timeout=5, token="t", async_transport=_recording_transport(sent, {"ok": True}))
+
+        async def run():
+            await asyncio.gather(*(client.apost(SAFETY_ENDPOINT, {"input": str(i)}) for i in range(3)))
+            pool = client.async_client()
+            await client.aclose()
+            return pool
+
+        first, second = asyncio.run(run()), asyncio.run(run())
+        assert len(sent) == 6
+        assert first is not second
+
+
+class TestGuardrailFunctionsUseClient:
+    """Test that the guardrail functions go through the shared client"""
+
+    def test_safety_results_parsed_from_pooled_response(self, monkeypatch):
+        """get_safety_guardrail_results posts to the safety endpoint and returns the jailbreak score"""
+        sent: list[httpx.Request] = []
+        client = GuardrailClient("https://guardrails.test", timeout=5, token="t", transport=_recording_transport(sent, {"fdl_jailbreaking": 0.12}))
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_client", client)
+
+        score, latency = fiddler_gaurdrails.get_safety_guardrail_results("how do I monitor drift?")
+
+        assert score == 0.12
+        assert latency >= 0
+        assert json.loads(sent[0].content) == {"data": {"input": "how do I monitor drift?"}}
@@ -0,0 +1,130 @@
+"""
+Unit tests for the async guardrail request coalescer, against the local stub guardrail server.
+"""
+import asyncio
+
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import SAFETY_ENDPOINT, GuardrailClient
+from src.agentic_tools.guardrail_coalescer import GuardrailCoalescer
+from src.utils.guardrail_stub_server import GuardrailStubServer
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Stub guardrail server with 50 ms latency, used by the guardrail functions."""
+    with GuardrailStubServer(latency_seconds=0.05) as server:
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_client", GuardrailClient(server.url, timeout=5, token="stub"))
+        yield server
+
+
+async def _gather_safety(queries: list[str]) -> list[float]:
+    results = await asyncio.gather(*(fiddler_gaurdrails.aget_safety_guardrail_results(query) for query in queries))
+    return [score for score, _ in results]
+
+
+class TestDeduplication:
+    """Test sharing of identical in-flight requests"""
+
+    def test_identical_concurrent_payloads_share_one_request(self, stub, monkeypatch):
+        """Twenty concurrent checks of four distinct inputs reach the endpoint four times"""
+        coalescer = GuardrailCoalescer()
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_coalescer", coalescer)
+        queries = [f"question {i % 4}" for i in range(20)]
+
+        scores = asyncio.run(_gather_safety(queries))
+
+        assert scores == [0.02] * 20
+        assert stub.requests[SAFETY_ENDPOINT] == 4
+        assert coalescer.stats()["deduplicated"] == 16
+
+    def test_errors_are_shared_but_not_kept(self):
+        """Waiters of a failed request all see its error; a later call sends again"""
+        coalescer = GuardrailCoalescer()
+        calls = []
+
+        async def fetch(data):
+            calls.append(data)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            outcomes = await asyncio.gather(*(coalescer.submit(SAFETY_ENDPOINT, {"input": "x"}, fetch) for _ in range(3)), return_exceptions=True)
+            later = await asyncio.gather(coalescer.submit(SAFETY_ENDPOINT, {"input": "x"}, fetch), return_exceptions=True)
+            return outcomes + later
+
+        outcomes = asyncio.run(run())
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        assert len(calls) == 2
+
+    def test_cancelled_caller_does_not_cancel_shared_request(self):
+        """Other waiters still get the result when one of them is cancelled"""
+        coalescer = GuardrailCoalescer()
+
+        async def fetch(data):
+            await asyncio.sleep(0.05)
+            return 0.3
+
+        async def run():
+            first = asyncio.ensure_future(coalescer.submit(SAFETY_ENDPOINT, {"input": "x"}, fetch))
+            second = asyncio.ensure_future(coalescer.submit(SAFETY_ENDPOINT, {"input": "x"}, fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == 0.3
+
+
+class TestBoundedFanOut:
+    """Test the per-loop concurrency bound"""
+
+    def test_in_flight_requests_are_bounded(self, stub, monkeypatch):
+        """Distinct requests beyond max_concurrency wait for a free slot"""
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_coalescer", GuardrailCoalescer(max_concurrency=3))
+
+        scores = asyncio.run(_gather_safety([f"question {i}" for i in range(12)]))
+
+        assert len(scores) == 12
+        assert stub.requests[SAFETY_ENDPOINT] == 12
+        assert stub.max_in_flight <= 3
+
+
+class TestMicroBatching:
+    """Test batching for endpoints with a batch sender"""
+
+    def test_calls_within_the_window_form_one_batch(self):
+        """Concurrent calls are sent together and each caller gets its own result"""
+        batches = []
+
+        async def send_batch(items):
+            batches.append(items)
+            return [len(item["input"]) for item in items]
+
+        coalescer = GuardrailCoalescer(window_seconds=0.01, batch_senders={SAFETY_ENDPOINT: send_batch})
+
+        async def run():
+            return await asyncio.gather(*(coalescer.submit(SAFETY_ENDPOINT, {"input": "x" * i}, None) for i in range(1, 6)))
+
+        assert asyncio.run(run()) == [1, 2, 3, 4, 5]
+        assert len(batches) == 1
+        assert coalescer.stats()["batched_items"] == 5
+
+    def test_full_batch_is_flushed_early(self):
+        """Reaching max_batch_size sends the batch without waiting for the window"""
+        batches = []
+
+        async def send_batch(items):
+            batches.append(len(items))
+            return [0.0] * len(items)
+
+        coalescer = GuardrailCoalescer(window_seconds=10, max_batch_size=2, batch_senders={SAFETY_ENDPOINT: send_batch})
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(coalescer.submit(SAFETY_ENDPOINT, {"input": str(i)}, None) for i in range(4))),
+                timeout=1,
+                )
+
+        asyncio.run(run())
+        assert batches == [2, 2]
@@ -0,0 +1,162 @@
+"""
+Unit tests for the guardrail keep-warm tracker and scheduler.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import FAITHFULNESS_ENDPOINT, PII_ENDPOINT, SAFETY_ENDPOINT
+from src.agentic_tools.guardrail_keepwarm import COLD, UNAVAILABLE, UNKNOWN, WARM, GuardrailKeepWarm
+from src.agentic_tools.guardrail_resilience import GuardrailUnavailableError
+
+
+
+def _warm(keepwarm: GuardrailKeepWarm, clock, endpoint: str = SAFETY_ENDPOINT, latency: float = 0.1, calls: int = 3) -> None:
+    for _ in range(calls):
+        clock.now += 1
+        keepwarm.record_call(endpoint, latency, ok=True)
+
+
+class TestTracking:
+    """Test idle tracking, cold-start detection and health"""
+
+    def test_health_follows_idle_time(self, clock):
+        """Endpoints are unknown until used, warm after a call and cold past the cold-after estimate"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=600, clock=clock)
+        assert keepwarm.health()[SAFETY_ENDPOINT]["status"] == UNKNOWN
+        _warm(keepwarm, clock)
+        assert keepwarm.health()[SAFETY_ENDPOINT]["status"] == WARM
+        clock.now += 600
+        assert keepwarm.health()[SAFETY_ENDPOINT]["status"] == COLD
+
+    def test_cold_start_lowers_the_cold_after_estimate(self, clock):
+        """A slow call after an idle gap is a cold start, and the gap becomes the new estimate"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=1800, min_cold_after=60, clock=clock)
+        _warm(keepwarm, clock)
+        clock.now += 300
+        keepwarm.record_call(SAFETY_ENDPOINT, 4.0, ok=True)
+        health = keepwarm.health()[SAFETY_ENDPOINT]
+        assert health["cold_starts"] == 1
+        assert health["last_cold_start_ms"] == 4000
+        assert health["cold_after_seconds"] == pytest.approx(296)
+        assert health["warm_median_ms"] == pytest.approx(100)
+
+    def test_load_spike_without_idle_gap_is_not_a_cold_start(self, clock):
+        """A slow call shortly after other calls leaves the estimate alone"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=1800, min_cold_after=60, clock=clock)
+        _warm(keepwarm, clock, calls=5)
+        clock.now += 1
+        keepwarm.record_call(SAFETY_ENDPOINT, 2.0, ok=True)
+        health = keepwarm.health()[SAFETY_ENDPOINT]
+        assert health["cold_starts"] == 0
+        assert health["cold_after_seconds"] == 1800
+
+    def test_warm_call_after_a_longer_gap_raises_the_estimate(self, clock):
+        """The estimate grows back when the endpoint stays warm longer, up to the initial value"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=1800, min_cold_after=60, clock=clock)
+        _warm(keepwarm, clock)
+        clock.now += 300
+        keepwarm.record_call(SAFETY_ENDPOINT, 4.0, ok=True)
+        clock.now += 900
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.1, ok=True)
+        assert keepwarm.health()[SAFETY_ENDPOINT]["cold_after_seconds"] == pytest.approx(899.9)
+        clock.now += 5000
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.1, ok=True)
+        assert keepwarm.health()[SAFETY_ENDPOINT]["cold_after_seconds"] == 1800
+
+    def test_slow_call_needs_a_margin_over_the_warm_median(self, clock):
+        """A call only slightly slower than usual is not a cold start"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=1800, min_cold_extra=0.5, clock=clock)
+        _warm(keepwarm, clock, latency=0.05)
+        clock.now += 300
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.3, ok=True)
+        assert keepwarm.health()[SAFETY_ENDPOINT]["cold_starts"] == 0
+
+    def test_failed_call_marks_unavailable_until_a_success(self, clock):
+        """A failed request makes the endpoint unavailable and schedules a recheck"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], retry_seconds=30, clock=clock)
+        _warm(keepwarm, clock)
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.1, ok=False)
+        assert keepwarm.unavailable()[SAFETY_ENDPOINT]["retry_in_seconds"] == 30
+        clock.now += 1
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.1, ok=True)
+        assert keepwarm.unavailable() == {}
+
+
+class TestScheduling:
+    """Test when probes are sent"""
+
+    def test_probes_only_when_about_to_go_cold(self, clock):
+        """Unused endpoints are probed at once; used ones at the probe margin of the cold-after estimate"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT, PII_ENDPOINT], cold_after=1000, probe_margin=0.8, clock=clock)
+        assert keepwarm.due_endpoints() == [SAFETY_ENDPOINT, PII_ENDPOINT]
+        keepwarm.record_call(SAFETY_ENDPOINT, 0.1, ok=True)
+        keepwarm.record_call(PII_ENDPOINT, 0.1, ok=True)
+        assert keepwarm.due_endpoints() == []
+        assert keepwarm.next_probe_in() == 800
+        clock.now += 500
+        keepwarm.record_call(PII_ENDPOINT, 0.1, ok=True)  # user traffic pushes the PII probe back
+        clock.now += 300
+        assert keepwarm.due_endpoints() == [SAFETY_ENDPOINT]
+
+    def test_probe_due_records_outcomes(self, clock):
+        """Failed probes are retried after the circuit's retry_after, or after retry_seconds"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT, PII_ENDPOINT, FAITHFULNESS_ENDPOINT], retry_seconds=30, clock=clock)
+
+        async def probe(endpoint):
+            if endpoint == SAFETY_ENDPOINT:
+                raise GuardrailUnavailableError(endpoint, "circuit open after repeated failures", retry_after=12)
+            if endpoint == PII_ENDPOINT:
+                raise RuntimeError("boom")
+            keepwarm.record_call(endpoint, 0.1, ok=True)
+
+        assert asyncio.run(keepwarm.probe_due(probe)) == [SAFETY_ENDPOINT, PII_ENDPOINT, FAITHFULNESS_ENDPOINT]
+        health = keepwarm.health()
+        assert health[SAFETY_ENDPOINT]["retry_in_seconds"] == 12
+        assert health[PII_ENDPOINT]["retry_in_seconds"] == 30
+        assert health[PII_ENDPOINT]["probe_failures"] == 1
+        assert health[FAITHFULNESS_ENDPOINT]["status"] == WARM
+        assert keepwarm.due_endpoints() == []
+
+    def test_scheduler_task_probes_and_stops(self):
+        """The scheduler probes due endpoints, then sleeps until the next deadline"""
+        keepwarm = GuardrailKeepWarm(endpoints=[SAFETY_ENDPOINT], cold_after=3600)
+        probed = []
+
+        async def probe(endpoint):
+            probed.append(endpoint)
+            keepwarm.record_call(endpoint, 0.01, ok=True)
+
+        async def scenario():
+            task = keepwarm.start(probe)
+            assert keepwarm.start(probe) is task
+            await asyncio.sleep(0.05)
+            await keepwarm.stop()
+
+        asyncio.run(scenario())
+        assert probed == [SAFETY_ENDPOINT]
+
+
+class TestIntegration:
+    """Test the guardrail request path reporting to the tracker"""
+
+    @pytest.fixture
+    def status(self, mock_guardrail_client) -> list[int]:
+        statuses = [200]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(statuses[0], json={"fdl_jailbreaking": 0.01})
+
+        mock_guardrail_client(handler)
+        return statuses
+
+    def test_guardrail_calls_report_to_the_tracker(self, status):
+        """Sync calls and async probes both count as activity; 5xx responses mark the endpoint unavailable"""
+        fiddler_gaurdrails.get_safety_guardrail_results("hello")
+        assert fiddler_gaurdrails.guardrail_keepwarm.health()[SAFETY_ENDPOINT]["status"] == WARM
+        status[0] = 503
+        with pytest.raises(GuardrailUnavailableError):
+            asyncio.run(fiddler_gaurdrails.aprobe_guardrail(SAFETY_ENDPOINT))
+        assert fiddler_gaurdrails.unavailable_guardrail_tools().keys() == {"tool_fiddler_guardrail_safety"}
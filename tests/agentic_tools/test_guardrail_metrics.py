@@ -0,0 +1,73 @@
+"""
+Unit tests for the guardrail latency, status, windowing and cache metrics.
+"""
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_cache import GuardrailResultCache
+from src.agentic_tools.guardrail_client import SAFETY_ENDPOINT
+from src.agentic_tools.guardrail_resilience import GuardrailUnavailableError
+from src.config import CONFIG_CHATBOT_NEW
+from src.utils.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def metrics(monkeypatch) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.register_collector("guardrails", fiddler_gaurdrails._guardrail_state_samples)
+    monkeypatch.setattr(fiddler_gaurdrails, "metrics_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def statuses(mock_guardrail_client) -> list[int]:
+    """Status codes the mock endpoint answers with, in order (the last one repeats)."""
+    queue = [200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = queue.pop(0) if len(queue) > 1 else queue[0]
+        return httpx.Response(status, json={"fdl_jailbreaking": 0.01})
+
+    mock_guardrail_client(handler)
+    return queue
+
+
+class TestGuardrailMetrics:
+    """Test what the guardrail calls record"""
+
+    def test_latency_and_status_by_endpoint(self, metrics, statuses):
+        """Requests are recorded per endpoint with their status code, checks per guardrail"""
+        fiddler_gaurdrails.get_safety_guardrail_results("hello")
+        statuses[:] = [503]
+        with pytest.raises(GuardrailUnavailableError):
+            fiddler_gaurdrails.get_safety_guardrail_results("hello again")
+
+        text = metrics.render_prometheus()
+        assert f'guardrail_request_seconds_count{{endpoint="{SAFETY_ENDPOINT}"}} 2' in text
+        assert f'guardrail_responses_total{{endpoint="{SAFETY_ENDPOINT}",status="200"}} 1' in text
+        assert f'guardrail_responses_total{{endpoint="{SAFETY_ENDPOINT}",status="503"}} 1' in text
+        assert 'guardrail_latency_seconds_count{guardrail="safety"} 1' in text
+        assert f'guardrail_endpoint_up{{endpoint="{SAFETY_ENDPOINT}"}} 0' in text
+        assert fiddler_gaurdrails.get_guardrail_latency_stats()['guardrail.latency{guardrail="safety"}']["count"] == 1
+
+    def test_cache_hits_and_misses(self, metrics, statuses, monkeypatch):
+        """Result cache lookups are counted per endpoint"""
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_result_cache", GuardrailResultCache(max_size=16, ttl_seconds=60))
+        fiddler_gaurdrails.get_safety_guardrail_results("hello")
+        fiddler_gaurdrails.get_safety_guardrail_results("hello")
+        text = metrics.render_prometheus()
+        assert f'guardrail_cache_lookups_total{{endpoint="{SAFETY_ENDPOINT}",result="hit"}} 1' in text
+        assert f'guardrail_cache_lookups_total{{endpoint="{SAFETY_ENDPOINT}",result="miss"}} 1' in text
+        assert "guardrail_cache_entries 1" in text
+
+    def test_windowing_and_truncation(self, metrics, statuses, monkeypatch):
+        """Split and truncated inputs are counted by input kind"""
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "GUARDRAIL_TOKEN_ENCODING", "test-estimate")
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "GUARDRAIL_SAFETY_MAX_TOKENS", 20)
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "GUARDRAIL_WINDOW_OVERLAP_TOKENS", 0)
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "GUARDRAIL_MAX_WINDOWS", 2)
+        fiddler_gaurdrails.get_safety_guardrail_results("word " * 200)
+        text = metrics.render_prometheus()
+        assert 'guardrail_windowed_inputs_total{input="query"} 1' in text
+        assert 'guardrail_truncated_inputs_total{input="query"} 1' in text
@@ -0,0 +1,91 @@
+"""
+Unit tests for the async guardrail functions, tools and the concurrent pre-flight checks.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import GuardrailClient
+
+RESPONSES = {
+    "/v3/guardrails/ftl-safety": {"fdl_jailbreaking": 0.05},
+    "/v3/guardrails/sensitive-information": {
+        "fdl_sensitive_information_scores": [{"label": "email", "text": "a@b.co", "score": 0.99, "start": 3, "end": 9}],
+        },
+    }
+
+
+def _client(mock_guardrail_client, delay: float = 0.0, failing: str | None = None) -> GuardrailClient:
+    """Install a guardrail client whose endpoints answer from RESPONSES after `delay` seconds."""
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        if request.url.path == failing:
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, json=RESPONSES[request.url.path])
+
+    def sync_handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(delay)
+        if request.url.path == failing:
+            return httpx.Response(503, text="unavailable")
+        return httpx.Response(200, json=RESPONSES[request.url.path])
+
+    return mock_guardrail_client(sync_handler, async_handler)
+
+
+class TestAsyncGuardrailFunctions:
+    """Test the async guardrail functions and tools"""
+
+    def test_async_pii_matches_sync_shape(self, mock_guardrail_client):
+        """aget_pii_guardrail_results returns the same simplified entities as the sync variant"""
+        _client(mock_guardrail_client)
+        entities, _ = asyncio.run(fiddler_gaurdrails.aget_pii_guardrail_results("my a@b.co"))
+        assert entities == [{"label": "email", "text": "a@b.co", "score": 0.99}]
+        assert fiddler_gaurdrails.get_pii_guardrail_results("my a@b.co")[0] == entities
+
+    def test_tools_have_native_coroutines(self, mock_guardrail_client):
+        """ainvoke on the safety and PII tools uses the async implementation"""
+        _client(mock_guardrail_client)
+        safety = asyncio.run(fiddler_gaurdrails.tool_fiddler_guardrail_safety.ainvoke({"query": "hello"}))
+        pii = asyncio.run(fiddler_gaurdrails.tool_fiddler_guardrail_pii.ainvoke({"text": "my a@b.co"}))
+        assert fiddler_gaurdrails.tool_fiddler_guardrail_safety.coroutine is not None
+        assert safety["jailbreak_score"] == 0.05
+        assert pii["pii_detected"] is True
+        assert pii["entity_count"] == 1
+
+    def test_error_status_raises(self, mock_guardrail_client):
+        """A non-200 guardrail response raises ValueError"""
+        _client(mock_guardrail_client, failing="/v3/guardrails/ftl-safety")
+        with pytest.raises(ValueError, match="503"):
+            asyncio.run(fiddler_gaurdrails.aget_safety_guardrail_results("hello"))
+
+
+class TestGuardrailPreflight:
+    """Test the concurrent pre-flight checks"""
+
+    def test_checks_run_concurrently(self, mock_guardrail_client):
+        """Both checks overlap, so the pre-flight takes about one round-trip"""
+        _client(mock_guardrail_client, delay=0.2)
+        start = time.perf_counter()
+        results = asyncio.run(fiddler_gaurdrails.arun_guardrail_preflight("my a@b.co"))
+        assert time.perf_counter() - start < 0.35
+        assert results["safety"]["jailbreak_score"] == 0.05
+        assert results["pii"]["detected_entities"][0]["label"] == "email"
+
+    def test_sync_checks_run_concurrently(self, mock_guardrail_client):
+        """The sync pre-flight runs both requests in parallel threads"""
+        _client(mock_guardrail_client, delay=0.2)
+        start = time.perf_counter()
+        results = fiddler_gaurdrails.run_guardrail_preflight("hello")
+        assert time.perf_counter() - start < 0.35
+        assert set(results) == {"safety", "pii"}
+
+    def test_failed_check_is_reported_not_raised(self, mock_guardrail_client):
+        """A failing guardrail yields an error entry while the other result is kept"""
+        _client(mock_guardrail_client, failing="/v3/guardrails/sensitive-information")
+        results = asyncio.run(fiddler_gaurdrails.arun_guardrail_preflight("hello"))
+        assert "503" in results["pii"]["error"]
+        assert results["safety"]["jailbreak_score"] == 0.05
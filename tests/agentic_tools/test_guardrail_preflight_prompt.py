@@ -0,0 +1,123 @@
+"""
+Unit tests for the guardrail pre-flight state update and system prompt sections.
+"""
+import asyncio
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agentic_tools.guardrail_client import PII_ENDPOINT, SAFETY_ENDPOINT
+from src.agentic_tools.guardrail_preflight_prompt import (
+    apreflight_update,
+    format_preflight_results,
+    format_unavailable_tools,
+    latest_user_text,
+    preflight_prompt_section,
+    preflight_update,
+    )
+
+SAFETY = {"jailbreak_score": 0.05, "latency_in_seconds": 0.1}
+PII = {"pii_detected": False, "detected_entities": [], "entity_count": 0, "latency_in_seconds": 0.1}
+
+
+@pytest.fixture
+def sent(mock_guardrail_client) -> list[str]:
+    """Guardrail endpoints that answer every check as clean and record the paths they were called on."""
+    paths: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        if request.url.path == SAFETY_ENDPOINT:
+            return httpx.Response(200, json={"fdl_jailbreaking": 0.05})
+        return httpx.Response(200, json={"fdl_sensitive_information_scores": []})
+
+    mock_guardrail_client(handler)
+    return paths
+
+
+class TestLatestUserText:
+    """Test which message the pre-flight checks run on"""
+
+    def test_latest_human_message_wins(self):
+        """The most recent HumanMessage is used, whatever follows it"""
+        state = {"messages": [HumanMessage("first"), AIMessage("answer"), HumanMessage("second"), AIMessage("tool call")]}
+        assert latest_user_text(state) == "second"
+
+    def test_content_blocks_are_joined(self):
+        """Text blocks of multimodal content are joined into one string"""
+        state = {"messages": [HumanMessage(content=[{"type": "text", "text": "what is"}, {"type": "text", "text": "drift?"}])]}
+        assert latest_user_text(state) == "what is drift?"
+
+    def test_blank_or_missing_message_is_none(self):
+        """A whitespace-only message, or none at all, yields None"""
+        assert latest_user_text({"messages": [HumanMessage("  \n")]}) is None
+        assert latest_user_text({"messages": [AIMessage("hi")]}) is None
+        assert latest_user_text({}) is None
+
+
+class TestPromptSections:
+    """Test the system prompt sections shown to the model"""
+
+    def test_results_are_listed_by_tool(self):
+        """Successful checks are embedded as JSON under their tool names"""
+        section = format_preflight_results({"safety": SAFETY, "pii": PII})
+        assert section.startswith("## PRE-FLIGHT GUARDRAIL RESULTS")
+        assert '- `tool_fiddler_guardrail_safety`: {"jailbreak_score": 0.05' in section
+        assert "- `tool_fiddler_guardrail_pii`: " in section
+
+    def test_unavailable_and_failed_checks(self):
+        """An unavailable endpoint is not to be retried; any other failure leaves the tool call to the model"""
+        section = format_preflight_results({
+            "safety": {"status": "unavailable", "error": "circuit open"},
+            "pii": {"error": "422 Unprocessable Entity"},
+            })
+        assert "`tool_fiddler_guardrail_safety`: unavailable (circuit open); do not call the tool" in section
+        assert "`tool_fiddler_guardrail_pii`: unavailable (422 Unprocessable Entity); call the tool yourself" in section
+
+    def test_empty_results_render_nothing(self):
+        """No results and no failing endpoints add no prompt section"""
+        assert format_preflight_results({}) == ""
+        assert format_unavailable_tools({}) == ""
+        assert preflight_prompt_section({}) == ""
+
+    def test_unavailable_tools_skip_reported_ones(self):
+        """Failing endpoints are listed with their retry time unless the pre-flight results already cover them"""
+        unavailable = {
+            "tool_fiddler_guardrail_safety": {"retry_in_seconds": 12.4},
+            "tool_fiddler_guardrail_faithfulness": {"retry_in_seconds": None},
+            }
+        section = format_unavailable_tools(unavailable, {"safety": {"status": "unavailable", "error": "503"}})
+        assert section.startswith("## GUARDRAIL AVAILABILITY")
+        assert "tool_fiddler_guardrail_safety" not in section
+        assert "- `tool_fiddler_guardrail_faithfulness`: endpoint unavailable; do not call the tool" in section
+        assert "rechecked in 12s" in format_unavailable_tools(unavailable)
+
+    def test_section_combines_results_and_availability(self, monkeypatch):
+        """The model sees both sections, separated by a blank line"""
+        monkeypatch.setattr(
+            "src.agentic_tools.guardrail_preflight_prompt.unavailable_guardrail_tools",
+            lambda: {"tool_fiddler_guardrail_faithfulness": {"retry_in_seconds": 30.0}},
+            )
+        section = preflight_prompt_section({"safety": SAFETY})
+        assert section.index("## PRE-FLIGHT GUARDRAIL RESULTS") < section.index("\n\n## GUARDRAIL AVAILABILITY")
+
+
+class TestPreflightUpdate:
+    """Test the before_agent state update"""
+
+    def test_runs_both_checks_on_the_latest_message(self, sent):
+        """Sync and async updates store the safety and PII results under guardrail_preflight"""
+        state = {"messages": [HumanMessage("what is drift?")]}
+        update = preflight_update(state)
+        assert update["guardrail_preflight"]["safety"]["jailbreak_score"] == 0.05
+        assert update["guardrail_preflight"]["pii"]["pii_detected"] is False
+        assert asyncio.run(apreflight_update(state)).keys() == {"guardrail_preflight"}
+        assert sorted(set(sent)) == sorted({SAFETY_ENDPOINT, PII_ENDPOINT})
+
+    def test_empty_message_skips_the_checks(self, sent):
+        """Without user text the update is empty and no guardrail is called"""
+        state = {"messages": [HumanMessage(" ")]}
+        assert preflight_update(state) == {"guardrail_preflight": {}}
+        assert asyncio.run(apreflight_update(state)) == {"guardrail_preflight": {}}
+        assert sent == []
@@ -0,0 +1,174 @@
+"""
+Unit tests for the guardrail endpoint guards: adaptive timeouts, hedged requests and circuit breaking.
+"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import SAFETY_ENDPOINT
+from src.agentic_tools.guardrail_resilience import CLOSED, OPEN, EndpointGuard, EndpointGuards, GuardrailUnavailableError
+
+
+
+def _response(status: int = 200, body: str = "ok") -> httpx.Response:
+    return httpx.Response(status, text=body)
+
+
+def _warm(guard: EndpointGuard, latency: float, samples: int = 20) -> None:
+    for _ in range(samples):
+        guard._record_success(latency)
+
+
+class TestAdaptiveTimeout:
+    """Test the latency-derived timeout"""
+
+    def test_flat_timeout_until_enough_samples(self):
+        """The configured timeout applies until min_samples latencies are known"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=60, min_timeout=0.1, min_samples=20)
+        _warm(guard, 0.1, samples=19)
+        assert guard.timeout() == 60
+
+    def test_timeout_follows_p99(self):
+        """With enough samples the timeout is p99 x factor, within the bounds"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=60, min_timeout=0.1, p99_factor=3.0, min_samples=20)
+        _warm(guard, 0.2)
+        sent_timeouts = []
+        guard.call(lambda timeout: sent_timeouts.append(timeout) or _response())
+        assert sent_timeouts == [pytest.approx(0.6)]
+        _warm(guard, 100.0, samples=200)
+        assert guard.timeout() == 60
+
+
+class TestHedging:
+    """Test duplicate requests after the p95 delay"""
+
+    def test_sync_hedge_returns_the_faster_response(self):
+        """A slow first request is raced by a hedge that answers first"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, min_samples=1, min_hedge_delay=0.01)
+        _warm(guard, 0.02, samples=1)
+        bodies = iter(["slow", "fast"])
+
+        def send(timeout: float) -> httpx.Response:
+            body = next(bodies)
+            if body == "slow":
+                time.sleep(0.5)
+            return _response(body=body)
+
+        start = time.perf_counter()
+        assert guard.call(send).text == "fast"
+        assert time.perf_counter() - start < 0.3
+        assert guard.hedged == 1
+
+    def test_async_hedge_cancels_the_loser(self):
+        """The slower async attempt is cancelled once the hedge wins"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, min_samples=1, min_hedge_delay=0.01)
+        _warm(guard, 0.02, samples=1)
+        cancelled = []
+        bodies = iter(["slow", "fast"])
+
+        async def send(timeout: float) -> httpx.Response:
+            body = next(bodies)
+            try:
+                await asyncio.sleep(0.5 if body == "slow" else 0)
+            except asyncio.CancelledError:
+                cancelled.append(body)
+                raise
+            return _response(body=body)
+
+        async def run():
+            response = await guard.acall(send)
+            await asyncio.sleep(0)
+            return response
+
+        assert asyncio.run(run()).text == "fast"
+        assert cancelled == ["slow"]
+
+    def test_fast_requests_are_not_hedged(self):
+        """Requests answering within the p95 delay are sent once"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, min_samples=1, min_hedge_delay=0.2)
+        _warm(guard, 0.2, samples=1)
+        calls = []
+        guard.call(lambda timeout: calls.append(timeout) or _response())
+        assert len(calls) == 1
+        assert guard.hedged == 0
+
+
+class TestCircuitBreaker:
+    """Test failing fast after repeated failures"""
+
+    def test_opens_after_threshold_and_fails_fast(self, clock):
+        """Consecutive 5xx responses open the circuit; further calls do not reach the endpoint"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, failure_threshold=2, cooldown=30, clock=clock)
+        calls = []
+
+        def send(timeout: float) -> httpx.Response:
+            calls.append(timeout)
+            return _response(503, "unavailable")
+
+        for _ in range(2):
+            with pytest.raises(GuardrailUnavailableError, match="503"):
+                guard.call(send)
+        with pytest.raises(GuardrailUnavailableError, match="circuit open") as error:
+            guard.call(send)
+        assert len(calls) == 2
+        assert guard.state == OPEN
+        assert error.value.retry_after == pytest.approx(30)
+
+    def test_trial_call_after_cooldown_closes_or_reopens(self, clock):
+        """After the cooldown one trial call decides whether the circuit closes"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, failure_threshold=1, cooldown=30, clock=clock)
+        with pytest.raises(GuardrailUnavailableError):
+            guard.call(lambda timeout: _response(500))
+
+        clock.now += 31
+        with pytest.raises(GuardrailUnavailableError, match="500"):
+            guard.call(lambda timeout: _response(500))
+        assert guard.state == OPEN
+
+        clock.now += 31
+        assert guard.call(lambda timeout: _response()).status_code == 200
+        assert guard.state == CLOSED
+
+    def test_timeouts_count_as_failures(self):
+        """A transport timeout is reported as an unavailable endpoint"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5)
+
+        def send(timeout: float) -> httpx.Response:
+            raise httpx.ReadTimeout("read timed out")
+
+        with pytest.raises(GuardrailUnavailableError, match="timed out"):
+            guard.call(send)
+        assert guard.consecutive_failures == 1
+
+    def test_client_errors_are_passed_through(self):
+        """A 4xx response is returned to the caller and does not count against the endpoint"""
+        guard = EndpointGuard(SAFETY_ENDPOINT, max_timeout=5, failure_threshold=1)
+        assert guard.call(lambda timeout: _response(413)).status_code == 413
+        assert guard.state == CLOSED
+
+
+class TestUnavailableToolResult:
+    """Test the structured result the agent receives"""
+
+    def test_tools_return_unavailable_instead_of_raising(self, monkeypatch, mock_guardrail_client):
+        """A failing endpoint yields status=unavailable, and an open circuit adds retry_after_seconds"""
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request)
+            return httpx.Response(503, text="unavailable")
+
+        mock_guardrail_client(handler)
+        monkeypatch.setattr(fiddler_gaurdrails, "endpoint_guards", EndpointGuards(max_timeout=5, failure_threshold=1))
+
+        first = fiddler_gaurdrails.tool_fiddler_guardrail_safety.invoke({"query": "hello"})
+        second = fiddler_gaurdrails.tool_fiddler_guardrail_safety.invoke({"query": "hello"})
+
+        assert first["status"] == "unavailable"
+        assert "503" in first["error"]
+        assert second["status"] == "unavailable"
+        assert second["retry_after_seconds"] > 0
+        assert len(sent) == 1
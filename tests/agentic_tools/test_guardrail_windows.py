@@ -0,0 +1,118 @@
+"""
+Unit tests for token-windowed guardrail scoring of inputs over the API limits.
+"""
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import FAITHFULNESS_ENDPOINT, SAFETY_ENDPOINT
+from src.config import CONFIG_CHATBOT_NEW
+
+# 4 characters per token with the estimate encoding, so a 100-token limit holds 400 characters
+LIMITS = {
+    "GUARDRAIL_TOKEN_ENCODING": "test-estimate",
+    "GUARDRAIL_TOKEN_SAFETY_MARGIN": 1.0,
+    "GUARDRAIL_SAFETY_MAX_TOKENS": 100,
+    "GUARDRAIL_PII_MAX_TOKENS": 100,
+    "GUARDRAIL_FAITHFULNESS_CONTEXT_MAX_TOKENS": 100,
+    "GUARDRAIL_FAITHFULNESS_RESPONSE_MAX_TOKENS": 25,
+    "GUARDRAIL_WINDOW_OVERLAP_TOKENS": 5,
+    "GUARDRAIL_MAX_WINDOWS": 8,
+    }
+
+
+def _score(path: str, data: dict) -> dict:
+    """Deterministic fake guardrail scores derived from the window text."""
+    if path == SAFETY_ENDPOINT:
+        return {"fdl_jailbreaking": 0.9 if "jailbreak" in data["input"] else 0.05}
+    if path == FAITHFULNESS_ENDPOINT:
+        supported = "drift" in data["context"] or "drift" not in data["response"]
+        return {"fdl_faithful_score": 0.9 if supported else 0.1}
+    text = data["input"]
+    entities = [{"label": "email", "text": "a@b.co", "score": 0.8 if "later" in text else 0.95}] if "a@b.co" in text else []
+    return {"fdl_sensitive_information_scores": entities}
+
+
+@pytest.fixture
+def sent(monkeypatch, mock_guardrail_client) -> list[dict]:
+    """Guardrail client over fake endpoints that records every request body."""
+    bodies: list[dict] = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = json.loads(request.content)["data"]
+        with lock:
+            bodies.append({"path": request.url.path, **data})
+        return httpx.Response(200, json=_score(request.url.path, data))
+
+    mock_guardrail_client(handler)
+    for name, value in LIMITS.items():
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, name, value)
+    return bodies
+
+
+class TestWindowedSafety:
+    """Test jailbreak scoring over windows"""
+
+    def test_short_input_is_one_request(self, sent):
+        """Inputs within the limit are sent whole, as before"""
+        score, _ = fiddler_gaurdrails.get_safety_guardrail_results("hello")
+        assert score == 0.05
+        assert sent == [{"path": SAFETY_ENDPOINT, "input": "hello"}]
+
+    def test_jailbreak_at_the_end_of_a_long_input_is_caught(self, sent):
+        """The highest window score is returned, so text past the first window is covered"""
+        query = "x " * 500 + "jailbreak"
+        sync_score, _ = fiddler_gaurdrails.get_safety_guardrail_results(query)
+        async_score, _ = asyncio.run(fiddler_gaurdrails.aget_safety_guardrail_results(query))
+        assert sync_score == async_score == 0.9
+        assert all(len(body["input"]) <= 400 for body in sent)
+
+    def test_windows_beyond_the_cap_are_dropped(self, sent, monkeypatch):
+        """At most GUARDRAIL_MAX_WINDOWS requests are sent per call"""
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "GUARDRAIL_MAX_WINDOWS", 2)
+        fiddler_gaurdrails.get_safety_guardrail_results("x" * 5000)
+        assert len(sent) == 2
+
+
+class TestWindowedPII:
+    """Test PII detection over windows"""
+
+    def test_entities_are_merged_across_windows(self, sent):
+        """Entities from all windows are returned once each, with their highest score"""
+        text = "my a@b.co " + "x " * 400 + "later a@b.co"
+        entities, _ = asyncio.run(fiddler_gaurdrails.aget_pii_guardrail_results(text))
+        assert entities == [{"label": "email", "text": "a@b.co", "score": 0.95}]
+        assert len(sent) > 1
+
+    def test_entity_configuration_is_sent_with_every_window(self, sent):
+        """Custom entity categories apply to each window's request"""
+        fiddler_gaurdrails.get_pii_guardrail_results("y" * 1000, entity_categories="PHI")
+        assert {body["entity_categories"] for body in sent} == {"PHI"}
+
+
+class TestWindowedFaithfulness:
+    """Test faithfulness scoring over response and context windows"""
+
+    def test_long_context_is_fully_covered(self, sent):
+        """A response supported only by text past the first context window is still faithful"""
+        context = ["filler " * 100, "drift is measured against a baseline"]
+        score, _ = fiddler_gaurdrails.get_faithfulness_guardrail_results("drift", context)
+        assert score == 0.9
+        assert {body["path"] for body in sent} == {FAITHFULNESS_ENDPOINT}
+
+    def test_least_supported_response_window_decides(self, sent):
+        """One unsupported response window makes the whole response unfaithful"""
+        response = "fine " * 30 + "drift"
+        score, _ = asyncio.run(fiddler_gaurdrails.aget_faithfulness_guardrail_results(response, ["baselines only"]))
+        assert score == 0.1
+
+    def test_empty_inputs_still_rejected(self, sent):
+        """Empty responses raise before any request is made"""
+        with pytest.raises(ValueError, match="Response cannot be empty"):
+            fiddler_gaurdrails.get_faithfulness_guardrail_results("  ", ["doc"])
+        assert sent == []
@@ -0,0 +1,88 @@
+"""
+Unit tests for the local vector index mirror.
+"""
+import numpy as np
+
+from src.agentic_tools.local_vector_index import LocalVectorIndex
+
+
+def _build(tmp_path):
+    return LocalVectorIndex.build(
+        str(tmp_path),
+        row_ids=["r1", "r2", "r3"],
+        vectors=[[1.0, 0.0], [0.0, 2.0], [1.0, 1.0]],
+        bodies=["alerts", "drift", "alerts and drift"],
+        metadatas=[{"source_type": "docs"}, {"source_type": "blogs"}, {"source_type": "docs"}],
+        corpus_version="vector_index_feed_1",
+        source="test",
+        )
+
+
+class TestLocalVectorIndex:
+    """Test build, load and search of the local index."""
+
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        """Test that a built index loads back with memory-mapped vectors and its manifest."""
+        _build(tmp_path)
+        assert LocalVectorIndex.exists(str(tmp_path))
+
+        index = LocalVectorIndex.load(str(tmp_path))
+        assert isinstance(index.vectors, np.memmap)
+        assert index.corpus_version == "vector_index_feed_1"
+        assert len(index) == 3
+
+    def test_search_orders_by_cosine_with_cassandra_scores(self, tmp_path):
+        """Test ordering and the 0.5 + 0.5 * cosine score scale."""
+        index = _build(tmp_path)
+        results = index.similarity_search_with_score_by_vector([0.0, 1.0], k=2)
+
+        assert [doc.page_content for doc, _ in results] == ["drift", "alerts and drift"]
+        assert results[0][1] == 1.0
+        assert np.isclose(results[1][1], 0.5 + 0.5 * np.sqrt(0.5))
+
+    def test_metadata_filter(self, tmp_path):
+        """Test that a metadata filter restricts the candidate set."""
+        index = _build(tmp_path)
+        docs = index.similarity_search_by_vector([0.0, 1.0], k=5, filter={"source_type": "docs"})
+        assert [doc.id for doc in docs] == ["r3", "r1"]
+
+
+class TestTwoStageSearch:
+    """Test the Matryoshka prefix scan with full-dimension rerank."""
+
+    def _random_index(self, tmp_path, **search_options):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(200, 64)).astype(np.float32)
+        LocalVectorIndex.build(
+            str(tmp_path),
+            row_ids=[f"r{i}" for i in range(200)],
+            vectors=vectors,
+            bodies=[f"chunk {i}" for i in range(200)],
+            metadatas=[{"source_type": "docs" if i % 2 else "blogs"} for i in range(200)],
+            corpus_version="v1",
+            source="test",
+            )
+        return vectors, LocalVectorIndex.load(str(tmp_path), **search_options)
+
+    def test_matches_exact_search_with_full_dimension_scores(self, tmp_path):
+        """Test that two-stage int8 search returns the exact top-k and full-dimension scores."""
+        vectors, exact = self._random_index(tmp_path)
+        two_stage = LocalVectorIndex.load(str(tmp_path), coarse_dims=32, quantize_int8=True, rerank_candidates=40)
+        query = vectors[7] + 0.1 * vectors[8]
+
+        expected = exact.similarity_search_with_score_by_vector(query, k=5)
+        results = two_stage.similarity_search_with_score_by_vector(query, k=5)
+        assert [doc.id for doc, _ in results] == [doc.id for doc, _ in expected]
+        assert np.allclose([score for _, score in results], [score for _, score in expected])
+
+    def test_coarse_matrix_is_smaller(self, tmp_path):
+        """Test that the int8 prefix matrix is a fraction of the full float32 matrix."""
+        _, index = self._random_index(tmp_path, coarse_dims=16, quantize_int8=True)
+        assert index.memory_bytes < index.vectors.nbytes / 8
+
+    def test_filter_applies_to_both_stages(self, tmp_path):
+        """Test that filtered two-stage search only returns matching rows."""
+        vectors, index = self._random_index(tmp_path, coarse_dims=16, quantize_int8=True, rerank_candidates=8)
+        docs = index.similarity_search_by_vector(vectors[3], k=5, filter={"source_type": "docs"})
+        assert docs[0].id == "r3"
+        assert all(doc.metadata["source_type"] == "docs" for doc in docs)
@@ -0,0 +1,105 @@
+"""
+Unit tests for the local PII pre-screen and its fast mode in the PII guardrail functions.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.guardrail_client import GuardrailClient
+from src.agentic_tools.pii_prescreen import iban_valid, is_clearly_clean, luhn_valid, prescreen
+from src.config import CONFIG_CHATBOT_NEW
+
+
+class TestChecksums:
+    """Test the checksum validators"""
+
+    def test_luhn(self):
+        """Valid test card numbers pass, a changed digit fails"""
+        assert luhn_valid("4111 1111 1111 1111")
+        assert luhn_valid("5500-0000-0000-0004")
+        assert not luhn_valid("4111 1111 1111 1112")
+
+    def test_iban(self):
+        """The mod-97 check accepts spaced and compact IBANs and rejects a typo"""
+        assert iban_valid("GB82 WEST 1234 5698 7654 32")
+        assert iban_valid("DE89370400440532013000")
+        assert not iban_valid("DE89370400440532013001")
+
+
+class TestPrescreen:
+    """Test the detectors and the clearly-clean decision"""
+
+    def test_detects_structured_entities(self):
+        """Each detector finds its entity type in the documentation example"""
+        text = (
+            "You can reach me at john.doe@email.com or call me at (217) 555-1234. "
+            "My SSN is 123-45-6789 and my card is 4111 1111 1111 1111. "
+            "IBAN GB82 WEST 1234 5698 7654 32, host 192.168.1.20"
+            )
+        assert [candidate.label for candidate in prescreen(text)] == [
+            "email", "phone_number", "social_security_number", "credit_card_number", "iban", "ip_address",
+            ]
+
+    @pytest.mark.parametrize("text", [
+        "How do I set up drift alerts?",
+        "What's new in fiddler-client 3.8.0?",
+        "Set the threshold to 0.25 and evaluate every 60 minutes.",
+        "Our p99 went from 120ms to 450ms after the 2.4 upgrade at 12:30:45",
+        ])
+    def test_product_questions_are_clearly_clean(self, text):
+        """Versions, numbers and times in ordinary questions do not trigger the remote call"""
+        assert is_clearly_clean(text)
+
+    @pytest.mark.parametrize("text", [
+        "My card 4111 1111 1111 1112 was declined",  # fails Luhn, but a long digit run
+        "My name is Priya Raman",
+        "Ship it to 221B Baker Street",
+        "I was born in March",
+        ])
+    def test_cues_send_input_to_the_remote_guardrail(self, text):
+        """Digit runs and free-form PII cue words make the input not clearly clean"""
+        assert not is_clearly_clean(text)
+
+
+class TestFastMode:
+    """Test skipping the remote PII call for clearly clean input"""
+
+    @pytest.fixture
+    def sent(self, monkeypatch) -> list[httpx.Request]:
+        requests: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"fdl_sensitive_information_scores": []})
+
+        client = GuardrailClient(
+            "https://guardrails.test",
+            timeout=5,
+            token="t",
+            transport=httpx.MockTransport(handler),
+            async_transport=httpx.MockTransport(handler),
+            )
+        monkeypatch.setattr(fiddler_gaurdrails, "guardrail_client", client)
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "PII_PRESCREEN_MODE", "fast")
+        return requests
+
+    def test_clean_input_skips_the_remote_call(self, sent):
+        """Clearly clean messages return no entities without a request"""
+        entities, _ = fiddler_gaurdrails.get_pii_guardrail_results("How do I set up drift alerts?")
+        assert entities == []
+        assert asyncio.run(fiddler_gaurdrails.aget_pii_guardrail_results("What is PSI?"))[0] == []
+        assert sent == []
+
+    def test_candidates_and_custom_categories_still_go_remote(self, sent):
+        """Inputs with candidates, and non-default entity categories, are always sent"""
+        fiddler_gaurdrails.get_pii_guardrail_results("mail me at a@b.co")
+        fiddler_gaurdrails.get_pii_guardrail_results("How do I set up drift alerts?", entity_categories="PHI")
+        assert len(sent) == 2
+
+    def test_off_mode_sends_everything(self, sent, monkeypatch):
+        """With the pre-screen off, clean input is still checked remotely"""
+        monkeypatch.setitem(CONFIG_CHATBOT_NEW, "PII_PRESCREEN_MODE", "off")
+        fiddler_gaurdrails.get_pii_guardrail_results("How do I set up drift alerts?")
+        assert len(sent) == 1
@@ -0,0 +1,187 @@
+"""
+Unit tests for the RAG tool's retrieval plumbing: corpus version checks, Cassandra row decoding, hybrid ranking and the shared post-retrieval pipeline.
+"""
+import asyncio
+import json
+
+import pytest
+import numpy as np
+from langchain_core.documents import Document
+
+from src.agentic_tools import rag
+from src.agentic_tools.bm25_index import BM25Index
+from src.agentic_tools.rag_cache import SemanticResultCache
+from src.agentic_tools.rag_postprocessing import with_scores
+from src.utils.metrics import registry as metrics_registry
+from tests.benchmarks.fakes import FakeCassandraSession, FakeHashEmbeddings, InMemoryVectorTable, make_vector_store
+
+
+class FlakySession(FakeCassandraSession):
+    """Corpus-version session whose reads fail while `down` is set."""
+
+    def __init__(self, corpus_version: str | None):
+        super().__init__(corpus_version)
+        self.down = False
+
+    def execute(self, query: str, parameters=None):
+        if self.down:
+            raise TimeoutError("Cassandra read timed out")
+        return super().execute(query, parameters)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    """A flaky session behind a fresh result cache, with the version check rate limit disabled."""
+    session = FlakySession("feed_1")
+    monkeypatch.setattr(rag, "_cassandra_session", session)
+    monkeypatch.setattr(rag, "_result_cache", SemanticResultCache(max_size=4, similarity_threshold=0.95))
+    monkeypatch.setattr(rag, "_corpus_version_checked_at", None)
+    monkeypatch.setitem(rag.CONFIG_CHATBOT_NEW, "RESULT_CACHE_VERSION_CHECK_SECONDS", 0)
+    rag._refresh_corpus_version()
+    rag._result_cache.store([1.0, 0.0], k=1, result=["d1"])
+    return session
+
+
+class TestCorpusVersion:
+    """Test that only a real corpus version change invalidates the result cache."""
+
+    def test_read_error_keeps_cache(self, session):
+        """Test that a failed version read neither clears the cache nor forgets the version."""
+        session.down = True
+        rag._refresh_corpus_version()
+        assert rag._result_cache.corpus_version == "feed_1"
+        assert rag._result_cache.lookup([1.0, 0.0], k=1) == ["d1"]
+
+        session.down = False
+        rag._refresh_corpus_version()
+        assert rag._result_cache.lookup([1.0, 0.0], k=1) == ["d1"]
+        assert rag._result_cache.invalidations == 0
+
+    def test_async_read_error_keeps_cache(self, session):
+        """Test that the async check also leaves the cache alone when the read fails."""
+        session.down = True
+        asyncio.run(rag._arefresh_corpus_version())
+        assert rag._result_cache.corpus_version == "feed_1"
+        assert rag._result_cache.lookup([1.0, 0.0], k=1) == ["d1"]
+
+    def test_version_change_clears_cache(self, session):
+        """Test that a new version read from Cassandra clears the cache."""
+        session.corpus_version = "feed_2"
+        rag._refresh_corpus_version()
+        assert rag._result_cache.corpus_version == "feed_2"
+        assert rag._result_cache.lookup([1.0, 0.0], k=1) is None
+
+
+class TestCassandraSearch:
+    """Test that the Cassandra path decodes ANN rows locally exactly like the public vector store API."""
+
+    def test_decoded_hits_match_vector_store(self, session, monkeypatch):
+        """Test that (Document, score) pairs equal CassandraVectorStore's and decoding is timed as rag.decode."""
+        embeddings = FakeHashEmbeddings(dimensions=16)
+        texts = ["drift baselines", "alerts on drift", "custom metrics"]
+        metadatas = [{"source_type": "docs"}, {"source_type": "blogs"}, {"source_type": "docs"}]
+        table = InMemoryVectorTable(["r1", "r2", "r3"], texts, metadatas, np.array(embeddings.embed_documents(texts)))
+        store = make_vector_store(embeddings, table)
+        monkeypatch.setattr(rag, "_vector_store", store)
+        monkeypatch.setattr(rag, "_local_index", None)
+        monkeypatch.setattr(rag, "_result_cache", SemanticResultCache(max_size=4, similarity_threshold=0.95))
+        query_vector = embeddings.embed_query("drift")
+
+        for filter in (None, {"source_type": "docs"}):
+            expected = store.similarity_search_with_score_by_vector(query_vector, k=2, filter=filter)
+            assert rag._search_by_vector(query_vector, 2, filter) == expected
+        assert "rag.decode" in metrics_registry.snapshot(prefix="rag.")
+
+
+class TestHybridRanking:
+    """Test that vector hits above the similarity floor are fused with BM25's own hits above the lexical floor."""
+
+    CHUNKS = [
+        "Drift monitoring compares production data against a baseline.",
+        "Alerts notify you when drift exceeds a threshold.",
+        "Use fdl.Model.from_name to fetch an onboarded model.",
+        "fdl.Model drift baseline alerts threshold production",
+        ]
+    SOURCE_TYPES = ["docs", "docs", "notebooks", "blogs"]
+
+    @pytest.fixture(autouse=True)
+    def bm25(self, monkeypatch):
+        index = BM25Index.build(self.CHUNKS, metadatas=[{"source_type": source_type} for source_type in self.SOURCE_TYPES])
+        monkeypatch.setattr(rag, "_bm25_index", index)
+        monkeypatch.setitem(rag.CONFIG_CHATBOT_NEW, "RAG_CONTEXT_ENCODING", "test-estimate")
+
+    def _scored(self, *scores: float) -> list[tuple[Document, float]]:
+        return [(Document(page_content=text), score) for text, score in zip(self.CHUNKS, scores)]
+
+    def test_every_returned_document_carries_a_score(self):
+        """Test that fused results are the floor-passing vector hits plus strong BM25 hits, each with a score."""
+        documents, scores, lexical_scores = rag._rank_query("fdl.Model drift baseline alerts", self._scored(0.82, 0.81, 0.8, 0.3))
+        returned = with_scores(with_scores(documents, scores), lexical_scores, key="lexical_score")
+
+        assert {doc.page_content for doc in returned} == set(self.CHUNKS)
+        assert all("relevance_score" in doc.metadata or "lexical_score" in doc.metadata for doc in returned)
+
+    def test_lexical_match_reorders_candidates(self):
+        """Test that BM25 moves the exact identifier match up among the vector candidates."""
+        documents, _, _ = rag._rank_query("fdl.Model.from_name", self._scored(0.82, 0.81, 0.8, 0.3))
+        assert documents[0].page_content == self.CHUNKS[2]
+
+    def test_bm25_only_exact_term_survives_fusion(self):
+        """Test that an exact-term chunk the vector search ranked below the floor is returned with a lexical_score."""
+        output = json.loads(rag._retrieval_output(["fdl.Model.from_name"], [self._scored(0.3, 0.2, 0.1, 0.1)], {}))
+        assert [doc["content"] for doc in output.values()] == [self.CHUNKS[2]]
+        metadata = next(iter(output.values()))["metadata"]
+        assert "relevance_score" not in metadata
+        assert metadata["lexical_score"] > rag.CONFIG_CHATBOT_NEW["BM25_SCORE_FLOOR"]
+
+    def test_multi_query_recall_includes_exact_term_hits(self):
+        """Test that the multi-query pipeline returns an exact-term chunk no query's vector search found, within the filter."""
+        candidates = [self._scored(0.82, 0.81, 0.3, 0.3), self._scored(0.83, 0.5, 0.3, 0.3)]
+        output = json.loads(rag._retrieval_output(["drift alerts", "fdl.Model.from_name"], candidates, {}, limit=8))
+        assert self.CHUNKS[2] in [doc["content"] for doc in output.values()]
+
+        filtered = json.loads(rag._retrieval_output(
+            ["drift alerts", "fdl.Model.from_name"], candidates, {}, limit=8, filter={"source_type": "docs"},
+            ))
+        assert self.CHUNKS[2] not in [doc["content"] for doc in filtered.values()]
+
+    def test_weak_lexical_match_is_dropped(self):
+        """Test that BM25 hits matching only a small part of the query do not reach the output."""
+        documents, scores, lexical_scores = rag._rank_query("fdl.Model drift baseline alerts", self._scored(0.3, 0.2, 0.1, 0.1))
+        assert [doc.page_content for doc in documents] == [self.CHUNKS[3]]
+        assert scores == {}
+        assert len(lexical_scores) == 1
+
+    def test_source_filter_applies_to_lexical_hits(self):
+        """Test that BM25 hits honour the same source_type filter as the vector search."""
+        assert rag._rank_query("fdl.Model.from_name", [], {"source_type": "docs"}) == ([], {}, {})
+        documents, _, _ = rag._rank_query("fdl.Model.from_name", [], {"source_type": "notebooks"})
+        assert [doc.page_content for doc in documents] == [self.CHUNKS[2]]
+
+
+class TestRetrievalOutput:
+    """Test the post-retrieval pipeline shared by the single- and multi-query tools."""
+
+    CHUNKS = ["Drift alerts fire on baselines.", "Custom metrics use FQL.", "Drift monitoring compares data.", "Unrelated chunk."]
+
+    @pytest.fixture(autouse=True)
+    def vector_only(self, monkeypatch):
+        monkeypatch.setattr(rag, "_bm25_index", None)
+        monkeypatch.setitem(rag.CONFIG_CHATBOT_NEW, "RAG_CONTEXT_ENCODING", "test-estimate")
+
+    def _scored(self, *pairs: tuple[int, float]) -> list[tuple[Document, float]]:
+        return [(Document(page_content=self.CHUNKS[i], metadata={"url": f"https://docs/{i}"}), score) for i, score in pairs]
+
+    def test_single_query_keeps_vector_order(self):
+        """One query's selected candidates are returned best first, each with its score"""
+        output = json.loads(rag._retrieval_output(["drift"], [self._scored((2, 0.82), (0, 0.81), (3, 0.3))], {}))
+        assert [doc["metadata"]["url"] for doc in output.values()] == ["https://docs/2", "https://docs/0"]
+        assert [doc["metadata"]["relevance_score"] for doc in output.values()] == [0.82, 0.81]
+
+    def test_queries_are_fused_with_best_score_and_limit(self):
+        """Documents found by several queries appear once with their best score, up to `limit` documents"""
+        candidates = [self._scored((0, 0.8), (2, 0.79)), self._scored((0, 0.9), (1, 0.85))]
+        output = json.loads(rag._retrieval_output(["drift", "alerts"], candidates, {}, limit=2))
+        assert len(output) == 2
+        first = next(iter(output.values()))["metadata"]
+        assert first == {"url": "https://docs/0", "relevance_score": 0.9}
@@ -0,0 +1,151 @@
+"""
+Unit tests for the RAG embedding and retrieval-result caches.
+"""
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.agentic_tools.rag_cache import CachedEmbeddings, EmbeddingCache, SemanticResultCache, normalize_query
+from src.utils.ttl_cache import TTLLRUCache
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic embeddings that count remote calls."""
+
+    def __init__(self):
+        self.query_calls = 0
+        self.batch_calls = 0
+
+    def embed_documents(self, texts):
+        self.batch_calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return [float(len(text)), 1.0]
+
+
+class TestNormalizeQuery:
+    """Test cache-key normalization."""
+
+    def test_case_whitespace_and_stop_words_collapse(self):
+        """Test that rephrasings differing only in filler words share a key."""
+        assert normalize_query("What is   the Fiddler Model?") == normalize_query("fiddler model")
+
+    def test_identifiers_are_preserved(self):
+        """Test that dotted API names keep their inner punctuation."""
+        assert normalize_query("How do I use fdl.Model.from_name?") == "use fdl.model.from_name"
+
+    def test_stop_word_only_query_is_not_empty(self):
+        """Test that a query made only of stop words still yields a key."""
+        assert normalize_query("What is it?") == "what is it"
+
+
+class TestTTLLRUCache:
+    """Test eviction and expiry of the generic cache."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLLRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        """Test that entries older than the TTL are treated as misses."""
+        now = [0.0]
+        cache = TTLLRUCache(max_size=4, ttl_seconds=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        now[0] = 11.0
+        assert cache.get("a") is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestCachedEmbeddings:
+    """Test the Embeddings wrapper used by the vector store."""
+
+    def test_repeated_query_hits_cache(self):
+        """Test that equivalent queries only reach the base model once."""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_size=8, ttl_seconds=60))
+
+        first = embeddings.embed_query("What is Fiddler?")
+        second = embeddings.embed_query("what is  fiddler")
+
+        assert base.query_calls == 1
+        assert first == second
+        assert embeddings.cache.stats()["hits"] == 1
+
+    def test_embed_queries_batches_only_misses(self):
+        """Test that several queries cost one batched request and cached ones are skipped."""
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, EmbeddingCache(max_size=8))
+        embeddings.embed_query("alerts")
+
+        vectors = embeddings.embed_queries(["alerts", "drift", "custom metrics"])
+
+        assert base.batch_calls == 1
+        assert base.query_calls == 1
+        assert vectors[1] == [5.0, 1.0]
+
+    def test_vectors_stored_as_float32(self):
+        """Test that cached vectors are compact read-only float32 arrays."""
+        cache = EmbeddingCache(max_size=8)
+        stored = cache.put_vector("drift", [0.1, 0.2, 0.3])
+        assert stored.dtype == np.float32
+        assert not stored.flags.writeable
+
+
+class TestSemanticResultCache:
+    """Test the similarity-keyed retrieval-result cache."""
+
+    def test_similar_query_vector_hits(self):
+        """Test that a near-duplicate query vector returns the cached documents."""
+        cache = SemanticResultCache(max_size=4, similarity_threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], k=4, result=["d1", "d2", "d3", "d4"])
+
+        assert cache.lookup([0.99, 0.05, 0.0], k=2) == ["d1", "d2"]
+        assert cache.lookup([0.0, 1.0, 0.0], k=2) is None
+
+    def test_smaller_cached_k_is_not_reused(self):
+        """Test that a result retrieved with fewer documents does not satisfy a larger k."""
+        cache = SemanticResultCache(max_size=4, similarity_threshold=0.95)
+        cache.store([1.0, 0.0], k=2, result=["d1", "d2"])
+        assert cache.lookup([1.0, 0.0], k=4) is None
+
+    def test_partitions_are_isolated(self):
+        """Test that a result cached for one metadata filter is not served for another."""
+        cache = SemanticResultCache(max_size=4, similarity_threshold=0.95)
+        cache.store([1.0, 0.0], k=1, result=["blog"], partition='{"source_type": "blogs"}')
+        assert cache.lookup([1.0, 0.0], k=1) is None
+        assert cache.lookup([1.0, 0.0], k=1, partition='{"source_type": "blogs"}') == ["blog"]
+
+    def test_corpus_version_change_invalidates(self):
+        """Test that a new corpus version clears all entries."""
+        cache = SemanticResultCache(max_size=4, similarity_threshold=0.95)
+        cache.ensure_corpus_version("vector_index_feed_1")
+        cache.store([1.0, 0.0], k=1, result=["d1"])
+
+        cache.ensure_corpus_version("vector_index_feed_1")
+        assert len(cache) == 1
+        cache.ensure_corpus_version("vector_index_feed_2")
+        assert len(cache) == 0
+        assert cache.lookup([1.0, 0.0], k=1) is None
+
+    def test_least_recently_used_slot_is_evicted(self):
+        """Test that a full cache replaces the least recently used query."""
+        now = [0.0]
+        cache = SemanticResultCache(max_size=2, similarity_threshold=0.99, clock=lambda: now[0])
+        cache.store([1.0, 0.0, 0.0], k=1, result=["a"])
+        now[0] = 1.0
+        cache.store([0.0, 1.0, 0.0], k=1, result=["b"])
+        now[0] = 2.0
+        cache.lookup([1.0, 0.0, 0.0], k=1)
+        now[0] = 3.0
+        cache.store([0.0, 0.0, 1.0], k=1, result=["c"])
+
+        assert cache.lookup([1.0, 0.0, 0.0], k=1) == ["a"]
+        assert cache.lookup([0.0, 1.0, 0.0], k=1) is None
@@ -0,0 +1,185 @@
+"""
+Unit tests for RAG post-processing: adaptive top-k, overlap merging, whitespace compaction, token budgets
+and extractive compression.
+"""
+from langchain_core.documents import Document
+
+from src.agentic_tools.rag_postprocessing import (
+    adaptive_cutoff,
+    compact_whitespace,
+    compress_document,
+    document_key,
+    merge_overlapping_documents,
+    merge_overlapping_text,
+    pack_documents,
+    split_spans,
+    token_windows,
+    with_scores,
+    )
+
+# Unknown encoding name -> deterministic chars / 4 token estimate, no tokenizer download needed
+ENCODING = "test-estimate"
+SECTION = "".join(f"Sentence number {i} about drift monitoring baselines. " for i in range(40))
+HEADER = "[CONTEXT: Monitoring > Drift]\n\n"
+CUTOFF = {"base_k": 4, "max_k": 8, "score_floor": 0.6, "elbow_ratio": 0.3, "flat_spread": 0.01}
+
+
+def _scored(*scores: float) -> list[tuple[Document, float]]:
+    return [(Document(page_content=f"doc {i}"), score) for i, score in enumerate(scores)]
+
+
+class TestAdaptiveCutoff:
+    """Test the score floor, elbow and flat-score growth of adaptive top-k."""
+
+    def test_floor_drops_weak_matches(self):
+        """Test that nothing below the absolute floor is returned."""
+        assert adaptive_cutoff(_scored(0.58, 0.55), **CUTOFF) == []
+
+    def test_elbow_cuts_after_clear_winner(self):
+        """Test that a large drop after the top hit keeps only the top hit."""
+        selected = adaptive_cutoff(_scored(0.85, 0.70, 0.69, 0.68), **CUTOFF)
+        assert [score for _, score in selected] == [0.85]
+
+    def test_graded_scores_keep_base_k(self):
+        """Test that gradually decreasing scores return base_k documents."""
+        selected = adaptive_cutoff(_scored(0.80, 0.78, 0.76, 0.74, 0.72, 0.70), **CUTOFF)
+        assert len(selected) == 4
+
+    def test_flat_scores_grow_k(self):
+        """Test that k grows past base_k only while scores stay flat."""
+        selected = adaptive_cutoff(_scored(0.750, 0.748, 0.746, 0.745, 0.744, 0.742, 0.70, 0.69), **CUTOFF)
+        assert len(selected) == 6
+
+    def test_with_scores_copies_metadata(self):
+        """Test that scores are added to copies and unknown documents are left unscored."""
+        scored = _scored(0.81234)
+        documents = with_scores([scored[0][0], Document(page_content="lexical hit")], {document_key(scored[0][0]): 0.81234})
+        assert documents[0].metadata == {"relevance_score": 0.8123}
+        assert documents[1].metadata == {}
+        assert scored[0][0].metadata == {}
+
+
+class TestMergeOverlapping:
+    """Test merging of chunks split with overlap."""
+
+    def test_suffix_prefix_overlap_is_merged_once(self):
+        """Test that two overlapping windows of a section merge back into the section."""
+        left, right = SECTION[:1200], SECTION[900:]
+        assert merge_overlapping_text(left, right, min_overlap=50, max_overlap=600) == SECTION
+
+    def test_order_independent(self):
+        """Test that the later chunk ranked first still merges in reading order."""
+        left, right = SECTION[:1200], SECTION[900:]
+        assert merge_overlapping_text(right, left, min_overlap=50, max_overlap=600) == SECTION
+
+    def test_shared_context_header_kept_once(self):
+        """Test that the `[CONTEXT: ...]` prefix of sub-chunks is not duplicated."""
+        merged = merge_overlapping_text(HEADER + SECTION[:1200], HEADER + SECTION[900:], 50, 600)
+        assert merged == HEADER + SECTION
+
+    def test_unrelated_chunks_not_merged(self):
+        """Test that chunks without a long enough overlap stay separate."""
+        assert merge_overlapping_text("alpha " * 50, "beta " * 50, 50, 600) is None
+
+    def test_different_sources_not_merged(self):
+        """Test that identical text from different URLs is kept per source."""
+        documents = [
+            Document(page_content=SECTION, metadata={"url": "https://docs.fiddler.ai/a"}),
+            Document(page_content=SECTION, metadata={"url": "https://docs.fiddler.ai/b"}),
+            ]
+        assert len(merge_overlapping_documents(documents)) == 2
+
+    def test_contained_duplicate_dropped(self):
+        """Test that a chunk contained in a better-ranked one is dropped."""
+        documents = [Document(page_content=SECTION), Document(page_content=SECTION[100:700])]
+        merged = merge_overlapping_documents(documents)
+        assert [doc.page_content for doc in merged] == [SECTION]
+
+
+class TestPackDocuments:
+    """Test whitespace compaction and the token budget."""
+
+    def test_compact_whitespace(self):
+        """Test that trailing whitespace is stripped and blank-line runs are collapsed."""
+        assert compact_whitespace("\na  \t \n\n \n\n  c  \n") == "a\n\n  c"
+
+    def test_compact_whitespace_keeps_indentation(self):
+        """Test that an indented code block and a nested list come through unchanged."""
+        text = (
+            "```python\n"
+            "def score(model):\n"
+            "    if model.ready:\n"
+            "        return model.predict()\n"
+            "    return None\n"
+            "```\n"
+            "\n"
+            "- Monitoring\n"
+            "  - Drift\n"
+            "    - Baselines"
+            )
+        assert compact_whitespace(text) == text
+
+    def test_budget_truncates_last_document(self):
+        """Test that documents are kept in rank order and the tail is truncated to the budget."""
+        documents = [Document(page_content="x" * 400), Document(page_content="y" * 4000)]
+        packed = pack_documents(documents, token_budget=300, encoding_name=ENCODING, min_tail_tokens=10)
+        assert [doc.page_content[0] for doc in packed] == ["x", "y"]
+        assert len(packed[1].page_content) == 200 * 4
+
+    def test_budget_drops_short_tail(self):
+        """Test that a tail that would be cut below `min_tail_tokens` is dropped."""
+        documents = [Document(page_content="x" * 1180), Document(page_content="y" * 4000)]
+        packed = pack_documents(documents, token_budget=300, encoding_name=ENCODING, min_tail_tokens=64)
+        assert len(packed) == 1
+
+
+class TestTokenWindows:
+    """Test splitting long text into overlapping token windows."""
+
+    def test_short_text_is_one_window(self):
+        """Test that text within the budget is returned unchanged."""
+        assert token_windows("abcd" * 10, max_tokens=10, encoding_name=ENCODING) == ["abcd" * 10]
+
+    def test_windows_overlap_and_cover_the_text(self):
+        """Test that windows respect the budget, overlap by the given tokens and reach the end."""
+        text = "".join(chr(ord("a") + i % 26) for i in range(100))
+        windows = token_windows(text, max_tokens=10, encoding_name=ENCODING, overlap_tokens=2)
+        assert [len(window) for window in windows] == [40, 40, 36]
+        assert windows[0][-8:] == windows[1][:8]
+        assert windows[-1].endswith(text[-10:])
+
+
+class TestExtractiveCompression:
+    """Test query-time sentence selection inside a chunk."""
+
+    CHUNK = (
+        HEADER
+        + "DOC_URL:https://docs.fiddler.ai/alerts\n"
+        + "Fiddler supports many integrations. Dashboards show charts. "
+        + "Alerts fire when drift exceeds a threshold. You can route alerts to Slack. "
+        + "Projects group models. Baselines are reference datasets.\n"
+        + "```python\nclient.add_alert_rule(name='drift')\n```"
+        )
+
+    def test_code_blocks_are_single_spans(self):
+        """Test that fenced code is never split into sentences."""
+        spans = split_spans("Intro text. More text.\n```python\na = 1. b = 2\n```")
+        assert spans == ["Intro text.", "More text.", "```python\na = 1. b = 2\n```"]
+
+    def test_keeps_matching_sentences_and_header(self):
+        """Test that the top spans are kept in order with the header context and source line."""
+        compressed = compress_document(Document(page_content=self.CHUNK), "alerts slack", max_spans=2).page_content
+        assert compressed == (
+            HEADER + "DOC_URL:https://docs.fiddler.ai/alerts\n"
+            + "Alerts fire when drift exceeds a threshold.\nYou can route alerts to Slack."
+            )
+
+    def test_gap_marker_between_distant_spans(self):
+        """Test that dropped text between kept spans is marked."""
+        compressed = compress_document(Document(page_content=self.CHUNK), "integrations baselines", max_spans=2).page_content
+        assert compressed.endswith("Fiddler supports many integrations.\n…\nBaselines are reference datasets.")
+
+    def test_short_chunk_unchanged(self):
+        """Test that a chunk with no more spans than the limit is returned as-is."""
+        document = Document(page_content="One sentence. Two sentences.")
+        assert compress_document(document, "sentence", max_spans=6) is document
@@ -0,0 +1,122 @@
+"""
+Unit tests for the RAG warm cache (mining, clustering, build and load).
+"""
+import json
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.agentic_tools.rag_cache import EmbeddingCache, SemanticResultCache
+from src.agentic_tools.rag_warm_cache import (
+    build_warm_cache,
+    cluster_questions,
+    load_warm_cache,
+    mine_conversations_csv,
+    mine_trace_export,
+    save_warm_cache,
+    )
+
+
+class TopicEmbeddings(Embeddings):
+    """Embeds a text onto one axis per topic word it contains."""
+
+    TOPICS = ("drift", "alerts", "publish")
+
+    def embed_documents(self, texts):
+        return [[1.0 if topic in text.lower() else 0.0 for topic in self.TOPICS] + [0.1] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class TestMining:
+    """Test query extraction from recorded traffic"""
+
+    def test_trace_export_yields_rag_tool_queries(self, tmp_path):
+        """Single and multi-query RAG tool spans are counted; other spans are ignored"""
+        path = tmp_path / "export.jsonl"
+        spans = [
+            {"tool_name": "rag_over_fiddler_knowledge_base", "tool_input": json.dumps({"query": "data drift"})},
+            {"tool_name": "rag_over_fiddler_knowledge_base", "tool_input": {"query": "data drift"}},
+            {"tool_name": "rag_over_fiddler_knowledge_base_multi", "tool_input": json.dumps({"queries": ["alerts", "data drift"]})},
+            {"tool_name": "tool_fiddler_guardrail_pii", "tool_input": json.dumps({"text": "my email"})},
+            {"tool_name": "", "tool_input": ""},
+            ]
+        path.write_text("\n".join(json.dumps(span) for span in spans) + "\nnot json\n")
+        assert mine_trace_export(str(path)) == Counter({"data drift": 3, "alerts": 1})
+
+    def test_conversation_csv_yields_short_user_turns(self, tmp_path):
+        """Only user turns short enough to be questions are counted"""
+        path = tmp_path / "conversations.csv"
+        path.write_text(
+            "id,persona,role,content\n"
+            "1,p,human,How do I set up drift alerts?\n"
+            "1,p,ai,Here is how.\n"
+            f"1,p,human,{'x' * 600}\n"
+            "2,p,human,How do I set up drift alerts?\n"
+            )
+        assert mine_conversations_csv(str(path)) == Counter({"How do I set up drift alerts?": 2})
+
+
+class TestClusterQuestions:
+    """Test greedy clustering of near-duplicate queries"""
+
+    def test_near_duplicates_merge_under_most_frequent(self):
+        """Same-key queries collapse, paraphrases join the most frequent wording's cluster, ranked by total count"""
+        counts = Counter({"data drift": 5, "drift of data": 2, "What is data drift?": 1, "publish events": 3})
+        clusters = cluster_questions(counts, TopicEmbeddings(), threshold=0.95, top_n=10)
+        assert [(cluster.representative, cluster.count) for cluster in clusters] == [("data drift", 8), ("publish events", 3)]
+        assert [text for text, _ in clusters[0].members] == ["drift of data"]
+
+    def test_top_n_limits_clusters(self):
+        """Only the most frequent clusters are kept"""
+        counts = Counter({"drift": 1, "alerts": 4, "publish": 2})
+        clusters = cluster_questions(counts, TopicEmbeddings(), threshold=0.95, top_n=2)
+        assert [cluster.representative for cluster in clusters] == ["alerts", "publish"]
+
+
+class TestWarmCacheRoundTrip:
+    """Test building, saving and loading the warm cache"""
+
+    def _build(self, tmp_path, corpus_version="feed_1"):
+        clusters = cluster_questions(Counter({"data drift": 3, "drift of data": 1}), TopicEmbeddings(), threshold=0.95, top_n=5)
+        document = Document(id="row-1", page_content="Drift is ...", metadata={"url": "https://docs/drift"})
+        payload = build_warm_cache(clusters, lambda vector: [(document, 0.9)], k=8, corpus_version=corpus_version, embedding_model="m", dimensions=4)
+        path = str(tmp_path / "warm.json")
+        save_warm_cache(payload, path)
+        return path
+
+    def test_load_fills_both_caches(self, tmp_path):
+        """Embeddings of every member and the retrieval result of the representative are cached"""
+        path = self._build(tmp_path)
+        embedding_cache = EmbeddingCache(max_size=10)
+        result_cache = SemanticResultCache(max_size=10, similarity_threshold=0.99)
+        result_cache.ensure_corpus_version("feed_1")
+
+        assert load_warm_cache(path, embedding_cache, result_cache, embedding_model="m", dimensions=4) == {"embeddings": 2, "results": 1}
+        vector = embedding_cache.get_vector("Data drift?")
+        assert vector is not None and vector.dtype == np.float32
+        assert embedding_cache.get_vector("drift of data") is not None
+        scored = result_cache.lookup(vector, k=8)
+        assert scored[0][0].id == "row-1"
+        assert scored[0][0].metadata["url"] == "https://docs/drift"
+        assert scored[0][1] == 0.9
+
+    def test_stale_corpus_loads_embeddings_only(self, tmp_path):
+        """Results built against another corpus version are not served"""
+        path = self._build(tmp_path, corpus_version="feed_0")
+        result_cache = SemanticResultCache(max_size=10, similarity_threshold=0.99)
+        result_cache.ensure_corpus_version("feed_1")
+        loaded = load_warm_cache(path, EmbeddingCache(max_size=10), result_cache, embedding_model="m", dimensions=4)
+        assert loaded == {"embeddings": 2, "results": 0}
+        assert len(result_cache) == 0
+
+    def test_other_embedding_model_is_skipped(self, tmp_path):
+        """Vectors from a different embedding model are never loaded"""
+        path = self._build(tmp_path)
+        embedding_cache = EmbeddingCache(max_size=10)
+        loaded = load_warm_cache(path, embedding_cache, SemanticResultCache(max_size=10, similarity_threshold=0.99), embedding_model="other", dimensions=4)
+        assert loaded == {"embeddings": 0, "results": 0}
+        assert len(embedding_cache) == 0
@@ -0,0 +1,87 @@
+"""
+Unit tests for the per-thread retrieval stash and ID-based faithfulness checks.
+"""
+import asyncio
+
+from langchain_core.documents import Document
+
+from src.agentic_tools import fiddler_gaurdrails
+from src.agentic_tools.retrieval_stash import RetrievalStash, retrieval_stash, thread_id_from_config
+
+DOCS = [Document(page_content="Alerts notify on drift."), Document(page_content="Baselines define reference data.")]
+
+
+class TestRetrievalStash:
+    """Test ID assignment, turn scoping and thread isolation."""
+
+    def test_ids_are_sequential_and_stable(self):
+        """Test that new documents get D1, D2... and re-retrieved documents keep their ID."""
+        stash = RetrievalStash(max_threads=4)
+        assert stash.add("t1", DOCS) == ["D1", "D2"]
+        assert stash.add("t1", [DOCS[1], Document(page_content="new")]) == ["D2", "D3"]
+
+    def test_resolve_by_id_and_all(self):
+        """Test resolving selected IDs (case-insensitive) and the whole turn."""
+        stash = RetrievalStash(max_threads=4)
+        stash.add("t1", DOCS)
+        found, missing = stash.resolve("t1", ["d2", "D9"])
+        assert found == [DOCS[1]] and missing == ["D9"]
+        assert stash.resolve("t1")[0] == DOCS
+
+    def test_start_turn_and_threads_are_isolated(self):
+        """Test that a new turn forgets old IDs and threads never see each other's documents."""
+        stash = RetrievalStash(max_threads=4)
+        stash.add("t1", DOCS)
+        assert stash.resolve("t2")[0] == []
+        stash.start_turn("t1")
+        assert stash.resolve("t1")[0] == []
+
+    def test_thread_id_from_config(self):
+        """Test thread id extraction from an injected RunnableConfig."""
+        assert thread_id_from_config({"configurable": {"thread_id": "abc"}}) == "abc"
+        assert thread_id_from_config(None) == "default"
+
+
+class TestFaithfulnessByIds:
+    """Test that the faithfulness tool resolves document text server-side."""
+
+    def test_tool_resolves_stashed_documents(self, monkeypatch):
+        """Test that only the referenced documents are sent to the guardrail."""
+        captured = {}
+
+        def fake_results(response, source_docs):
+            captured["source_docs"] = source_docs
+            return 0.9, 0.01
+
+        monkeypatch.setattr(fiddler_gaurdrails, "get_faithfulness_guardrail_results", fake_results)
+        retrieval_stash.start_turn("faithfulness-test")
+        retrieval_stash.add("faithfulness-test", DOCS)
+
+        result = fiddler_gaurdrails.tool_fiddler_guardrail_faithfulness.invoke(
+            {"response": "Alerts fire on drift.", "doc_ids": ["D1"]},
+            config={"configurable": {"thread_id": "faithfulness-test"}},
+            )
+        assert captured["source_docs"] == [DOCS[0]]
+        assert result["faithfulness_score"] == 0.9 and result["documents_checked"] == 1
+
+    def test_empty_stash_returns_no_documents(self, monkeypatch):
+        """Test that a turn without retrievals returns a no_documents result instead of raising, sync and async."""
+        monkeypatch.setattr(fiddler_gaurdrails, "get_faithfulness_guardrail_results", lambda *args: (0.9, 0.01))
+        retrieval_stash.start_turn("faithfulness-empty")
+        config = {"configurable": {"thread_id": "faithfulness-empty"}}
+
+        result = fiddler_gaurdrails.tool_fiddler_guardrail_faithfulness.invoke({"response": "Drift."}, config=config)
+        assert result["status"] == "no_documents" and result["missing_ids"] == []
+        assert asyncio.run(fiddler_gaurdrails.tool_fiddler_guardrail_faithfulness.ainvoke({"response": "Drift."}, config=config)) == result
+
+    def test_unknown_ids_return_no_documents(self):
+        """Test that IDs that match nothing in this turn are reported back as missing_ids."""
+        retrieval_stash.start_turn("faithfulness-unknown")
+        retrieval_stash.add("faithfulness-unknown", DOCS)
+
+        result = fiddler_gaurdrails.tool_fiddler_guardrail_faithfulness.invoke(
+            {"response": "Alerts fire on drift.", "doc_ids": ["D7", "d9"]},
+            config={"configurable": {"thread_id": "faithfulness-unknown"}},
+            )
+        assert result["status"] == "no_documents"
+        assert result["missing_ids"] == ["D7", "D9"]
@@ -0,0 +1,269 @@
+"""
+Offline retrieval benchmark
+
+Drives the real retrieval path (`init_rag_resources` + `rag_over_fiddler_knowledge_base`) against the
+stand-ins in `tests.benchmarks.fakes`, so no OpenAI or Astra credentials or network are needed, and
+reports throughput and latency percentiles per concurrency level plus the per-phase histograms
+recorded by `src.utils.metrics` (rag.embed, rag.ann.*, rag.decode, rag.rank, rag.format).
+
+The corpus is the latest `local_assets/vector_index_feed_*.csv` (or `--csv-path`), replicated up to
+`--corpus-size` chunks; without a feed CSV a synthetic corpus is generated. Queries are drawn from the
+corpus with a fixed seed, so two runs over the same tree are directly comparable.
+
+Usage:
+    python -m tests.benchmarks.bench_retrieval --concurrency 1 4 16 --requests 200
+    python -m tests.benchmarks.bench_retrieval --ann-latency-ms 25 --embed-latency-ms 40 --output results.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import statistics
+import time
+from contextlib import ExitStack
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+
+from src.agentic_tools import rag
+from src.config import CONFIG_CHATBOT_NEW, CONFIG_VECTOR_INDEX_MGMT
+from src.utils.metrics import registry as metrics_registry
+from tests.benchmarks.fakes import FakeCassandraSession, FakeHashEmbeddings, InMemoryVectorTable, make_vector_store
+
+FEED_GLOB = "local_assets/vector_index_feed_*.csv"
+SOURCE_TYPES = ("docs", "notebooks", "blogs", "resources")
+
+_TOPICS = [
+    "model onboarding", "baseline datasets", "data drift", "performance metrics", "custom metrics",
+    "alerts", "segments", "explainability", "LLM guardrails", "faithfulness", "jailbreak detection",
+    "PII detection", "embedding monitoring", "dashboards", "RBAC", "SSO", "python client",
+    "event publishing", "model versions", "root cause analysis",
+    ]
+_TERMS = [
+    "fdl.Model", "fdl.Project", "fdl.Alert", "publish", "baseline", "schema", "spec", "drift",
+    "threshold", "token", "dataset", "column", "segment", "metric", "monitor", "histogram", "jsd",
+    "psi", "latency", "enrichment", "embedding", "umap", "chart", "dashboard", "webhook", "slack",
+    "pagerduty", "api", "url", "organization", "role", "team", "version", "artifact", "surrogate",
+    ]
+
+
+def synthetic_corpus(size: int, seed: int = 0) -> list[dict[str, str]]:
+    """Generate `size` feed rows (text, source_type, url, header_path) in the shape data_generation emits."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        topic = rng.choice(_TOPICS)
+        source_type = SOURCE_TYPES[i % len(SOURCE_TYPES)]
+        url = f"https://docs.fiddler.ai/{source_type}/{topic.replace(' ', '-').lower()}-{i}"
+        header_path = f"{topic.title()} > Section {i % 7 + 1}"
+        sentences = [
+            f"{topic.capitalize()} uses " + " ".join(rng.choices(_TERMS, k=rng.randint(6, 14))) + "."
+            for _ in range(rng.randint(4, 10))
+            ]
+        text = f"[CONTEXT: {header_path}]\n\nDOC_URL:{url}\n\n" + " ".join(sentences)
+        rows.append({"text": text, "source_type": source_type, "url": url, "header_path": header_path})
+    return rows
+
+
+def load_corpus(csv_path: str | None, size: int | None = None, seed: int = 0) -> tuple[list[dict[str, str]], str]:
+    """
+    Corpus rows from a feed CSV, replicated (with distinct URLs) up to `size` chunks.
+    Falls back to `synthetic_corpus` when no feed CSV is available.
+
+    Returns:
+        Tuple of (rows, corpus version)
+    """
+    if csv_path is None:
+        candidates = glob.glob(FEED_GLOB)
+        csv_path = max(candidates, key=os.path.getctime) if candidates else None
+    if csv_path is None:
+        return synthetic_corpus(size or 2000, seed), "synthetic"
+
+    import pandas as pd
+
+    df = pd.read_csv(csv_path).dropna(subset=["text"])
+    df = df[df["text"].str.strip() != ""].reset_index(drop=True)
+    metadata_columns = [column for column in df.columns if column != "text"]
+    df[metadata_columns] = df[metadata_columns].fillna("")
+    base = [{column: str(row[column]) for column in df.columns} for _, row in df.iterrows()]
+    if not base:
+        raise ValueError(f"Corpus CSV {csv_path} has no non-empty text rows")
+    rows = list(base)
+    while size and len(rows) < size:
+        copy = dict(base[len(rows) % len(base)])
+        copy["url"] = f"{copy.get('url', '')}#replica-{len(rows) // len(base)}"
+        rows.append(copy)
+    return rows[:size] if size else rows, os.path.splitext(os.path.basename(csv_path))[0]
+
+
+def sample_queries(rows: list[dict[str, str]], count: int, seed: int = 0) -> list[str]:
+    """Deterministic queries made of a run of words from randomly chosen corpus chunks."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choice(rows)["text"].split()
+        start = rng.randrange(max(1, len(words) - 8))
+        queries.append(" ".join(words[start:start + rng.randint(3, 8)]))
+    return queries
+
+
+def _percentiles_ms(latencies: list[float]) -> dict[str, float]:
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+        "max_ms": float(values.max()),
+        }
+
+
+async def _run_level(queries: list[str], concurrency: int) -> dict[str, Any]:
+    """Issue every query through the async tool with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def one(i: int, query: str) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            output = await rag.rag_over_fiddler_knowledge_base.ainvoke(
+                {"query": query},
+                config={"configurable": {"thread_id": f"bench-{i % concurrency}"}},
+                )
+            latencies.append(time.perf_counter() - start)
+            if output.startswith("Error"):
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i, query) for i, query in enumerate(queries)))
+    wall = time.perf_counter() - wall_start
+    return {
+        "concurrency": concurrency,
+        "requests": len(queries),
+        "errors": errors,
+        "qps": len(queries) / wall if wall else 0.0,
+        **_percentiles_ms(latencies),
+        }
+
+
+def run_benchmark(
+    rows: list[dict[str, str]],
+    queries: list[str],
+    concurrency_levels: list[int],
+    corpus_version: str = "synthetic",
+    embed_latency_ms: float = 0.0,
+    ann_latency_ms: float = 0.0,
+    dimensions: int = CONFIG_VECTOR_INDEX_MGMT["embedding_dimensions"],
+    config_overrides: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+    """
+    Benchmark the retrieval tool over `rows` at each concurrency level.
+
+    Caches are cleared before every level, so each level sees the same cold-to-warm progression.
+    The local index mirror, BM25 and the warm cache are disabled unless re-enabled through `config_overrides`,
+    so the default run measures the Cassandra path.
+
+    Returns:
+        {"corpus": {...}, "init_ms": float, "levels": [{concurrency, requests, errors, qps, p50_ms, ...,
+        "phases": {...}, "cache": {...}}]}
+    """
+    embedding = FakeHashEmbeddings(dimensions=dimensions, latency_seconds=embed_latency_ms / 1000)
+    vectors = np.asarray([embedding._embed(row["text"]) for row in rows], dtype=np.float32)
+    table = InMemoryVectorTable(
+        row_ids=[f"row-{i}" for i in range(len(rows))],
+        bodies=[row["text"] for row in rows],
+        metadatas=[{key: value for key, value in row.items() if key != "text"} for row in rows],
+        vectors=vectors,
+        latency_seconds=ann_latency_ms / 1000,
+        )
+    session = FakeCassandraSession(corpus_version)
+    overrides = {"USE_LOCAL_VECTOR_INDEX": False, "HYBRID_BM25_ENABLED": False, "RAG_WARM_CACHE_ENABLED": False, **(config_overrides or {})}
+
+    report: dict[str, Any] = {"corpus": {"chunks": len(rows), "version": corpus_version, "dimensions": dimensions}, "levels": []}
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(CONFIG_CHATBOT_NEW, overrides))
+        stack.enter_context(patch.object(rag, "OpenAIEmbeddings", lambda **kwargs: embedding))
+        stack.enter_context(patch.object(rag, "open_cassandra_connection", lambda: (None, session)))
+        stack.enter_context(patch.object(rag, "close_cassandra_connection", lambda cluster, session: None))
+        stack.enter_context(patch.object(rag, "CassandraVectorStore", lambda embedding, **kwargs: make_vector_store(embedding, table)))
+        stack.enter_context(patch.object(rag, "_corpus_version_checked_at", None))
+
+        rag.shutdown_rag_resources()
+        start = time.perf_counter()
+        ok, message = rag.init_rag_resources()
+        report["init_ms"] = (time.perf_counter() - start) * 1000
+        if not ok:
+            raise RuntimeError(f"RAG resources failed to initialize: {message}")
+        try:
+            for concurrency in concurrency_levels:
+                rag._embedding_cache.clear()
+                rag._result_cache.clear()
+                metrics_registry.reset()
+                level = asyncio.run(_run_level(queries, concurrency))
+                level["phases"] = rag.get_rag_latency_stats()
+                level["cache"] = rag.get_rag_cache_stats()
+                report["levels"].append(level)
+        finally:
+            rag.shutdown_rag_resources()
+    return report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Plain-text table of a run_benchmark report."""
+    corpus = report["corpus"]
+    lines = [
+        f"corpus: {corpus['chunks']} chunks ({corpus['version']}), {corpus['dimensions']} dims; init {report['init_ms']:.1f} ms",
+        f"{'conc':>5} {'reqs':>6} {'err':>4} {'qps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+        ]
+    for level in report["levels"]:
+        lines.append(
+            f"{level['concurrency']:>5} {level['requests']:>6} {level['errors']:>4} {level['qps']:>9.1f} "
+            f"{level['p50_ms']:>9.2f} {level['p95_ms']:>9.2f} {level['p99_ms']:>9.2f} {level['max_ms']:>9.2f}"
+            )
+    if report["levels"]:
+        lines.append("phases at highest concurrency (p50 / p95 / p99 ms):")
+        for name, phase in sorted(report["levels"][-1]["phases"].items()):
+            lines.append(f"  {name:<20} {phase['p50_ms']:>8.2f} / {phase['p95_ms']:>8.2f} / {phase['p99_ms']:>8.2f}  (n={phase['count']})")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> dict[str, Any]:
+    parser = argparse.ArgumentParser(description="Offline benchmark of the RAG retrieval tool")
+    parser.add_argument("--csv-path", default=None, help=f"Corpus feed CSV (defaults to the latest {FEED_GLOB}, else a synthetic corpus)")
+    parser.add_argument("--corpus-size", type=int, default=None, help="Replicate (or generate) the corpus up to this many chunks")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--unique-queries", type=int, default=None, help="Size of the query pool (default: one query per request)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="Concurrency levels to run")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Simulated embedding round-trip")
+    parser.add_argument("--ann-latency-ms", type=float, default=0.0, help="Simulated Cassandra ANN round-trip")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    args = parser.parse_args(argv)
+
+    rows, corpus_version = load_corpus(args.csv_path, args.corpus_size, args.seed)
+    pool = sample_queries(rows, args.unique_queries or args.requests, args.seed)
+    queries = [pool[i % len(pool)] for i in range(args.requests)]
+    report = run_benchmark(
+        rows,
+        queries,
+        args.concurrency,
+        corpus_version=corpus_version,
+        embed_latency_ms=args.embed_latency_ms,
+        ann_latency_ms=args.ann_latency_ms,
+        )
+    report["queries"] = {"requests": len(queries), "unique": len(pool), "mean_words": statistics.mean(len(q.split()) for q in pool)}
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
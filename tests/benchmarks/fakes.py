@@ -0,0 +1,145 @@
+"""
+Offline stand-ins for the remote dependencies of the retrieval path.
+
+- FakeHashEmbeddings: deterministic feature-hashing embeddings (texts sharing words get similar vectors)
+- InMemoryVectorTable: the `metric_ann_search` / `ametric_ann_search` surface of the cassio table
+  that `CassandraVectorStore` queries, with exact cosine search in NumPy
+- FakeCassandraSession: answers the corpus-version lookups of `vector_index_mgmt`
+- make_vector_store: a `CassandraVectorStore` wired to an in-memory table without connecting anywhere
+
+Optional fixed latencies emulate the OpenAI and Astra round-trips so concurrency behaviour is visible.
+"""
+
+import asyncio
+import hashlib
+import re
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+from langchain_community.vectorstores import Cassandra as CassandraVectorStore
+from langchain_core.embeddings import Embeddings
+
+_WORD_RE = re.compile(r"[a-z0-9_.]+")
+
+
+class FakeHashEmbeddings(Embeddings):
+    """Signed feature hashing of lowercase word unigrams into `dimensions`, L2-normalized."""
+
+    def __init__(self, dimensions: int = 1536, latency_seconds: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in _WORD_RE.findall(text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class InMemoryVectorTable:
+    """
+    Exact-search replacement for the cassio `MetadataVectorCassandraTable` used by `CassandraVectorStore`.
+    Rows are returned in the cassio shape: row_id, body_blob, metadata, vector, distance (cosine similarity).
+    """
+
+    def __init__(self, row_ids: list[str], bodies: list[str], metadatas: list[dict[str, str]], vectors: np.ndarray, latency_seconds: float = 0.0):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.vectors = (vectors / norms).astype(np.float32)
+        self.row_ids = row_ids
+        self.bodies = bodies
+        self.metadatas = metadatas
+        self.latency_seconds = latency_seconds
+        self.queries = 0
+
+    def _search(self, vector: list[float], n: int, metadata: dict[str, str] | None) -> list[dict[str, Any]]:
+        self.queries += 1
+        query = np.asarray(vector, dtype=np.float32)
+        similarities = self.vectors @ (query / (np.linalg.norm(query) or 1.0))
+        if metadata:
+            mask = np.array([all(row.get(key) == value for key, value in metadata.items()) for row in self.metadatas])
+            similarities = np.where(mask, similarities, -np.inf)
+        top = np.argsort(-similarities, kind="stable")[:n]
+        return [
+            {
+                "row_id": self.row_ids[i],
+                "body_blob": self.bodies[i],
+                "metadata": dict(self.metadatas[i]),
+                "vector": self.vectors[i].tolist(),
+                "distance": float(similarities[i]),
+                }
+            for i in top
+            if np.isfinite(similarities[i])
+            ]
+
+    def metric_ann_search(self, vector: list[float], n: int, metric: str = "cos", metadata: dict[str, str] | None = None, **kwargs) -> list[dict[str, Any]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._search(vector, n, metadata)
+
+    async def ametric_ann_search(self, vector: list[float], n: int, metric: str = "cos", metadata: dict[str, str] | None = None, **kwargs) -> list[dict[str, Any]]:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._search(vector, n, metadata)
+
+
+class _ResultSet(list):
+    def one(self):
+        return self[0] if self else None
+
+
+class _CompletedFuture:
+    """Minimal ResponseFuture: callbacks fire immediately with the result."""
+
+    def __init__(self, rows: _ResultSet):
+        self.rows = rows
+
+    def add_callbacks(self, callback, errback):
+        callback(self.rows)
+
+
+class FakeCassandraSession:
+    """Session stand-in answering the corpus-version marker query."""
+
+    def __init__(self, corpus_version: str | None):
+        self.corpus_version = corpus_version
+
+    def execute(self, query: str, parameters=None) -> _ResultSet:
+        if "corpus_version" in query and self.corpus_version is not None:
+            return _ResultSet([SimpleNamespace(corpus_version=self.corpus_version)])
+        return _ResultSet()
+
+    def execute_async(self, query: str, parameters=None) -> _CompletedFuture:
+        return _CompletedFuture(self.execute(query, parameters))
+
+
+def make_vector_store(embedding: Embeddings, table: InMemoryVectorTable) -> CassandraVectorStore:
+    """A CassandraVectorStore bound to `table`; __init__ is bypassed since it would create the table via cassio."""
+    store = CassandraVectorStore.__new__(CassandraVectorStore)
+    store.embedding = embedding
+    store.table = table
+    return store
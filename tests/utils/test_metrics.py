@@ -0,0 +1,114 @@
+"""
+Unit tests for the in-process latency histograms and the `timed` helper.
+"""
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.utils.metrics import LatencyHistogram, MetricsRegistry, Sample, registry, start_metrics_server, stop_metrics_server, timed
+
+
+class TestLatencyHistogram:
+    """Test recording and percentile estimation."""
+
+    def test_percentiles_within_bucket_resolution(self):
+        """Test that p50/p99 of 1..100 ms land within the ~10% bucket width."""
+        histogram = LatencyHistogram("test")
+        for ms in range(1, 101):
+            histogram.observe(ms / 1000)
+
+        assert histogram.count == 100
+        assert histogram.percentile(0.50) == pytest.approx(0.050, rel=0.1)
+        assert histogram.percentile(0.99) == pytest.approx(0.099, rel=0.1)
+        assert histogram.percentile(1.0) == pytest.approx(0.100)
+
+    def test_empty_histogram(self):
+        """Test that an empty histogram reports zeros."""
+        assert LatencyHistogram("empty").summary()["p95_ms"] == 0.0
+
+    def test_cumulative_buckets_end_with_total(self):
+        """Test that cumulative bucket counts end with (+inf, count)."""
+        histogram = LatencyHistogram("test", buckets=(0.01, 0.1))
+        for seconds in (0.005, 0.05, 5.0):
+            histogram.observe(seconds)
+        assert histogram.bucket_counts() == [(0.01, 1), (0.1, 2), (float("inf"), 3)]
+
+
+class TestRegistry:
+    """Test the registry snapshot/dump and the timed context manager."""
+
+    def test_dump_filters_by_prefix(self, tmp_path):
+        """Test that dump writes only the histograms under the prefix."""
+        metrics = MetricsRegistry()
+        metrics.histogram("rag.embed").observe(0.2)
+        metrics.histogram("guardrail.safety").observe(0.1)
+
+        path = tmp_path / "metrics.json"
+        metrics.dump(str(path), prefix="rag.")
+        assert list(json.loads(path.read_text())) == ["rag.embed"]
+
+    def test_timed_records_into_registry(self):
+        """Test that a timed block is recorded even when it raises."""
+        before = registry.histogram("test.timed").count
+        with pytest.raises(RuntimeError), timed("test.timed", k=4):
+            raise RuntimeError("boom")
+        assert registry.histogram("test.timed").count == before + 1
+
+
+class TestPrometheus:
+    """Test labelled series, collectors and the text exposition."""
+
+    def test_labelled_series_are_kept_apart(self):
+        """Test that the same name with different labels gives separate histograms and snapshot keys."""
+        metrics = MetricsRegistry()
+        metrics.histogram("guardrail.request", labels={"endpoint": "/a"}).observe(0.1)
+        metrics.histogram("guardrail.request", labels={"endpoint": "/b"}).observe(0.2)
+        metrics.histogram("guardrail.request", labels={"endpoint": "/a"}).observe(0.3)
+        assert {key: value["count"] for key, value in metrics.snapshot().items()} == {
+            'guardrail.request{endpoint="/a"}': 2,
+            'guardrail.request{endpoint="/b"}': 1,
+            }
+
+    def test_render_prometheus(self):
+        """Test histogram buckets, counters and collector samples in the text format."""
+        metrics = MetricsRegistry()
+        histogram = metrics.histogram("guardrail.request", "Request latency", labels={"endpoint": "/a"})
+        for seconds in (0.01, 0.02, 5.0):
+            histogram.observe(seconds)
+        metrics.counter("guardrail.responses", "Responses", labels={"endpoint": "/a", "status": "200"}).inc(3)
+        metrics.register_collector("test", lambda: [Sample("guardrail.circuit_open", "gauge", "Open", {"endpoint": "/a"}, 1.0)])
+        text = metrics.render_prometheus()
+
+        assert "# TYPE guardrail_request_seconds histogram" in text
+        assert 'guardrail_request_seconds_bucket{endpoint="/a",le="+Inf"} 3' in text
+        assert 'guardrail_request_seconds_count{endpoint="/a"} 3' in text
+        assert 'guardrail_responses_total{endpoint="/a",status="200"} 3' in text
+        assert 'guardrail_circuit_open{endpoint="/a"} 1' in text
+        bucket_lines = [line for line in text.splitlines() if line.startswith("guardrail_request_seconds_bucket")]
+        assert len(bucket_lines) == len(histogram.buckets) // 8 + 1
+        counts = [int(line.rsplit(" ", 1)[1]) for line in bucket_lines]
+        assert counts == sorted(counts)
+
+    def test_failing_collector_is_skipped(self):
+        """Test that one broken collector does not break the scrape."""
+        metrics = MetricsRegistry()
+        metrics.register_collector("broken", lambda: 1 / 0)
+        metrics.counter("ok").inc()
+        assert "ok_total 1" in metrics.render_prometheus()
+
+    def test_metrics_server(self):
+        """Test that /metrics serves the registry and other paths are 404."""
+        metrics = MetricsRegistry()
+        metrics.counter("served").inc()
+        server = start_metrics_server(0, "127.0.0.1", metrics=metrics)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+                assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+                assert "served_total 1" in response.read().decode()
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{base}/other", timeout=5)
+        finally:
+            stop_metrics_server()